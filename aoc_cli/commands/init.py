@@ -491,6 +491,7 @@ def generate_secrets(vars: Dict[str, str]) -> Dict[str, str]:
         ("DJANGO_SECRET_KEY",),
         ("AUTH_SECRET_KEY",),
         ("EMQX_AUTHENTICATION__1__SECRET",),
+        ("EMQX_AUTHZ_SECRET",),
         ("ADMIN_PASSWORD",),
     )        
 
@@ -20,6 +20,7 @@ def default_env(config: InitConfig) -> Dict[str, str]:
         "EMQX_EXTERNAL_URL": f"mqtt.{config.domain}:443",
         "EMQX_INTERNAL_URL": "aoc-emqx:1883",
         "WEB_CONCURRENCY": "4",
+        "REDIS_URL": "redis://aoc-bitswan-backend-redis:6379/0",
         "SENTRY_TRACES_SAMPLE_RATE": "1.0",
         "USE_DOCKER": "yes",
         "DJANGO_READ_DOT_ENV_FILE": "False",
@@ -71,6 +72,7 @@ def write_env_files(init_config: InitConfig, env_config: Dict[str, str] | None =
                 "EMQX_EXTERNAL_URL",
                 "EMQX_INTERNAL_URL",
                 ("EMQX_JWT_SECRET", env_config.get("EMQX_AUTHENTICATION__1__SECRET")),
+                "EMQX_AUTHZ_SECRET",
                 ("DATABASE_URL", DATABASE_URL),
                 # Image version metadata (written alongside other config)
                 "BITSWAN_BACKEND_IMAGE",
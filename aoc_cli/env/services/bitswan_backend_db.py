@@ -10,6 +10,13 @@ def default_env(config: InitConfig) -> Dict[str, str]:
         "BITSWAN_BACKEND_POSTGRES_DB": "bitswan_backend",
         "BITSWAN_BACKEND_POSTGRES_HOST": "aoc-bitswan-backend-postgres",
         "BITSWAN_BACKEND_POSTGRES_PORT": "5432",
+        "BITSWAN_BACKEND_DATABASE_POOL": "True",
+        "BITSWAN_BACKEND_DATABASE_POOL_MIN_SIZE": "2",
+        "BITSWAN_BACKEND_DATABASE_POOL_MAX_SIZE": "10",
+        "BITSWAN_BACKEND_DATABASE_POOL_MAX_IDLE": "300",
+        "BITSWAN_BACKEND_DATABASE_POOL_TIMEOUT": "10",
+        "BITSWAN_BACKEND_DATABASE_POOL_HEALTH_CHECKS": "True",
+        "BITSWAN_BACKEND_DATABASE_POOL_METRICS_INTERVAL": "300",
     }
 
 
@@ -26,7 +33,16 @@ def write_env_files(init_config: InitConfig, env_config: Dict[str, str] | None =
                 ("POSTGRES_USER", env_config.get("BITSWAN_BACKEND_POSTGRES_USER")),
                 ("POSTGRES_PASSWORD", env_config.get("BITSWAN_BACKEND_POSTGRES_PASSWORD")),
                 ("POSTGRES_DB", env_config.get("BITSWAN_BACKEND_POSTGRES_DB")),
-            ]
+            ],
+            "Bitswan Backend Connection Pool": [
+                ("DATABASE_POOL", env_config.get("BITSWAN_BACKEND_DATABASE_POOL")),
+                ("DATABASE_POOL_MIN_SIZE", env_config.get("BITSWAN_BACKEND_DATABASE_POOL_MIN_SIZE")),
+                ("DATABASE_POOL_MAX_SIZE", env_config.get("BITSWAN_BACKEND_DATABASE_POOL_MAX_SIZE")),
+                ("DATABASE_POOL_MAX_IDLE", env_config.get("BITSWAN_BACKEND_DATABASE_POOL_MAX_IDLE")),
+                ("DATABASE_POOL_TIMEOUT", env_config.get("BITSWAN_BACKEND_DATABASE_POOL_TIMEOUT")),
+                ("DATABASE_POOL_HEALTH_CHECKS", env_config.get("BITSWAN_BACKEND_DATABASE_POOL_HEALTH_CHECKS")),
+                ("DATABASE_POOL_METRICS_INTERVAL", env_config.get("BITSWAN_BACKEND_DATABASE_POOL_METRICS_INTERVAL")),
+            ],
         },
     )
 
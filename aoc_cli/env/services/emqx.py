@@ -40,6 +40,10 @@ def write_env_files(init_config: InitConfig, env_config: Dict[str, str] | None =
                 "EMQX_AUTHENTICATION__1__USE_JWKS",
                 "EMQX_AUTHENTICATION__1__ALGORITHM",
             ],
+            "HTTP Authorization": [
+                # Read by the authorization source of emqx.conf
+                ("BITSWAN_BACKEND_AUTHZ_SECRET", env_config.get("EMQX_AUTHZ_SECRET")),
+            ],
         },
     )
 
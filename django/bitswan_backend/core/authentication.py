@@ -6,6 +6,7 @@ from rest_framework.exceptions import AuthenticationFailed
 
 from bitswan_backend.core.exceptions import TokenExpiredOrInvalid
 from bitswan_backend.core.services.keycloak import KeycloakService
+from bitswan_backend.core.services.users import user_resolver
 from bitswan_backend.core.models import AutomationServer
 
 User = get_user_model()
@@ -21,12 +22,10 @@ class KeycloakAuthentication(BaseAuthentication):
         if not user_info:
             raise TokenExpiredOrInvalid
 
-        email = user_info.get("email")
-        if not email:
+        user = user_resolver.resolve(user_info)
+        if user is None:
             raise TokenExpiredOrInvalid
-
-        user = User.objects.get_or_create(email=email)[0]
-        logger.info("User: %s", user)
+        logger.debug("User: %s", user)
 
         return (user, None)
 
@@ -52,14 +51,9 @@ class AutomationServerAuthentication(BaseAuthentication):
         if token_type.lower() != 'bearer':
             raise AuthenticationFailed('Invalid token type. Expected Bearer token')
             
-        # Find automation server with this token
-        try:
-            automation_server = AutomationServer.objects.get(access_token=token)
-        except AutomationServer.DoesNotExist:
-            raise AuthenticationFailed('Invalid or expired access token')
-            
-        # Check if token is still valid
-        if not automation_server.is_token_valid(token):
+        # Find automation server with this token, by its indexed digest
+        automation_server = AutomationServer.get_by_access_token(token)
+        if automation_server is None:
             raise AuthenticationFailed('Invalid or expired access token')
             
         # Create a fake user object for DRF compatibility
@@ -6,6 +6,8 @@ from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth.models import AnonymousUser
 
 from bitswan_backend.core.services.keycloak import KeycloakService
+from bitswan_backend.core.services.users import set_admin_flags
+from bitswan_backend.core.services.users import user_resolver
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -56,34 +58,29 @@ class KeycloakAdminAuthenticationBackend(ModelBackend):
                 return None
             
             # Get or create Django user
-            user, created = User.objects.get_or_create(
-                email=email,
+            user = user_resolver.resolve(
+                user_info,
                 defaults={
                     'name': user_info.get('name', ''),
                     'is_active': True,
-                }
+                },
             )
             
-            # Check if user is in GlobalSuperAdmin group
-            is_global_superadmin = self._is_global_superadmin(user_info.get('sub'))
+            # One cached Keycloak profile lookup for the GlobalSuperAdmin membership,
+            # and the email verification if it is not in the token
+            profile = self._get_admin_profile(user_id=user_info.get('sub'), email=email) or {}
+            is_global_superadmin = profile.get('is_global_superadmin', False)
             
-            # Check email verification status (default to True if not present in token)
             email_verified = user_info.get('email_verified')
             if email_verified is None:
-                # If email_verified not in token, check via Keycloak API
-                email_verified = self._is_email_verified_by_email(email)
+                email_verified = profile.get('email_verified', False)
             
-            if is_global_superadmin and email_verified:
-                user.is_staff = True
-                user.is_superuser = True
-                user.save()
-                logger.info(f"User {email} granted Django admin access via GlobalSuperAdmin group")
-            else:
-                # Ensure user is not admin if not in GlobalSuperAdmin group or email not verified
-                if user.is_staff or user.is_superuser:
-                    user.is_staff = False
-                    user.is_superuser = False
-                    user.save()
+            is_admin = is_global_superadmin and email_verified
+            if set_admin_flags(user, is_admin):
+                if is_admin:
+                    logger.info(f"User {email} granted Django admin access via GlobalSuperAdmin group")
+                else:
+                    # Not in GlobalSuperAdmin group or email not verified
                     reason = "not in GlobalSuperAdmin group" if not is_global_superadmin else "email not verified"
                     logger.info(f"User {email} Django admin access revoked - {reason}")
             
@@ -102,18 +99,15 @@ class KeycloakAdminAuthenticationBackend(ModelBackend):
             # Check password
             if user.check_password(password):
                 # Check if user is in GlobalSuperAdmin group and has verified email
-                if self._is_global_superadmin_by_email(username) and self._is_email_verified_by_email(username):
-                    user.is_staff = True
-                    user.is_superuser = True
-                    user.save()
-                    logger.info(f"User {username} granted Django admin access via GlobalSuperAdmin group")
-                else:
-                    # Ensure user is not admin if not in GlobalSuperAdmin group or email not verified
-                    if user.is_staff or user.is_superuser:
-                        user.is_staff = False
-                        user.is_superuser = False
-                        user.save()
-                        reason = "not in GlobalSuperAdmin group" if not self._is_global_superadmin_by_email(username) else "email not verified"
+                profile = self._get_admin_profile(email=username) or {}
+                is_global_superadmin = profile.get('is_global_superadmin', False)
+                is_admin = is_global_superadmin and profile.get('email_verified', False)
+                if set_admin_flags(user, is_admin):
+                    if is_admin:
+                        logger.info(f"User {username} granted Django admin access via GlobalSuperAdmin group")
+                    else:
+                        # Not in GlobalSuperAdmin group or email not verified
+                        reason = "not in GlobalSuperAdmin group" if not is_global_superadmin else "email not verified"
                         logger.info(f"User {username} Django admin access revoked - {reason}")
                 
                 return user
@@ -125,44 +119,16 @@ class KeycloakAdminAuthenticationBackend(ModelBackend):
             
         return None
     
-    def _is_global_superadmin(self, keycloak_user_id: str) -> bool:
-        """Check if Keycloak user is in GlobalSuperAdmin group."""
+    def _get_admin_profile(self, user_id=None, email=None) -> dict | None:
+        """Get the Keycloak id, email verification and GlobalSuperAdmin membership of a user."""
         try:
             keycloak_service = KeycloakService()
-            return keycloak_service.is_global_superadmin(keycloak_user_id)
-                    
-        except Exception as e:
-            logger.exception(f"Failed to check GlobalSuperAdmin membership: {e}")
+            return keycloak_service.get_admin_profile(user_id=user_id, email=email)
             
-        return False
-    
-    def _is_global_superadmin_by_email(self, email: str) -> bool:
-        """Check if user with email is in GlobalSuperAdmin group."""
-        try:
-            keycloak_service = KeycloakService()
-            user_id = keycloak_service.find_user_by_email(email)
-            
-            if user_id:
-                return self._is_global_superadmin(user_id)
-                
-        except Exception as e:
-            logger.exception(f"Failed to check GlobalSuperAdmin membership by email: {e}")
+        except Exception:
+            logger.exception("Failed to get Keycloak admin profile")
             
-        return False
-    
-    def _is_email_verified_by_email(self, email: str) -> bool:
-        """Check if user with email has verified email in Keycloak."""
-        try:
-            keycloak_service = KeycloakService()
-            user_id = keycloak_service.find_user_by_email(email)
-            
-            if user_id:
-                return keycloak_service.is_email_verified(user_id)
-                
-        except Exception as e:
-            logger.exception(f"Failed to check email verification by email: {e}")
-            
-        return False
+        return None
     
     def get_user(self, user_id):
         """Get user by ID."""
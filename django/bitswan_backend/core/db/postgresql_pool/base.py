@@ -0,0 +1,129 @@
+"""
+PostgreSQL backend taking its connections from a psycopg3 connection pool.
+
+Every worker process keeps one pool per database alias, shared by all of its
+threads, and connections go back to the pool when Django closes them at the
+end of a request. The number of Postgres connections is therefore bounded by
+the pool size per worker, and connections are reused under ASGI as well,
+where persistent connections (CONN_MAX_AGE) are not.
+
+It is configured like the pooled backend of Django 5.1, with ``OPTIONS["pool"]``
+holding the ``psycopg_pool.ConnectionPool`` arguments (``min_size``,
+``max_size``, ``max_idle``, ``timeout``, ...) and ``CONN_HEALTH_CHECKS``
+checking connections as they are taken from the pool.
+"""
+import logging
+import threading
+import time
+from typing import ClassVar
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.utils.asyncio import async_unsafe
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # alias -> ConnectionPool, shared by the connections of all threads
+    _connection_pools: ClassVar[dict] = {}
+    _connection_pools_lock = threading.Lock()
+    _metrics_logged_at = 0
+
+    @property
+    def pool(self):
+        if self.alias not in self._connection_pools:
+            with self._connection_pools_lock:
+                if self.alias not in self._connection_pools:
+                    self._connection_pools[self.alias] = self._create_pool()
+        return self._connection_pools[self.alias]
+
+    def _create_pool(self):
+        if not is_psycopg3:
+            raise ImproperlyConfigured("The pooled PostgreSQL backend requires psycopg 3 and psycopg-pool.")
+        if self.settings_dict["CONN_MAX_AGE"] != 0:
+            raise ImproperlyConfigured("Pooled connections don't support persistent connections, set CONN_MAX_AGE to 0.")
+
+        from psycopg_pool import ConnectionPool
+
+        pool_options = self.settings_dict["OPTIONS"].get("pool") or {}
+        if pool_options is True:
+            pool_options = {}
+        return ConnectionPool(
+            kwargs=self.get_connection_params(),
+            open=False,
+            configure=self._configure_connection,
+            check=ConnectionPool.check_connection if self.settings_dict["CONN_HEALTH_CHECKS"] else None,
+            name=f"django-{self.alias}",
+            **pool_options,
+        )
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict["OPTIONS"]
+        isolation_level = options.get("isolation_level")
+        self.isolation_level = (
+            base.IsolationLevel(isolation_level)
+            if isolation_level is not None
+            else base.IsolationLevel.READ_COMMITTED
+        )
+
+        self.pool.open()
+        connection = self.pool.getconn()
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        self._log_metrics()
+        return connection
+
+    def _configure_connection(self, connection):
+        """
+        Set the time zone of new pool connections, so checking them out doesn't need a query.
+        """
+        timezone_name = self.timezone_name
+        if timezone_name and connection.info.parameter_status("TimeZone") != timezone_name:
+            with connection.cursor() as cursor:
+                cursor.execute(self.ops.set_time_zone_sql(), [timezone_name])
+            connection.commit()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            # Return the connection to the pool it was taken from
+            self.connection._pool.putconn(self.connection)
+            self.connection = None
+
+    def metrics(self):
+        """
+        Counters of the worker's pool: checkouts, time spent waiting for a
+        connection, checkouts that timed out, and the current pool size.
+        """
+        stats = self.pool.get_stats()
+        checkouts = stats.get("requests_num", 0)
+        wait_ms = stats.get("requests_wait_ms", 0)
+        return {
+            "checkouts": checkouts,
+            "waiting": stats.get("requests_waiting", 0),
+            "wait_ms": wait_ms,
+            "avg_wait_ms": wait_ms / checkouts if checkouts else 0,
+            "timeouts": stats.get("requests_errors", 0),
+            "size": stats.get("pool_size", 0),
+            "available": stats.get("pool_available", 0),
+            "min_size": stats.get("pool_min", 0),
+            "max_size": stats.get("pool_max", 0),
+        }
+
+    def _log_metrics(self):
+        interval = getattr(settings, "DATABASE_POOL_METRICS_INTERVAL", 0)
+        now = time.monotonic()
+        if not interval or now - DatabaseWrapper._metrics_logged_at < interval:
+            return
+        DatabaseWrapper._metrics_logged_at = now
+        logger.info("Database pool %s metrics: %s", self.alias, self.metrics())
@@ -0,0 +1,63 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bitswan_backend.core.mqtt import MQTTService
+
+
+class Command(BaseCommand):
+    help = "Publish the queued workspace and automation server group changes to MQTT"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of queued changes published at once (default: 100)",
+        )
+        parser.add_argument(
+            "--debounce",
+            type=float,
+            default=settings.MQTT_PUBLISH_DEBOUNCE,
+            help="Seconds without changes before an object's groups are published",
+        )
+        parser.add_argument(
+            "--max-delay",
+            type=float,
+            default=settings.MQTT_PUBLISH_MAX_DELAY,
+            help="Seconds after which queued changes are published regardless of new ones",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Keep running and poll the outbox every INTERVAL seconds once it is empty",
+        )
+
+    def handle(self, *args, **options):
+        mqtt_service = MQTTService()
+
+        while True:
+            try:
+                count = self.drain(mqtt_service, options)
+                if count:
+                    self.stdout.write(self.style.SUCCESS(f"Published {count} queued group changes"))
+                    self.stdout.write(f"MQTT publisher metrics: {mqtt_service.mqtt_client.metrics()}")
+            except Exception as e:
+                if not options["interval"]:
+                    raise
+                self.stdout.write(self.style.ERROR(f"Failed to publish queued group changes: {e}"))
+
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
+
+    def drain(self, mqtt_service, options):
+        count = 0
+        while published := mqtt_service.publish_outbox(
+            options["batch_size"],
+            debounce=options["debounce"],
+            max_delay=options["max_delay"],
+        ):
+            count += published
+        return count
@@ -0,0 +1,107 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bitswan_backend.core.models import AutomationServer
+from bitswan_backend.core.models import MQTTRepublishState
+from bitswan_backend.core.models import Workspace
+from bitswan_backend.core.mqtt import MQTTService
+
+
+class Command(BaseCommand):
+    help = (
+        "Republish the retained groups of every automation server and workspace to MQTT, "
+        "once per deployment"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--deployment",
+            default=os.getenv("BITSWAN_BACKEND_IMAGE", "default"),
+            help="Deployment the republish is recorded for (default: $BITSWAN_BACKEND_IMAGE)",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=settings.MQTT_REPUBLISH_RATE,
+            help="Maximum number of messages published per second",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of objects published between checkpoints (default: 100)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Run again for a completed deployment and publish unchanged messages too",
+        )
+
+    def handle(self, *args, **options):
+        state, _ = MQTTRepublishState.objects.get_or_create(deployment=options["deployment"])
+        if state.completed_at and not options["force"]:
+            self.stdout.write(f"Groups already republished for {state.deployment}")
+            return
+
+        if options["force"]:
+            state.last_automation_server_id = None
+            state.last_workspace_id = None
+            state.completed_at = None
+            state.save()
+
+        self.mqtt_service = MQTTService()
+        self.options = options
+        self.org_group_paths = {}
+        self.started_at = time.monotonic()
+        self.published = 0
+
+        automation_servers = AutomationServer.objects.order_by("id")
+        if state.last_automation_server_id is not None:
+            automation_servers = automation_servers.filter(id__gt=state.last_automation_server_id)
+        for batch in self.batches(automation_servers):
+            self.publish(automation_servers=batch)
+            state.last_automation_server_id = batch[-1].id
+            state.save(update_fields=["last_automation_server_id", "updated_at"])
+
+        workspaces = Workspace.objects.order_by("id")
+        if state.last_workspace_id is not None:
+            workspaces = workspaces.filter(id__gt=state.last_workspace_id)
+        for batch in self.batches(workspaces):
+            self.publish(workspaces=batch)
+            state.last_workspace_id = batch[-1].id
+            state.save(update_fields=["last_workspace_id", "updated_at"])
+
+        state.completed_at = timezone.now()
+        state.save(update_fields=["completed_at", "updated_at"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Republished {self.published} group messages for {state.deployment}"),
+        )
+
+    def batches(self, queryset):
+        batch = []
+        for obj in queryset.iterator(chunk_size=self.options["batch_size"]):
+            batch.append(obj)
+            if len(batch) == self.options["batch_size"]:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def publish(self, **objects):
+        self.published += self.mqtt_service.publish_groups(
+            force=self.options["force"],
+            org_group_paths=self.org_group_paths,
+            **objects,
+        )
+        # Only checkpoint what the broker acknowledged
+        self.mqtt_service.flush()
+
+        # Pace the publishes to the configured rate
+        if self.options["rate"] > 0:
+            delay = self.published / self.options["rate"] - (time.monotonic() - self.started_at)
+            if delay > 0:
+                time.sleep(delay)
@@ -0,0 +1,53 @@
+import time
+
+import requests
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+from keycloak import KeycloakError
+
+from bitswan_backend.core.models import DirectorySyncState
+from bitswan_backend.core.services.keycloak import KeycloakService
+
+
+class Command(BaseCommand):
+    help = "Sync the local mirror of the Keycloak orgs, groups, users and memberships"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Reload the whole directory instead of applying admin events",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of parallel Keycloak requests during a full sync (default: 4)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            help="Keep running and poll for admin events every INTERVAL seconds",
+        )
+
+    def handle(self, *args, **options):
+        directory = KeycloakService().directory
+
+        synced = DirectorySyncState.objects.filter(last_full_sync_at__isnull=False).exists()
+        if options["full"] or not synced:
+            self.stdout.write("Running full Keycloak directory sync...")
+            directory.full_sync(workers=options["workers"])
+            self.stdout.write(self.style.SUCCESS("Full sync completed"))
+        else:
+            self.sync_events(directory)
+
+        while options["interval"]:
+            time.sleep(options["interval"])
+            try:
+                self.sync_events(directory)
+            except (KeycloakError, requests.RequestException, DatabaseError) as e:
+                self.stdout.write(self.style.ERROR(f"Failed to apply Keycloak admin events: {e}"))
+
+    def sync_events(self, directory):
+        count = directory.sync_events()
+        self.stdout.write(self.style.SUCCESS(f"Applied {count} Keycloak admin events"))
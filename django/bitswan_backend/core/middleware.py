@@ -0,0 +1,32 @@
+from django.http import JsonResponse
+
+from bitswan_backend.core.services.circuit import KeycloakUnavailable
+from bitswan_backend.core.services.swr import served_stale
+
+
+class KeycloakDegradedModeMiddleware:
+    """
+    Flag responses built from stale Keycloak data with an ``X-Data-Stale`` header
+    and turn calls rejected by the open circuit breaker into 503 responses.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = served_stale.set(False)
+        try:
+            response = self.get_response(request)
+            if served_stale.get():
+                response["X-Data-Stale"] = "true"
+            return response
+        finally:
+            served_stale.reset(token)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, KeycloakUnavailable):
+            return JsonResponse(
+                {"error": "Keycloak is unavailable, only cached data can be read"},
+                status=503,
+            )
+        return None
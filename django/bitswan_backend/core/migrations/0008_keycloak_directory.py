@@ -0,0 +1,60 @@
+# Generated by Django 4.2.30 on 2026-10-17 19:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_backfill_workspace_group_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirectoryGroup',
+            fields=[
+                ('id', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('parent_group_id', models.CharField(blank=True, db_index=True, max_length=255, null=True)),
+                ('name', models.CharField(max_length=255)),
+                ('path', models.CharField(db_index=True, max_length=1024)),
+                ('attributes', models.JSONField(default=dict)),
+                ('is_org', models.BooleanField(db_index=True, default=False)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DirectorySyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_full_sync_at', models.DateTimeField(blank=True, null=True)),
+                ('last_event_time', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DirectoryUser',
+            fields=[
+                ('id', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('username', models.CharField(db_index=True, max_length=255)),
+                ('email', models.CharField(blank=True, db_index=True, max_length=255, null=True)),
+                ('email_verified', models.BooleanField(default=False)),
+                ('first_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('last_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('enabled', models.BooleanField(default=True)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DirectoryMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='core.directorygroup')),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='core.directoryuser')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='directorymembership',
+            constraint=models.UniqueConstraint(fields=('user', 'group'), name='unique_directory_membership'),
+        ),
+    ]
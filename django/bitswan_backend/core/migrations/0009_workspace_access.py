@@ -0,0 +1,71 @@
+# Generated by Django 4.2.30 on 2026-10-17 19:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_workspace_access(apps, schema_editor):
+    """
+    Build the effective access rows of the existing workspaces from their
+    workspace and automation server group memberships.
+    """
+    Workspace = apps.get_model('core', 'Workspace')
+    WorkspaceAccess = apps.get_model('core', 'WorkspaceAccess')
+
+    rows = []
+    workspaces = Workspace.objects.prefetch_related(
+        'group_memberships',
+        'automation_server__group_memberships',
+    )
+    for workspace in workspaces:
+        grants = {
+            'workspace': workspace.group_memberships.all(),
+            'automation_server': workspace.automation_server.group_memberships.all(),
+        }
+        for source, memberships in grants.items():
+            # '*' grants every org member access when there are no groups
+            group_ids = {membership.keycloak_group_id for membership in memberships} or {'*'}
+            rows.extend(
+                WorkspaceAccess(workspace=workspace, keycloak_group_id=group_id, source=source)
+                for group_id in group_ids
+            )
+
+    WorkspaceAccess.objects.bulk_create(rows, ignore_conflicts=True)
+    print(f"Backfilled {len(rows)} workspace access rows")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_keycloak_directory'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='automationservergroupmembership',
+            name='keycloak_group_id',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='workspacegroupmembership',
+            name='keycloak_group_id',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.CreateModel(
+            name='WorkspaceAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('keycloak_group_id', models.CharField(max_length=255)),
+                ('source', models.CharField(choices=[('workspace', 'Workspace'), ('automation_server', 'Automation Server')], max_length=32)),
+                ('workspace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access', to='core.workspace')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['keycloak_group_id', 'source', 'workspace'], name='core_worksp_keycloa_3356d3_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='workspaceaccess',
+            constraint=models.UniqueConstraint(fields=('workspace', 'keycloak_group_id', 'source'), name='unique_workspace_access'),
+        ),
+        migrations.RunPython(backfill_workspace_access, migrations.RunPython.noop),
+    ]
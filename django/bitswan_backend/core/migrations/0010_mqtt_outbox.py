@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_workspace_access'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MQTTOutbox',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('workspace_groups', 'Workspace Groups'), ('automation_server_groups', 'Automation Server Groups')], max_length=32)),
+                ('object_id', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_until', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-17 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_mqtt_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MQTTRepublishState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('deployment', models.CharField(max_length=255, unique=True)),
+                ('last_automation_server_id', models.IntegerField(blank=True, null=True)),
+                ('last_workspace_id', models.UUIDField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
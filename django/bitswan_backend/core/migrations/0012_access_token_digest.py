@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-17 19:57
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_access_tokens(apps, schema_editor):
+    """
+    Replace the plaintext access tokens of the existing automation servers by
+    their digests, so they keep working without being stored.
+    """
+    AutomationServer = apps.get_model('core', 'AutomationServer')
+
+    automation_servers = AutomationServer.objects.exclude(access_token__isnull=True).exclude(access_token='')
+    for automation_server in automation_servers.iterator():
+        automation_server.access_token_digest = hashlib.sha256(
+            automation_server.access_token.encode(),
+        ).hexdigest()
+        automation_server.save(update_fields=['access_token_digest'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_mqtt_republish_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='automationserver',
+            name='access_token_digest',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(hash_access_tokens, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='automationserver',
+            name='access_token',
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_access_token_digest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MQTTRetainedMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=512, unique=True)),
+                ('digest', models.CharField(max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
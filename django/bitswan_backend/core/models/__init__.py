@@ -1,11 +1,22 @@
+from .access import WorkspaceAccess
 from .automation_server import AutomationServer, AutomationServerGroupMembership
+from .directory import DirectoryGroup, DirectoryMembership, DirectorySyncState, DirectoryUser
 from .organization import GroupNavigation
+from .outbox import MQTTOutbox, MQTTRepublishState, MQTTRetainedMessage
 from .workspaces import Workspace, WorkspaceGroupMembership
 
 __all__ = [
     "AutomationServer",
+    "DirectoryGroup",
+    "DirectoryMembership",
+    "DirectorySyncState",
+    "DirectoryUser",
     "GroupNavigation",
+    "MQTTOutbox",
+    "MQTTRepublishState",
+    "MQTTRetainedMessage",
     "Workspace",
+    "WorkspaceAccess",
     "WorkspaceGroupMembership",
     "AutomationServerGroupMembership",
 ]
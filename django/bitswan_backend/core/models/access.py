@@ -0,0 +1,137 @@
+from django.core.cache import cache
+from django.db import models
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import Max
+from django.db.models.query import QuerySet
+
+# Grant for every member of the org, used when a workspace or automation server has no groups
+ANY_GROUP = "*"
+
+WORKSPACE_ACCESS_GENERATION_CACHE_KEY = "workspace-access:generation"
+
+
+class WorkspaceAccessQuerySet(models.QuerySet):
+    def granted_to(self, group_ids, source):
+        return self.filter(source=source, keycloak_group_id__in=group_ids)
+
+    def effective_workspace_ids(self, group_ids):
+        """
+        Ids of the workspaces the groups can reach through both their
+        automation server and the workspace itself.
+        """
+        return (
+            self.filter(keycloak_group_id__in=[*group_ids, ANY_GROUP])
+            .values("workspace_id")
+            .annotate(sources=Count("source", distinct=True))
+            .filter(sources=len(WorkspaceAccess.Source))
+            .values("workspace_id")
+        )
+
+
+class WorkspaceAccess(models.Model):
+    """
+    Denormalized group -> workspace grants, derived from the workspace and
+    automation server group memberships. Kept up to date by their signals,
+    see rebuild_workspace_access.
+    """
+
+    class Source(models.TextChoices):
+        WORKSPACE = "workspace"
+        AUTOMATION_SERVER = "automation_server"
+
+    workspace = models.ForeignKey(
+        "Workspace",
+        on_delete=models.CASCADE,
+        related_name="access",
+    )
+    keycloak_group_id = models.CharField(max_length=255)
+    source = models.CharField(max_length=32, choices=Source.choices)
+
+    objects = WorkspaceAccessQuerySet.as_manager()
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=["workspace", "keycloak_group_id", "source"],
+                name="unique_workspace_access",
+            ),
+        )
+        indexes = (
+            models.Index(fields=["keycloak_group_id", "source", "workspace"]),
+        )
+
+
+def rebuild_workspace_access(workspaces):
+    """
+    Recompute the access rows of the given workspaces from their memberships.
+    """
+    workspaces = workspaces.prefetch_related(
+        "group_memberships",
+        "automation_server__group_memberships",
+    )
+
+    wanted = set()
+    for workspace in workspaces:
+        grants = {
+            WorkspaceAccess.Source.WORKSPACE: workspace.group_memberships.all(),
+            WorkspaceAccess.Source.AUTOMATION_SERVER: workspace.automation_server.group_memberships.all(),
+        }
+        for source, memberships in grants.items():
+            group_ids = {membership.keycloak_group_id for membership in memberships} or {ANY_GROUP}
+            wanted.update((workspace.id, group_id, source) for group_id in group_ids)
+
+    with transaction.atomic():
+        existing = list(WorkspaceAccess.objects.filter(workspace__in=workspaces))
+        stale_ids = [
+            access.id
+            for access in existing
+            if (access.workspace_id, access.keycloak_group_id, access.source) not in wanted
+        ]
+        current = {
+            (access.workspace_id, access.keycloak_group_id, access.source) for access in existing
+        }
+        WorkspaceAccess.objects.filter(id__in=stale_ids).delete()
+        WorkspaceAccess.objects.bulk_create(
+            [
+                WorkspaceAccess(workspace_id=workspace_id, keycloak_group_id=group_id, source=source)
+                for workspace_id, group_id, source in wanted - current
+            ],
+            ignore_conflicts=True,
+        )
+        transaction.on_commit(invalidate_workspace_access)
+
+
+def workspace_access_generation():
+    """
+    Counter bumped whenever workspace access may have changed, for versioning
+    cache keys of results derived from it.
+    """
+    return cache.get_or_set(WORKSPACE_ACCESS_GENERATION_CACHE_KEY, 0, None)
+
+
+def workspace_access_version():
+    """
+    Version of the workspace access rows, read from the database so that it
+    changes in every process. Rows are only ever inserted and deleted, every
+    workspace has some, and ids are not reused, so any change moves the count
+    or the max id.
+    """
+    return tuple(WorkspaceAccess.objects.aggregate(count=Count("id"), max_id=Max("id")).values())
+
+
+def invalidate_workspace_access():
+    try:
+        cache.incr(WORKSPACE_ACCESS_GENERATION_CACHE_KEY)
+    except ValueError:
+        cache.set(WORKSPACE_ACCESS_GENERATION_CACHE_KEY, 1, None)
+
+
+def is_cascade_delete(origin, models):
+    """
+    Whether a post_delete was caused by deleting one of ``models``, whose
+    access rows are deleted along with them.
+    """
+    if isinstance(origin, QuerySet):
+        return issubclass(origin.model, models)
+    return isinstance(origin, models)
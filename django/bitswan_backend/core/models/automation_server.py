@@ -1,10 +1,24 @@
+from django.conf import settings
 from django.db import models
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+import copy
+import hashlib
 import secrets
+import threading
+import time
 import uuid
 
 
+def hash_access_token(token):
+    """
+    Digest under which an access token is stored. The tokens are random enough
+    that a fast unsalted hash is fine, and lets them be looked up by index.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
 class AutomationServer(models.Model):
     id = models.AutoField(primary_key=True)
     automation_server_id = models.CharField(
@@ -19,7 +33,7 @@ class AutomationServer(models.Model):
     # New OTP and token fields
     otp = models.CharField(max_length=32, null=True, blank=True, unique=True)
     otp_expires_at = models.DateTimeField(null=True, blank=True)
-    access_token = models.TextField(null=True, blank=True)
+    access_token_digest = models.CharField(max_length=64, null=True, blank=True, unique=True)
     token_expires_at = models.DateTimeField(null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -59,25 +73,26 @@ class AutomationServer(models.Model):
         return True
     
     def generate_access_token(self):
-        """Generate a new access token for this automation server"""
+        """Generate a new access token for this automation server, only its digest is stored"""
         from django.utils import timezone
         from datetime import timedelta
         
         # Generate a secure token
-        self.access_token = secrets.token_urlsafe(32)
+        access_token = secrets.token_urlsafe(32)
+        self.access_token_digest = hash_access_token(access_token)
         # Token expires in 1 year
         self.token_expires_at = timezone.now() + timedelta(days=365)
         self.save()
-        return self.access_token
+        return access_token
     
     def is_token_valid(self, token):
         """Check if the provided token is valid and not expired"""
         from django.utils import timezone
         
-        if not self.access_token or not token:
+        if not self.access_token_digest or not token:
             return False
         
-        if self.access_token != token:
+        if not secrets.compare_digest(self.access_token_digest, hash_access_token(token)):
             return False
             
         if self.token_expires_at and timezone.now() > self.token_expires_at:
@@ -85,6 +100,78 @@ class AutomationServer(models.Model):
             
         return True
 
+    @classmethod
+    def get_by_access_token(cls, token):
+        """
+        Return the automation server of a valid access token, or None.
+        Verified tokens are cached in-process for AUTOMATION_SERVER_TOKEN_CACHE_TTL seconds.
+        """
+        digest = hash_access_token(token)
+        automation_server = verified_access_tokens.get(digest)
+        if automation_server is None:
+            automation_server = cls.objects.filter(access_token_digest=digest).first()
+            if automation_server is None:
+                return None
+            verified_access_tokens.set(digest, automation_server)
+
+        if not automation_server.is_token_valid(token):
+            return None
+        # Requests get their own copy of the cached instance
+        return copy.copy(automation_server)
+
+
+class VerifiedTokenCache:
+    """
+    In-process cache of access token digest -> automation server.
+    """
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, digest):
+        entry = self._entries.get(digest)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, digest, automation_server):
+        with self._lock:
+            if len(self._entries) >= self.maxsize:
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v[0] >= now}
+                if len(self._entries) >= self.maxsize:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[digest] = (time.monotonic() + self.ttl, automation_server)
+
+    def invalidate(self, automation_server_pk):
+        with self._lock:
+            self._entries = {
+                digest: entry
+                for digest, entry in self._entries.items()
+                if entry[1].pk != automation_server_pk
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+
+verified_access_tokens = VerifiedTokenCache(
+    ttl=settings.AUTOMATION_SERVER_TOKEN_CACHE_TTL,
+    maxsize=settings.AUTOMATION_SERVER_TOKEN_CACHE_SIZE,
+)
+
+
+@receiver([post_save, post_delete], sender=AutomationServer)
+def invalidate_verified_access_tokens(sender, instance, **kwargs):
+    """
+    Drop the cached tokens of a changed automation server, e.g. after a new token was generated
+    """
+    verified_access_tokens.invalidate(instance.pk)
+
 
 class AutomationServerGroupMembership(models.Model):
     id = models.AutoField(primary_key=True)
@@ -95,20 +182,37 @@ class AutomationServerGroupMembership(models.Model):
         null=False,
         blank=False,
     )
-    keycloak_group_id = models.CharField(max_length=255)
+    keycloak_group_id = models.CharField(max_length=255, db_index=True)
+
+    def save(self, *args, **kwargs):
+        # The outbox and access rows written by the signals below commit with the membership
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 # Signal handlers for MQTT publishing
 @receiver([post_save, post_delete], sender=AutomationServerGroupMembership)
 def publish_automation_server_groups_on_change(sender, instance, **kwargs):
     """
-    Automatically publish automation server groups to MQTT when memberships change
+    Queue a publish of the automation server groups to MQTT when memberships change
     """
-    try:
-        from bitswan_backend.core.mqtt import MQTTService
-
-        MQTTService().publish_automation_server_groups(instance.automation_server)
-    except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.warning(f"Failed to publish automation server groups to MQTT: {e}")
+    from bitswan_backend.core.models.outbox import MQTTOutbox
+
+    MQTTOutbox.enqueue(MQTTOutbox.Kind.AUTOMATION_SERVER_GROUPS, instance.automation_server_id)
+
+
+@receiver([post_save, post_delete], sender=AutomationServerGroupMembership)
+def update_workspace_access_on_membership_change(sender, instance, origin=None, **kwargs):
+    """
+    Keep the effective access table of the automation server's workspaces in sync with its groups
+    """
+    from bitswan_backend.core.models.access import is_cascade_delete
+    from bitswan_backend.core.models.access import rebuild_workspace_access
+    from bitswan_backend.core.models.workspaces import Workspace
+
+    if is_cascade_delete(origin, (Workspace, AutomationServer)):
+        return
+
+    rebuild_workspace_access(
+        Workspace.objects.filter(automation_server__id=instance.automation_server_id),
+    )
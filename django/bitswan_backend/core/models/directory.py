@@ -0,0 +1,73 @@
+from django.db import models
+
+
+class DirectoryGroup(models.Model):
+    """
+    Mirror of a Keycloak group. Orgs are the top level groups with the ``org`` type.
+    """
+
+    id = models.CharField(primary_key=True, max_length=255)
+    parent_group_id = models.CharField(max_length=255, null=True, blank=True, db_index=True)
+    name = models.CharField(max_length=255)
+    path = models.CharField(max_length=1024, db_index=True)
+    attributes = models.JSONField(default=dict)
+    is_org = models.BooleanField(default=False, db_index=True)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.path
+
+
+class DirectoryUser(models.Model):
+    """
+    Mirror of a Keycloak user.
+    """
+
+    id = models.CharField(primary_key=True, max_length=255)
+    username = models.CharField(max_length=255, db_index=True)
+    email = models.CharField(max_length=255, null=True, blank=True, db_index=True)
+    email_verified = models.BooleanField(default=False)
+    first_name = models.CharField(max_length=255, null=True, blank=True)
+    last_name = models.CharField(max_length=255, null=True, blank=True)
+    enabled = models.BooleanField(default=True)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.username
+
+
+class DirectoryMembership(models.Model):
+    """
+    Mirror of a direct Keycloak group membership.
+
+    The foreign keys have no database constraint so that memberships can be
+    synced independently of (and before) the users and groups they refer to.
+    """
+
+    user = models.ForeignKey(
+        "DirectoryUser",
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name="memberships",
+    )
+    group = models.ForeignKey(
+        "DirectoryGroup",
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name="memberships",
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(fields=["user", "group"], name="unique_directory_membership"),
+        )
+
+
+class DirectorySyncState(models.Model):
+    """
+    Progress of the Keycloak directory sync, a single row.
+    """
+
+    last_full_sync_at = models.DateTimeField(null=True, blank=True)
+    last_event_time = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,91 @@
+from django.db import models
+
+
+class MQTTOutbox(models.Model):
+    """
+    Pending publish of the groups of a workspace or automation server.
+
+    Rows are written in the transaction of the membership change and drained by
+    the ``publish_mqtt_outbox`` command, so requests don't wait on Keycloak or
+    the broker.
+    """
+
+    class Kind(models.TextChoices):
+        WORKSPACE_GROUPS = "workspace_groups"
+        AUTOMATION_SERVER_GROUPS = "automation_server_groups"
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=32, choices=Kind.choices)
+    # Workspace id or AutomationServer primary key
+    object_id = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set while a publisher handles the row, expired claims are taken over
+    claimed_until = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}"
+
+    @classmethod
+    def enqueue(cls, kind, object_id):
+        return cls.objects.create(kind=kind, object_id=str(object_id))
+
+
+class MQTTRepublishState(models.Model):
+    """
+    Progress of the ``republish_mqtt_groups`` run of a deployment, so the
+    republish happens once per deployment and resumes where it stopped.
+    """
+
+    deployment = models.CharField(max_length=255, unique=True)
+    last_automation_server_id = models.IntegerField(null=True, blank=True)
+    last_workspace_id = models.UUIDField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.deployment
+
+
+class MQTTRetainedMessage(models.Model):
+    """
+    Hash of the last retained message the broker acknowledged on a topic, so
+    unchanged group lists are not published again, also after a restart.
+    """
+
+    topic = models.CharField(max_length=512, unique=True)
+    digest = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.topic
+
+
+def enqueue_group_publishes(keycloak_group_id):
+    """
+    Queue a publish for every workspace and automation server with the group,
+    e.g. after it was renamed and its path changed.
+    """
+    from bitswan_backend.core.models.automation_server import (
+        AutomationServerGroupMembership,
+    )
+    from bitswan_backend.core.models.workspaces import WorkspaceGroupMembership
+
+    workspace_ids = WorkspaceGroupMembership.objects.filter(
+        keycloak_group_id=keycloak_group_id,
+    ).values_list("workspace_id", flat=True)
+    automation_server_ids = AutomationServerGroupMembership.objects.filter(
+        keycloak_group_id=keycloak_group_id,
+    ).values_list("automation_server_id", flat=True)
+
+    MQTTOutbox.objects.bulk_create(
+        [
+            *(
+                MQTTOutbox(kind=MQTTOutbox.Kind.WORKSPACE_GROUPS, object_id=str(object_id))
+                for object_id in set(workspace_ids)
+            ),
+            *(
+                MQTTOutbox(kind=MQTTOutbox.Kind.AUTOMATION_SERVER_GROUPS, object_id=str(object_id))
+                for object_id in set(automation_server_ids)
+            ),
+        ],
+    )
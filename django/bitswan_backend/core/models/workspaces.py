@@ -1,8 +1,11 @@
 import uuid
+from functools import partial
 
 from django.db import models
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from bitswan_backend.core.models.automation_server import AutomationServer
 from bitswan_backend.core.services.keycloak import KeycloakService
 
 class Workspace(models.Model):
@@ -26,6 +29,11 @@ class Workspace(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # The access rows written by the signals below commit with the workspace
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class WorkspaceGroupMembership(models.Model):
     id = models.AutoField(primary_key=True)
@@ -36,32 +44,70 @@ class WorkspaceGroupMembership(models.Model):
         null=False,
         blank=False,
     )
-    keycloak_group_id = models.CharField(max_length=255)
+    keycloak_group_id = models.CharField(max_length=255, db_index=True)
+
+    def save(self, *args, **kwargs):
+        # The outbox and access rows written by the signals below commit with the membership
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 # Signal handlers for MQTT publishing
 @receiver([post_save, post_delete], sender=WorkspaceGroupMembership)
 def publish_workspace_groups_on_change(sender, instance, **kwargs):
     """
-    Automatically publish workspace groups to MQTT when memberships change
+    Queue a publish of the workspace groups to MQTT when memberships change
     """
-    try:
-        from bitswan_backend.core.mqtt import MQTTService
+    from bitswan_backend.core.models.outbox import MQTTOutbox
+
+    MQTTOutbox.enqueue(MQTTOutbox.Kind.WORKSPACE_GROUPS, instance.workspace_id)
+
+@receiver([post_save, post_delete], sender=WorkspaceGroupMembership)
+def update_workspace_access_on_membership_change(sender, instance, origin=None, **kwargs):
+    """
+    Keep the effective access table in sync with the workspace's groups
+    """
+    from bitswan_backend.core.models.access import is_cascade_delete
+    from bitswan_backend.core.models.access import rebuild_workspace_access
+
+    if is_cascade_delete(origin, (Workspace, AutomationServer)):
+        return
+
+    rebuild_workspace_access(Workspace.objects.filter(id=instance.workspace_id))
+
+
+@receiver([post_save], sender=Workspace)
+def update_workspace_access(sender, instance, **kwargs):
+    """
+    Grant access to the new workspace, or to the moved one, through its automation server
+    """
+    from bitswan_backend.core.models.access import rebuild_workspace_access
+
+    rebuild_workspace_access(Workspace.objects.filter(id=instance.id))
+
+
+@receiver([post_delete], sender=Workspace)
+def invalidate_workspace_access_on_delete(sender, instance, **kwargs):
+    """
+    The access rows of the workspace are deleted along with it
+    """
+    from bitswan_backend.core.models.access import invalidate_workspace_access
+
+    transaction.on_commit(invalidate_workspace_access)
 
-        MQTTService().publish_workspace_groups(instance.workspace)
-    except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.warning(f"Failed to publish workspace groups to MQTT: {e}")
 
 @receiver([post_save], sender=Workspace)
 def create_workspace_editor_group(sender, instance, created, **kwargs):
     """
-    Create workspace editor group for the workspace
+    Create workspace editor group for the workspace, once the workspace is committed
     """
     if not created:
         return
-    
+
+    transaction.on_commit(partial(_create_workspace_editor_group, instance))
+
+
+def _create_workspace_editor_group(instance):
     try:
         from bitswan_backend.core.services.keycloak import KeycloakService
         
@@ -80,12 +126,13 @@ def create_workspace_editor_group(sender, instance, created, **kwargs):
         )
         
         # Store group membership in the database
-        WorkspaceGroupMembership.objects.create(
-            workspace=instance,
-            keycloak_group_id=editor_group_id
-        )
-        instance.workspace_group_id = editor_group_id
-        instance.save(update_fields=['workspace_group_id'])
+        with transaction.atomic():
+            WorkspaceGroupMembership.objects.create(
+                workspace=instance,
+                keycloak_group_id=editor_group_id
+            )
+            instance.workspace_group_id = editor_group_id
+            instance.save(update_fields=['workspace_group_id'])
         
         import logging
         logger = logging.getLogger(__name__)
@@ -99,11 +146,15 @@ def create_workspace_editor_group(sender, instance, created, **kwargs):
 @receiver([post_save], sender=Workspace)
 def create_workspace_keycloak_client(sender, instance, created, **kwargs):
     """
-    Create workspace keycloak client for the workspace
+    Create workspace keycloak client for the workspace, once the workspace is committed
     """
     if not created:
         return
-    
+
+    transaction.on_commit(partial(_create_workspace_keycloak_client, instance))
+
+
+def _create_workspace_keycloak_client(instance):
     try:
         import logging
         logger = logging.getLogger(__name__)
@@ -130,8 +181,13 @@ def create_workspace_keycloak_client(sender, instance, created, **kwargs):
 @receiver([post_delete], sender=Workspace)
 def delete_workspace_keycloak_client(sender, instance, **kwargs):
     """
-    Delete workspace keycloak client for the workspace and delete the workspace group
+    Delete workspace keycloak client for the workspace and delete the workspace group,
+    once the deletion is committed
     """
+    transaction.on_commit(partial(_delete_workspace_keycloak_client, instance))
+
+
+def _delete_workspace_keycloak_client(instance):
     try:
         import logging
         logger = logging.getLogger(__name__)
@@ -1,14 +1,41 @@
 import paho.mqtt.client as mqtt
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists
+from django.db.models import OuterRef
+from django.db.models import Q
+from django.utils import timezone
+import hashlib
 import json
 import logging
+import threading
+import time
+from collections import Counter
+from collections import defaultdict
+from datetime import timedelta
 
 from bitswan_backend.core.services.keycloak import KeycloakService
 from bitswan_backend.core.utils.mqtt import create_mqtt_token as create_token
 
 logger = logging.getLogger(__name__)
 
+class MQTTPublishError(Exception):
+    pass
+
+
 class MQTTClient:
+    """
+    Shared broker connection of the process.
+
+    paho's network thread connects in the background and reconnects with an
+    exponential backoff. Messages are published with MQTT_PUBLISH_QOS (1 by
+    default) and tracked until the broker acknowledges them. At most
+    MQTT_MAX_INFLIGHT are in flight, the rest wait in paho's queue, which is
+    bounded to MQTT_MAX_QUEUED_MESSAGES by ``publish``. When it is full,
+    publish waits for room ("block") or drops the message ("drop") depending
+    on MQTT_QUEUE_OVERFLOW.
+    """
+
     _instance = None
 
     def __new__(cls):
@@ -19,6 +46,12 @@ class MQTTClient:
 
     def __init__(self):
         if not self.client:
+            self._pending = {}
+            self._early_acks = set()
+            self._queue = threading.Condition()
+            self.stats = Counter(published=0, acked=0, dropped=0, failed=0)
+            self._ack_latency_total = 0.0
+            self._ack_latency_max = 0.0
             self.client = mqtt.Client()
             self.setup_client()
 
@@ -41,25 +74,113 @@ class MQTTClient:
                 logger.error(f"Failed to connect to MQTT broker with code {rc}")
 
         def on_disconnect(client, userdata, rc):
-            logger.warning("Disconnected from MQTT broker")
+            logger.warning("Disconnected from MQTT broker, reconnecting")
 
         self.client.on_connect = on_connect
         self.client.on_disconnect = on_disconnect
+        self.client.on_publish = self.on_publish
 
-        try:
-            self.client.connect(mqtt_host, mqtt_port)
-            self.client.loop_start()
-        except Exception as e:
-            logger.error(f"Error connecting to MQTT broker: {e}")
+        self.client.reconnect_delay_set(
+            min_delay=settings.MQTT_RECONNECT_MIN_DELAY,
+            max_delay=settings.MQTT_RECONNECT_MAX_DELAY,
+        )
+        self.client.max_inflight_messages_set(settings.MQTT_MAX_INFLIGHT)
+        # The queue is bounded in publish, so the overflow policy can apply
+        self.client.max_queued_messages_set(0)
+
+        # The network thread keeps retrying until the broker is reachable
+        self.client.connect_async(mqtt_host, mqtt_port)
+        self.client.loop_start()
+
+    def on_publish(self, client, userdata, mid):
+        """
+        Called by paho once the broker acknowledged a message (or once a QoS 0 message was sent).
+        """
+        with self._queue:
+            pending = self._pending.pop(mid, None)
+            if pending is None:
+                # Acknowledged before publish registered it
+                self._early_acks.add(mid)
+                return
+            self._acked(*pending)
+            self._queue.notify_all()
+
+    def _acked(self, enqueued_at, on_ack):
+        latency = time.monotonic() - enqueued_at
+        self.stats["acked"] += 1
+        self._ack_latency_total += latency
+        self._ack_latency_max = max(self._ack_latency_max, latency)
+        if on_ack:
+            try:
+                on_ack()
+            except Exception:
+                logger.exception("Error handling MQTT publish acknowledgement")
 
-    def publish(self, topic, payload, qos=0, retain=False):
+    def publish(self, topic, payload, qos=None, retain=False, on_ack=None):
+        """
+        Queue a message, returning whether it was accepted. ``on_ack`` is
+        called from the network thread once the broker acknowledged it.
+        """
         if isinstance(payload, (dict, list)):
             payload = json.dumps(payload)
+        if qos is None:
+            qos = settings.MQTT_PUBLISH_QOS
+
+        with self._queue:
+            if len(self._pending) >= settings.MQTT_MAX_QUEUED_MESSAGES and (
+                settings.MQTT_QUEUE_OVERFLOW != "block"
+                or not self._queue.wait_for(
+                    lambda: len(self._pending) < settings.MQTT_MAX_QUEUED_MESSAGES,
+                    settings.MQTT_PUBLISH_TIMEOUT,
+                )
+            ):
+                self.stats["dropped"] += 1
+                logger.error(f"MQTT publish queue is full, dropped message to {topic}")
+                return False
+
         try:
-            self.client.publish(topic, payload, qos, retain)
-            logger.debug(f"Published message to {topic}: {payload}")
+            enqueued_at = time.monotonic()
+            result = self.client.publish(topic, payload, qos, retain)
         except Exception as e:
+            self.stats["failed"] += 1
             logger.error(f"Error publishing to MQTT: {e}")
+            return False
+
+        # QoS 1 and 2 messages are kept by paho and sent once the connection is back
+        if result.rc != mqtt.MQTT_ERR_SUCCESS and not (qos > 0 and result.rc == mqtt.MQTT_ERR_NO_CONN):
+            self.stats["failed"] += 1
+            logger.error(f"Error publishing to MQTT: {mqtt.error_string(result.rc)}")
+            return False
+
+        self.stats["published"] += 1
+        with self._queue:
+            if result.mid in self._early_acks:
+                self._early_acks.discard(result.mid)
+                self._acked(enqueued_at, on_ack)
+            else:
+                self._pending[result.mid] = (enqueued_at, on_ack)
+        logger.debug(f"Published message to {topic}: {payload}")
+        return True
+
+    def flush(self, timeout):
+        """
+        Wait until every queued message is acknowledged, returning whether they were.
+        """
+        with self._queue:
+            return self._queue.wait_for(lambda: not self._pending, timeout)
+
+    def metrics(self):
+        with self._queue:
+            oldest = min((enqueued_at for enqueued_at, _ in self._pending.values()), default=None)
+            acked = self.stats["acked"]
+            return {
+                **self.stats,
+                "connected": self.client.is_connected(),
+                "queue_depth": len(self._pending),
+                "oldest_pending_age": time.monotonic() - oldest if oldest is not None else 0.0,
+                "ack_latency_avg": self._ack_latency_total / acked if acked else 0.0,
+                "ack_latency_max": self._ack_latency_max,
+            }
 
     def disconnect(self):
         if self.client:
@@ -72,40 +193,147 @@ class MQTTService:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(MQTTService, cls).__new__(cls)
+            cls._instance.mqtt_client = None
+            # topic -> digest of the retained messages acknowledged since the last flush
+            cls._instance._acked_retained = {}
+            cls._instance._acked_retained_lock = threading.Lock()
         return cls._instance
 
     def __init__(self):
-        self.mqtt_client = MQTTClient()
-        self.keycloak_service = KeycloakService()
+        if not self.mqtt_client:
+            self.mqtt_client = MQTTClient()
+            self.keycloak_service = KeycloakService()
+
+    def publish_retained(self, topic, payload, force=False):
+        """
+        Publish a retained message, unless it equals the last one retained on the topic.
+        """
+        from bitswan_backend.core.models.outbox import MQTTRetainedMessage
+
+        digest = hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+        if not force and MQTTRetainedMessage.objects.filter(topic=topic, digest=digest).exists():
+            logger.debug(f"Skipped unchanged retained message on {topic}")
+            return False
+
+        def on_ack():
+            with self._acked_retained_lock:
+                self._acked_retained[topic] = digest
+
+        if not self.mqtt_client.publish(topic, payload, retain=True, on_ack=on_ack):
+            raise MQTTPublishError(f"Failed to publish to {topic}")
+        return True
+
+    def flush(self):
+        flushed = self.mqtt_client.flush(settings.MQTT_PUBLISH_TIMEOUT)
+        self.save_retained_digests()
+        if not flushed:
+            raise MQTTPublishError("Timed out waiting for the broker to acknowledge published messages")
+
+    def save_retained_digests(self):
+        """
+        Store the hashes of the retained messages acknowledged so far. This runs
+        in the publishing thread, on_ack is called from paho's network thread.
+        """
+        from bitswan_backend.core.models.outbox import MQTTRetainedMessage
+
+        with self._acked_retained_lock:
+            acked, self._acked_retained = self._acked_retained, {}
+        if not acked:
+            return
+        MQTTRetainedMessage.objects.bulk_create(
+            [MQTTRetainedMessage(topic=topic, digest=digest) for topic, digest in acked.items()],
+            update_conflicts=True,
+            unique_fields=["topic"],
+            update_fields=["digest", "updated_at"],
+        )
+
+    def get_group_paths(self, org_id, group_ids, org_group_paths):
+        """
+        Paths of the org admin group and the given groups. ``org_group_paths``
+        caches the group paths of each org, so a batch resolves every org once.
+
+        The groups are read from Keycloak rather than from the group caches,
+        which are per process unless Redis is configured: a rename made by a
+        web worker would otherwise be published with the old path.
+        """
+        if org_id not in org_group_paths:
+            org_groups = self.keycloak_service.fetch_org_groups(org_id)
+            admin_group = next((group for group in org_groups if group["name"].lower() == "admin"), None)
+            org_group_paths[org_id] = (
+                admin_group.get("path", "") if admin_group else None,
+                {group["id"]: group.get("path", "") for group in org_groups},
+            )
+        admin_path, paths = org_group_paths[org_id]
+
+        group_paths = []
+
+        # Add admin group
+        if admin_path:
+            group_paths.append(admin_path)
+
+        for group_id in group_ids:
+            if group_id not in paths:
+                paths[group_id] = self.keycloak_service.fetch_org_group(group_id).get("path", "")
+            group_paths.append(paths[group_id])
+        return group_paths
+
+    def publish_groups(self, automation_servers=(), workspaces=(), force=False, org_group_paths=None):
+        """
+        Publish the groups of automation servers and workspaces to MQTT with persistent messages.
+        Returns the number of messages published, unchanged ones are skipped unless ``force``.
+        """
+        from bitswan_backend.core.models.automation_server import (
+            AutomationServerGroupMembership,
+        )
+        from bitswan_backend.core.models.workspaces import WorkspaceGroupMembership
+
+        if org_group_paths is None:
+            org_group_paths = {}
+        published = 0
+
+        server_group_ids = defaultdict(list)
+        for automation_server_id, group_id in AutomationServerGroupMembership.objects.filter(
+            automation_server__in=automation_servers,
+        ).values_list("automation_server_id", "keycloak_group_id"):
+            server_group_ids[automation_server_id].append(group_id)
+
+        for automation_server in automation_servers:
+            group_paths = self.get_group_paths(
+                automation_server.keycloak_org_id,
+                server_group_ids[automation_server.id],
+                org_group_paths,
+            )
+            topic = f"/orgs/{automation_server.keycloak_org_id}/automation-servers/{automation_server.automation_server_id}/groups"
+            if self.publish_retained(topic, group_paths, force=force):
+                published += 1
+                logger.info(f"Published automation server groups to {topic}: {group_paths}")
+
+        workspace_group_ids = defaultdict(list)
+        for workspace_id, group_id in WorkspaceGroupMembership.objects.filter(
+            workspace__in=workspaces,
+        ).values_list("workspace_id", "keycloak_group_id"):
+            workspace_group_ids[workspace_id].append(group_id)
+
+        for workspace in workspaces:
+            # Add editor groups
+            group_paths = self.get_group_paths(
+                workspace.keycloak_org_id,
+                workspace_group_ids[workspace.id],
+                org_group_paths,
+            )
+            topic = f"/orgs/{workspace.keycloak_org_id}/automation-servers/{workspace.automation_server_id}/c/{workspace.id}/groups"
+            if self.publish_retained(topic, group_paths, force=force):
+                published += 1
+                logger.info(f"Published workspace groups to {topic}: {group_paths}")
+
+        return published
 
     def publish_automation_server_groups(self, automation_server):
         """
         Publish automation server groups to MQTT with persistent message
         """
         try:
-            from bitswan_backend.core.models.automation_server import AutomationServerGroupMembership
-            
-            # Get all group memberships for this automation server
-            memberships = AutomationServerGroupMembership.objects.filter(
-                automation_server=automation_server
-            )
-            
-            # Extract group paths
-            group_paths = []
-            
-            # Add admin group
-            admin_group = self.keycloak_service.get_admin_org_group(automation_server.keycloak_org_id)
-            if admin_group:
-                group_paths.append(admin_group.get("path", ""))
-            
-            for membership in memberships:
-                group = self.keycloak_service.get_org_group(membership.keycloak_group_id)
-                group_paths.append(group.get("path", ""))
-            
-            topic = f"/orgs/{automation_server.keycloak_org_id}/automation-servers/{automation_server.automation_server_id}/groups"
-            self.mqtt_client.publish(topic, group_paths, retain=True)
-            logger.info(f"Published automation server groups to {topic}: {group_paths}")
-            
+            self.publish_groups(automation_servers=[automation_server])
         except Exception as e:
             logger.error(f"Error publishing automation server groups: {e}")
 
@@ -114,52 +342,86 @@ class MQTTService:
         Publish workspace groups to MQTT with persistent message
         """
         try:
-            from bitswan_backend.core.models.workspaces import WorkspaceGroupMembership
-            
-            # Get all group memberships for this workspace
-            memberships = WorkspaceGroupMembership.objects.filter(
-                workspace=workspace
-            )
-            
-            # Extract group paths and add admin group
-            group_paths = []
-            
-            # Add admin group
-            admin_group = self.keycloak_service.get_admin_org_group(workspace.keycloak_org_id)
-            if admin_group:
-                group_paths.append(admin_group.get("path", ""))
-            
-            # Add editor groups
-            for membership in memberships:
-                group = self.keycloak_service.get_org_group(membership.keycloak_group_id)
-                group_paths.append(group.get("path", ""))
-            
-            topic = f"/orgs/{workspace.keycloak_org_id}/automation-servers/{workspace.automation_server_id}/c/{workspace.id}/groups"
-            self.mqtt_client.publish(topic, group_paths, retain=True)
-            logger.info(f"Published workspace groups to {topic}: {group_paths}")
-            
+            self.publish_groups(workspaces=[workspace])
         except Exception as e:
             logger.error(f"Error publishing workspace groups: {e}")
 
-    def publish_all_groups(self):
+    def publish_outbox(self, batch_size, debounce=0, max_delay=0):
         """
-        Publish all groups for all organizations on startup
+        Publish a batch of queued group changes, returning how many were handled.
+
+        Changes are debounced: a workspace or automation server is published
+        once its changes have been quiet for ``debounce`` seconds, or at the
+        latest ``max_delay`` seconds after its oldest queued change. All of its
+        queued changes are then handled by a single publish.
+
+        The rows are claimed for MQTT_OUTBOX_CLAIM_TIMEOUT in a short
+        transaction, so no locks are held while Keycloak and the broker are
+        called. They are deleted once the broker acknowledged the batch and
+        released when it fails, so the next call retries them. Claims of a
+        publisher that died expire and are taken over.
         """
+        from bitswan_backend.core.models.automation_server import AutomationServer
+        from bitswan_backend.core.models.outbox import MQTTOutbox
+        from bitswan_backend.core.models.workspaces import Workspace
+
+        now = timezone.now()
+        quiet_since = now - timedelta(seconds=debounce)
+        newer = MQTTOutbox.objects.filter(
+            kind=OuterRef("kind"),
+            object_id=OuterRef("object_id"),
+            created_at__gt=quiet_since,
+        )
+        unclaimed = MQTTOutbox.objects.select_for_update(skip_locked=True).filter(
+            Q(claimed_until__isnull=True) | Q(claimed_until__lte=now),
+        )
+
+        with transaction.atomic():
+            messages = list(
+                unclaimed.filter(created_at__lte=quiet_since)
+                .filter(Q(created_at__lte=now - timedelta(seconds=max_delay)) | ~Exists(newer))
+                .order_by("id")[:batch_size],
+            )
+            if not messages:
+                return 0
+
+            object_ids = defaultdict(set)
+            for message in messages:
+                object_ids[message.kind].add(message.object_id)
+
+            # The publish below reads the memberships after these changes were
+            # committed, so it covers every change already queued for the objects
+            queued = Q()
+            for kind, ids in object_ids.items():
+                queued |= Q(kind=kind, object_id__in=ids)
+            handled_ids = {message.id for message in messages}
+            handled_ids.update(unclaimed.filter(queued).values_list("id", flat=True))
+
+            MQTTOutbox.objects.filter(id__in=handled_ids).update(
+                claimed_until=now + timedelta(seconds=settings.MQTT_OUTBOX_CLAIM_TIMEOUT),
+            )
+
+        automation_servers = list(
+            AutomationServer.objects.filter(id__in=object_ids[MQTTOutbox.Kind.AUTOMATION_SERVER_GROUPS]),
+        )
+        workspaces = list(
+            Workspace.objects.filter(id__in=object_ids[MQTTOutbox.Kind.WORKSPACE_GROUPS]),
+        )
+        deleted = {
+            MQTTOutbox.Kind.AUTOMATION_SERVER_GROUPS: object_ids[MQTTOutbox.Kind.AUTOMATION_SERVER_GROUPS]
+            - {str(automation_server.id) for automation_server in automation_servers},
+            MQTTOutbox.Kind.WORKSPACE_GROUPS: object_ids[MQTTOutbox.Kind.WORKSPACE_GROUPS]
+            - {str(workspace.id) for workspace in workspaces},
+        }
+        for kind, ids in deleted.items():
+            if ids:
+                logger.info(f"Dropped queued {kind} changes of deleted objects: {sorted(ids)}")
+
         try:
-            from bitswan_backend.core.models.automation_server import AutomationServer
-            from bitswan_backend.core.models.workspaces import Workspace
-            
-            # Publish automation server groups
-            automation_servers = AutomationServer.objects.all()
-            for server in automation_servers:
-                self.publish_automation_server_groups(server)
-            
-            # Publish workspace groups
-            workspaces = Workspace.objects.all()
-            for workspace in workspaces:
-                self.publish_workspace_groups(workspace)
-                
-            logger.info("Successfully published all groups on startup")
-            
-        except Exception as e:
-            logger.error(f"Error publishing all groups on startup: {e}")
+            self.publish_groups(automation_servers=automation_servers, workspaces=workspaces)
+            self.flush()
+        except Exception:
+            MQTTOutbox.objects.filter(id__in=handled_ids).update(claimed_until=None)
+            raise
+        MQTTOutbox.objects.filter(id__in=handled_ids).delete()
+        return len(messages)
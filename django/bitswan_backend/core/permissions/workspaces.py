@@ -6,7 +6,7 @@ from rest_framework.permissions import BasePermission
 
 from bitswan_backend.core.models import AutomationServer
 from bitswan_backend.core.models import Workspace
-from bitswan_backend.core.models.workspaces import WorkspaceGroupMembership
+from bitswan_backend.core.models import WorkspaceAccess
 from bitswan_backend.core.services.keycloak import KeycloakService
 
 L = logging.getLogger("core.permissions.workspaces")
@@ -103,15 +103,10 @@ class HasAccessToWorkspace(BasePermission):
             return True
 
         # Check if user has access through group membership
-        user_id = self.keycloak.get_active_user(request)
-        user_groups = self.keycloak.get_user_groups(user_id)
+        user_groups = self.keycloak.get_active_user_groups(request)
         user_group_ids = [group['id'] for group in user_groups]
 
-        # Get workspace group memberships
-        workspace_group_ids = WorkspaceGroupMembership.objects.filter(
-            workspace=workspace
-        ).values_list('keycloak_group_id', flat=True)
-
         # Check if user has access to any workspace group
-        return any(group_id in user_group_ids for group_id in workspace_group_ids)
-
+        return WorkspaceAccess.objects.granted_to(
+            user_group_ids, WorkspaceAccess.Source.WORKSPACE
+        ).filter(workspace=workspace).exists()
@@ -0,0 +1,64 @@
+import logging
+import threading
+import time
+
+from keycloak import KeycloakConnectionError
+
+logger = logging.getLogger(__name__)
+
+
+class KeycloakUnavailable(KeycloakConnectionError):
+    """
+    Raised instead of calling Keycloak while the circuit breaker is open.
+    """
+
+    def __init__(self):
+        super().__init__("Keycloak is unavailable, circuit breaker is open", response_code=503)
+
+
+class CircuitBreaker:
+    """
+    Stop calling Keycloak after ``failure_threshold`` consecutive failures.
+
+    While open every call fails fast. After ``reset_timeout`` seconds a single
+    trial call is let through: success closes the breaker, failure keeps it
+    open for another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_in_flight or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Keycloak is reachable again, closing circuit breaker")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.error("Keycloak failed %d times in a row, opening circuit breaker", self._failures)
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
@@ -0,0 +1,382 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from keycloak import KeycloakGetError
+
+from bitswan_backend.core.services.org_groups import parse_org_group
+
+logger = logging.getLogger(__name__)
+
+USERS_PAGE_SIZE = 500
+ADMIN_EVENTS_PAGE_SIZE = 500
+DIRECTORY_RESOURCE_TYPES = ["USER", "GROUP", "GROUP_MEMBERSHIP"]
+
+
+def is_org_group(group):
+    return "org" in group.get("attributes", {}).get("type", [])
+
+
+def flatten_groups(groups, parent_id=None):
+    """
+    Flatten a Keycloak group hierarchy into (group, parent id) pairs.
+    """
+    for group in groups:
+        yield group, parent_id
+        yield from flatten_groups(group.get("subGroups") or [], group["id"])
+
+
+def is_not_found(error):
+    return isinstance(error, KeycloakGetError) and error.response_code == 404
+
+
+class KeycloakDirectory:
+    """
+    Postgres mirror of the Keycloak orgs, groups, users and memberships.
+
+    ``full_sync`` loads the whole directory and ``sync_events`` applies the
+    Keycloak admin events recorded since the last sync. Once a full sync has
+    completed and KEYCLOAK_DIRECTORY_ENABLED is set, KeycloakService serves its
+    directory reads from here instead of the Keycloak admin API.
+    """
+
+    def __init__(self, keycloak):
+        self.keycloak = keycloak
+        self._ready = False
+
+    @property
+    def keycloak_admin(self):
+        return self.keycloak.keycloak_admin
+
+    def is_ready(self):
+        from bitswan_backend.core.models import DirectorySyncState
+
+        if not settings.KEYCLOAK_DIRECTORY_ENABLED:
+            return False
+        if not self._ready:
+            self._ready = DirectorySyncState.objects.filter(
+                last_full_sync_at__isnull=False,
+            ).exists()
+        return self._ready
+
+    # Reads
+
+    def _group_repr(self, group):
+        return {
+            "id": group.id,
+            "name": group.name,
+            "path": group.path,
+            "attributes": group.attributes,
+        }
+
+    def _member_repr(self, user):
+        return {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "emailVerified": user.email_verified,
+            "firstName": user.first_name,
+            "lastName": user.last_name,
+        }
+
+    def get_orgs(self):
+        from bitswan_backend.core.models import DirectoryGroup
+
+        return [self._group_repr(group) for group in DirectoryGroup.objects.filter(is_org=True)]
+
+    def get_org_groups(self, org_id):
+        from bitswan_backend.core.models import DirectoryGroup
+
+        return [
+            parse_org_group(self._group_repr(group))
+            for group in DirectoryGroup.objects.filter(parent_group_id=org_id).order_by("name")
+        ]
+
+    def get_org_group(self, group_id):
+        from bitswan_backend.core.models import DirectoryGroup
+
+        group = DirectoryGroup.objects.filter(id=group_id).first()
+        return parse_org_group(self._group_repr(group)) if group else None
+
+    def get_user_groups(self, user_id):
+        from bitswan_backend.core.models import DirectoryGroup
+
+        return [
+            self._group_repr(group)
+            for group in DirectoryGroup.objects.filter(memberships__user_id=user_id)
+        ]
+
+    def get_group_members(self, group_id):
+        from bitswan_backend.core.models import DirectoryUser
+
+        return [
+            self._member_repr(user)
+            for user in DirectoryUser.objects.filter(memberships__group_id=group_id).order_by("username")
+        ]
+
+    def get_membership_matrix(self, org_groups):
+        """
+        Map user id -> the given org groups the user is a member of, in one query.
+        """
+        from bitswan_backend.core.models import DirectoryMembership
+
+        groups_by_id = {group["id"]: group for group in org_groups}
+        matrix = {}
+        memberships = DirectoryMembership.objects.filter(
+            group_id__in=groups_by_id,
+        ).values_list("user_id", "group_id")
+        for user_id, group_id in memberships:
+            matrix.setdefault(user_id, []).append(groups_by_id[group_id])
+        return matrix
+
+    # Sync
+
+    def _group_row(self, group, parent_id):
+        from bitswan_backend.core.models import DirectoryGroup
+
+        return DirectoryGroup(
+            id=group["id"],
+            parent_group_id=parent_id,
+            name=group["name"],
+            path=group.get("path", ""),
+            attributes=group.get("attributes", {}),
+            is_org=parent_id is None and is_org_group(group),
+        )
+
+    def _user_row(self, user):
+        from bitswan_backend.core.models import DirectoryUser
+
+        return DirectoryUser(
+            id=user["id"],
+            username=user["username"],
+            email=user.get("email"),
+            email_verified=user.get("emailVerified", False),
+            first_name=user.get("firstName"),
+            last_name=user.get("lastName"),
+            enabled=user.get("enabled", True),
+        )
+
+    def _upsert_groups(self, rows):
+        from bitswan_backend.core.models import DirectoryGroup
+
+        DirectoryGroup.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=["parent_group_id", "name", "path", "attributes", "is_org", "synced_at"],
+        )
+
+    def _upsert_users(self, rows):
+        from bitswan_backend.core.models import DirectoryUser
+
+        DirectoryUser.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=[
+                "username",
+                "email",
+                "email_verified",
+                "first_name",
+                "last_name",
+                "enabled",
+                "synced_at",
+            ],
+        )
+
+    def _fetch_users(self, workers):
+        count = self.keycloak_admin.users_count()
+        pages = range(0, count, USERS_PAGE_SIZE)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                lambda first: self.keycloak_admin.get_users(
+                    query={"first": first, "max": USERS_PAGE_SIZE, "briefRepresentation": True},
+                ),
+                pages,
+            )
+            return [user for page in results for user in page]
+
+    def _fetch_memberships(self, group_ids, workers):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                lambda group_id: [
+                    (member["id"], group_id) for member in self.keycloak.iter_group_members(group_id)
+                ],
+                group_ids,
+            )
+            return [membership for members in results for membership in members]
+
+    def full_sync(self, workers=4):
+        """
+        Load the whole directory from Keycloak, replacing the mirrored rows.
+        """
+        from bitswan_backend.core.models import DirectoryGroup
+        from bitswan_backend.core.models import DirectoryMembership
+        from bitswan_backend.core.models import DirectorySyncState
+        from bitswan_backend.core.models import DirectoryUser
+
+        started_at = timezone.now()
+        # events recorded while the sync runs are replayed by the next sync_events
+        event_time = int(time.time() * 1000)
+
+        groups = [
+            self._group_row(group, parent_id)
+            for group, parent_id in flatten_groups(
+                self.keycloak_admin.get_groups(
+                    query={"briefRepresentation": "false"},
+                    full_hierarchy=True,
+                ),
+            )
+        ]
+        users = [self._user_row(user) for user in self._fetch_users(workers)]
+        memberships = self._fetch_memberships([group.id for group in groups], workers)
+
+        with transaction.atomic():
+            self._upsert_groups(groups)
+            self._upsert_users(users)
+            DirectoryGroup.objects.filter(synced_at__lt=started_at).delete()
+            DirectoryUser.objects.filter(synced_at__lt=started_at).delete()
+            DirectoryMembership.objects.all().delete()
+            DirectoryMembership.objects.bulk_create(
+                [
+                    DirectoryMembership(user_id=user_id, group_id=group_id)
+                    for user_id, group_id in memberships
+                ],
+                ignore_conflicts=True,
+            )
+            DirectorySyncState.objects.update_or_create(
+                id=1,
+                defaults={"last_full_sync_at": started_at, "last_event_time": event_time},
+            )
+
+        logger.info(
+            "Synced Keycloak directory: %s groups, %s users, %s memberships",
+            len(groups),
+            len(users),
+            len(memberships),
+        )
+
+    def sync_events(self):
+        """
+        Apply the Keycloak admin events recorded since the last sync.
+
+        Requires admin events to be enabled for the realm. Every event re-fetches
+        the user or group it touched, so events can be applied more than once.
+        """
+        from bitswan_backend.core.models import DirectorySyncState
+
+        state = DirectorySyncState.objects.filter(id=1).first()
+        if not state or not state.last_full_sync_at:
+            logger.warning("Keycloak directory was never fully synced, skipping events")
+            return 0
+
+        date_from = datetime.fromtimestamp(state.last_event_time / 1000, tz=UTC).date()
+        events = []
+        first = 0
+        while True:
+            page = self.keycloak_admin.get_admin_events(
+                query={
+                    "dateFrom": date_from.isoformat(),
+                    "resourceTypes": DIRECTORY_RESOURCE_TYPES,
+                    "first": first,
+                    "max": ADMIN_EVENTS_PAGE_SIZE,
+                },
+            )
+            events.extend(event for event in page if event["time"] > state.last_event_time)
+            if len(page) < ADMIN_EVENTS_PAGE_SIZE:
+                break
+            first += ADMIN_EVENTS_PAGE_SIZE
+
+        for event in sorted(events, key=lambda event: event["time"]):
+            self.apply_event(event)
+            state.last_event_time = event["time"]
+            state.save(update_fields=["last_event_time", "updated_at"])
+
+        return len(events)
+
+    def apply_event(self, event):
+        parts = event.get("resourcePath", "").split("/")
+        if len(parts) < 2:
+            return
+
+        if parts[0] == "users":
+            self.sync_user(parts[1])
+        elif parts[0] == "groups":
+            self.sync_group(parts[1])
+
+    def sync_user(self, user_id):
+        """
+        Re-fetch a user and its group memberships, or drop it if it no longer exists.
+        """
+        from bitswan_backend.core.models import DirectoryMembership
+
+        try:
+            user = self.keycloak_admin.get_user(user_id)
+            groups = self.keycloak_admin.get_user_groups(user_id=user_id)
+        except KeycloakGetError as e:
+            if not is_not_found(e):
+                raise
+            self.delete_user(user_id)
+            return
+
+        with transaction.atomic():
+            self._upsert_users([self._user_row(user)])
+            DirectoryMembership.objects.filter(user_id=user_id).delete()
+            DirectoryMembership.objects.bulk_create(
+                [DirectoryMembership(user_id=user_id, group_id=group["id"]) for group in groups],
+            )
+
+    def sync_group(self, group_id):
+        """
+        Re-fetch a group and its direct children, or drop it if it no longer exists.
+        """
+        try:
+            group = self.keycloak_admin.get_group(group_id=group_id)
+            children = self.keycloak_admin.get_group_children(group_id=group_id)
+        except KeycloakGetError as e:
+            if not is_not_found(e):
+                raise
+            self.delete_group(group_id)
+            return
+
+        from bitswan_backend.core.models import DirectoryGroup
+
+        # parentId is only part of the group representation since Keycloak 23
+        if "parentId" in group:
+            parent_id = group["parentId"]
+        else:
+            parent_id = (
+                DirectoryGroup.objects.filter(id=group_id).values_list("parent_group_id", flat=True).first()
+            )
+        self._upsert_groups(
+            [self._group_row(group, parent_id)]
+            + [self._group_row(child, group_id) for child in children],
+        )
+
+    def delete_user(self, user_id):
+        from bitswan_backend.core.models import DirectoryUser
+
+        DirectoryUser.objects.filter(id=user_id).delete()
+
+    def delete_group(self, group_id):
+        from bitswan_backend.core.models import DirectoryGroup
+
+        group = DirectoryGroup.objects.filter(id=group_id).first()
+        if group:
+            DirectoryGroup.objects.filter(path__startswith=f"{group.path}/").delete()
+            group.delete()
+
+    def add_membership(self, user_id, group_id):
+        from bitswan_backend.core.models import DirectoryMembership
+
+        DirectoryMembership.objects.get_or_create(user_id=user_id, group_id=group_id)
+
+    def remove_membership(self, user_id, group_id):
+        from bitswan_backend.core.models import DirectoryMembership
+
+        DirectoryMembership.objects.filter(user_id=user_id, group_id=group_id).delete()
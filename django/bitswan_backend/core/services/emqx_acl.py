@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Username of the session credentials, see GetUserEmqxJwtsAPIView.get_session_token
+USER_PREFIX = "user-"
+
+ALLOW = "allow"
+DENY = "deny"
+
+
+def workspace_prefix(org_id, automation_server_id, workspace_id):
+    return f"/orgs/{org_id}/automation-servers/{automation_server_id}/c/{workspace_id}"
+
+
+def topic_workspace_prefix(topic):
+    """
+    The workspace mountpoint a topic is under, if any.
+    """
+    parts = topic.split("/", 7)
+    if len(parts) < 7 or parts[0] or parts[1] != "orgs" or parts[3] != "automation-servers" or parts[5] != "c":
+        return None
+    return "/".join(parts[:7])
+
+
+class AclIndex:
+    """
+    In-memory index of which workspaces each group can reach, built from the
+    workspace access table (itself derived from the workspace and automation
+    server group memberships).
+
+    The index is versioned by the workspace access rows in the database (see
+    workspace_access_version) and rebuilt when they change, checking for a new
+    version at most every ``version_check_interval`` seconds. The workspace prefixes each user may use
+    are cached for ``ttl`` seconds, so a decision is a set lookup.
+    """
+
+    def __init__(self, ttl, maxsize, version_check_interval):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.version_check_interval = version_check_interval
+        self.version = None
+        self._checked_at = 0
+        self._grants = {}
+        self._org_prefixes = {}
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        from bitswan_backend.core.models.access import workspace_access_version
+
+        now = time.monotonic()
+        if now - self._checked_at < self.version_check_interval:
+            return
+        self._checked_at = now
+
+        version = workspace_access_version()
+        if version != self.version:
+            self._build(version)
+
+    def _build(self, version):
+        from bitswan_backend.core.models import Workspace
+        from bitswan_backend.core.models import WorkspaceAccess
+
+        grants = {source: defaultdict(set) for source in WorkspaceAccess.Source}
+        for workspace_id, group_id, source in WorkspaceAccess.objects.values_list(
+            "workspace_id", "keycloak_group_id", "source",
+        ):
+            grants[source][group_id].add(workspace_id)
+
+        org_prefixes = defaultdict(dict)
+        for workspace_id, org_id, automation_server_id in Workspace.objects.values_list(
+            "id", "keycloak_org_id", "automation_server_id",
+        ):
+            org_prefixes[org_id][workspace_id] = workspace_prefix(org_id, automation_server_id, workspace_id)
+
+        with self._lock:
+            self._grants = grants
+            self._org_prefixes = org_prefixes
+            self._users.clear()
+            self.version = version
+        logger.info("Built EMQX ACL index version %s", version)
+
+    def _resolve(self, user_groups):
+        """
+        Prefixes of the workspaces of every org of the user: all of them for org
+        admins, otherwise those granted through both their automation server and
+        their workspace groups.
+        """
+        from bitswan_backend.core.models.access import ANY_GROUP
+
+        group_ids = [group["id"] for group in user_groups] + [ANY_GROUP]
+        reachable = None
+        for source_grants in self._grants.values():
+            workspace_ids = set().union(*(source_grants.get(group_id, ()) for group_id in group_ids))
+            reachable = workspace_ids if reachable is None else reachable & workspace_ids
+
+        paths = {(group.get("path") or "").lower() for group in user_groups}
+        prefixes = set()
+        for group in user_groups:
+            org_prefixes = self._org_prefixes.get(group["id"])
+            if org_prefixes is None or group.get("path") != f"/{group['name']}":
+                continue
+            if f"/{group['name']}/admin".lower() in paths:
+                prefixes.update(org_prefixes.values())
+            else:
+                prefixes.update(
+                    prefix for workspace_id, prefix in org_prefixes.items() if workspace_id in reachable
+                )
+        return frozenset(prefixes)
+
+    def get_user_prefixes(self, user_id, get_user_groups):
+        self._refresh()
+
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry and entry[0] > time.monotonic():
+                self._users.move_to_end(user_id)
+                return entry[1]
+
+        prefixes = self._resolve(get_user_groups(user_id))
+
+        with self._lock:
+            self._users[user_id] = (time.monotonic() + self.ttl, prefixes)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.maxsize:
+                self._users.popitem(last=False)
+        return prefixes
+
+    def authorize(self, username, topic, get_user_groups):
+        """
+        Decide on a publish or subscribe of a session credential. Other clients
+        are confined by their token's mountpoint, or are the backend itself, and
+        are allowed since the broker denies what no authorizer allows.
+        """
+        if not username.startswith(USER_PREFIX):
+            return ALLOW
+
+        prefix = topic_workspace_prefix(topic)
+        if prefix is None:
+            return DENY
+
+        user_id = username.removeprefix(USER_PREFIX)
+        return ALLOW if prefix in self.get_user_prefixes(user_id, get_user_groups) else DENY
+
+
+acl_index = AclIndex(
+    ttl=settings.EMQX_AUTHZ_CACHE_TTL,
+    maxsize=settings.EMQX_AUTHZ_CACHE_SIZE,
+    version_check_interval=settings.EMQX_AUTHZ_VERSION_CHECK_INTERVAL,
+)
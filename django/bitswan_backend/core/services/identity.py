@@ -0,0 +1,107 @@
+import logging
+from functools import cached_property
+
+logger = logging.getLogger(__name__)
+
+
+class RequestIdentity:
+    """
+    Keycloak identity of a single request: token claims, group memberships,
+    the verified active org and the admin flag.
+
+    Every part is resolved lazily and at most once, so the views, mixins and
+    permission classes handling one request share a single Keycloak lookup of
+    the user's groups. The active org and admin status are derived from the
+    group paths, e.g. ``/<org name>`` and ``/<org name>/admin``.
+    """
+
+    def __init__(self, keycloak, request):
+        self.keycloak = keycloak
+        self.org_id = request.headers.get("X-Org-Id")
+        self.org_name = request.headers.get("X-Org-Name")
+        self.auth_header = request.headers.get("authorization", "")
+
+    @cached_property
+    def claims(self):
+        if not self.auth_header.startswith("Bearer "):
+            logger.error("Invalid authorization header format")
+            return None
+
+        token = self.auth_header.split("Bearer ")[-1]
+        if not token:
+            logger.error("No token found in authorization header")
+            return None
+
+        return self.keycloak.validate_token(token)
+
+    @property
+    def user_id(self):
+        return (self.claims or {}).get("sub")
+
+    @cached_property
+    def user_groups(self):
+        return self.keycloak.get_user_groups(self.user_id)
+
+    @cached_property
+    def orgs(self):
+        return self.keycloak.get_keycloak_org_groups(self.user_groups)
+
+    @cached_property
+    def active_org(self):
+        """
+        The org selected by the X-Org-Id/X-Org-Name headers, if the user is a member of it.
+        """
+        if not self.org_id:
+            logger.warning("No X-Org-Id header found in request")
+            return None
+
+        if not self.org_name:
+            logger.warning("No X-Org-Name header found in request")
+            return None
+
+        if not self.user_id:
+            logger.warning("User ID not found in token")
+            return None
+
+        try:
+            user_groups = self.user_groups
+        except Exception:
+            logger.exception("Failed to get user groups")
+            return None
+
+        org = next(
+            (group for group in user_groups if group.get("path") == self.org_path),
+            None,
+        )
+        if not org:
+            logger.warning("User %s is not a member of org %s", self.user_id, self.org_name)
+            return None
+
+        if org.get("id") != self.org_id:
+            logger.warning("Org %s not found or name mismatch", self.org_id)
+            return None
+
+        return org
+
+    @property
+    def org_path(self):
+        return f"/{self.org_name}"
+
+    @cached_property
+    def org_groups(self):
+        """
+        The user's groups directly under the active org, without workspace editor groups.
+        """
+        if not self.active_org:
+            return []
+
+        return [
+            group
+            for group in self.user_groups
+            if group.get("path") == f"{self.org_path}/{group.get('name')}"
+            and "workspace-editor" not in group.get("attributes", {}).get("permissions", [])
+        ]
+
+    @cached_property
+    def is_admin(self):
+        return any(group["name"].lower() == "admin" for group in self.org_groups)
@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+
+import requests
+from jwcrypto import jwk
+from jwcrypto.common import JWException
+from jwcrypto.common import base64url_decode
+from jwcrypto.common import json_decode
+
+logger = logging.getLogger(__name__)
+
+
+def get_token_kid(token):
+    """
+    Read the ``kid`` from the (unverified) JOSE header of a compact JWT.
+    Returns None if the token is malformed or has no ``kid``.
+    """
+    try:
+        header = json_decode(base64url_decode(token.split(".", 1)[0]))
+    except ValueError:
+        return None
+    if not isinstance(header, dict):
+        return None
+    return header.get("kid")
+
+
+class KeycloakKeySet:
+    """
+    Realm signing keys fetched from the Keycloak JWKS endpoint and cached by ``kid``.
+
+    Keys are refreshed in a background thread once they are older than ``ttl``
+    and synchronously when a token is signed with a ``kid`` we have not seen yet
+    (at most once per ``min_refresh_interval`` so bogus tokens can't hammer Keycloak).
+    ``http`` is anything with a requests-like ``get``, by default ``requests`` itself.
+    """
+
+    def __init__(self, certs_url, ttl=3600, min_refresh_interval=30, timeout=10, http=requests):
+        self.certs_url = certs_url
+        self.http = http
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+
+        self._keys = {}
+        self._fetched_at = None
+        self._lock = threading.Lock()
+        self._background_refresh = None
+
+    def get_key(self, kid):
+        """
+        Return the JWK for ``kid``, or None if the realm doesn't publish it.
+        """
+        if not self._keys:
+            if self._can_refresh():
+                self.refresh()
+        elif time.monotonic() - self._fetched_at > self.ttl:
+            self._refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is None and self._can_refresh():
+            logger.info("Unknown signing key %s, refreshing realm JWKS", kid)
+            self.refresh()
+            key = self._keys.get(kid)
+
+        return key
+
+    def refresh(self):
+        with self._lock:
+            try:
+                response = self.http.get(self.certs_url, timeout=self.timeout)
+                response.raise_for_status()
+                keyset = response.json()
+            except (requests.RequestException, ValueError) as e:
+                logger.error("Failed to fetch realm JWKS from %s: %s", self.certs_url, e)
+                # Don't retry on every request while Keycloak is unavailable
+                self._fetched_at = time.monotonic()
+                return
+
+            keys = {}
+            for key_data in keyset.get("keys", []):
+                if key_data.get("use", "sig") != "sig":
+                    continue
+                try:
+                    keys[key_data.get("kid")] = jwk.JWK(**key_data)
+                except (JWException, ValueError, TypeError) as e:
+                    logger.warning("Skipping unusable JWKS key %s: %s", key_data.get("kid"), e)
+
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+            logger.info("Loaded %d realm signing keys", len(keys))
+
+    def _can_refresh(self):
+        return (
+            self._fetched_at is None
+            or time.monotonic() - self._fetched_at > self.min_refresh_interval
+        )
+
+    def _refresh_in_background(self):
+        if self._background_refresh and self._background_refresh.is_alive():
+            return
+
+        self._background_refresh = threading.Thread(
+            target=self.refresh,
+            name="keycloak-jwks-refresh",
+            daemon=True,
+        )
+        self._background_refresh.start()
@@ -1,20 +1,42 @@
 import logging
 import secrets
 import string
+import threading
 
 from django.conf import settings
+from django.core.cache import cache
 from keycloak import KeycloakAdmin
 from keycloak import KeycloakGetError, KeycloakDeleteError, KeycloakError, KeycloakPostError
 from keycloak import KeycloakOpenID
-from keycloak import KeycloakOpenIDConnection
 
+from bitswan_backend.core.services.circuit import CircuitBreaker
+from bitswan_backend.core.services.directory import KeycloakDirectory
+from bitswan_backend.core.services.identity import RequestIdentity
+from bitswan_backend.core.services.jwks import KeycloakKeySet
+from bitswan_backend.core.services.jwks import get_token_kid
+from bitswan_backend.core.services.org_groups import OrgGroupTreeCache
+from bitswan_backend.core.services.org_groups import parse_org_group
+from bitswan_backend.core.services.org_users import OrgUserList
+from bitswan_backend.core.services.singleflight import SingleFlight
+from bitswan_backend.core.services.swr import StaleWhileRevalidate
+from bitswan_backend.core.services.swr import is_fresh
+from bitswan_backend.core.services.tokens import ServiceAccountConnection
+from bitswan_backend.core.services.transport import keycloak_transport
 from bitswan_backend.core.utils import encryption
 
 logger = logging.getLogger(__name__)
 
+# Bumped whenever groups are renamed or deleted, which invalidates every cached membership list
+USER_GROUPS_GENERATION_CACHE_KEY = "keycloak:user-groups:generation"
+ORG_MEMBERS_GENERATION_CACHE_KEY = "keycloak:org-members:generation"
+GROUP_MEMBERS_PAGE_SIZE = 500
+ORG_MEMBER_FIELDS = ("id", "username", "email", "emailVerified", "firstName", "lastName")
+
 
 class KeycloakService:
     _instance = None
+    _initialized = False
+    _init_lock = threading.Lock()
 
     def __new__(cls):
         if not cls._instance:
@@ -22,6 +44,16 @@ class KeycloakService:
         return cls._instance
 
     def __init__(self):
+        # KeycloakService() is called all over the request path, the clients,
+        # their pooled connections and the admin token are set up only once per worker
+        if self._initialized:
+            return
+        with self._init_lock:
+            if not self._initialized:
+                self._setup()
+                self._initialized = True
+
+    def _setup(self):
         self.keycloak_server_url = settings.KEYCLOAK_SERVER_URL
         self.keycloak_realm = settings.KEYCLOAK_REALM_NAME
         self.keycloak_client_id = settings.KEYCLOAK_CLIENT_ID
@@ -33,32 +65,72 @@ class KeycloakService:
             client_id=self.keycloak_client_id,
             realm_name=self.keycloak_realm,
             client_secret_key=self.keycloak_client_secret_key,
-            timeout=120,
+            timeout=settings.KEYCLOAK_OIDC_TIMEOUT,
         )
-        self.keycloak_connection = KeycloakOpenIDConnection(
+        keycloak_transport.attach(self.keycloak.connection)
+
+        self.keycloak_connection = ServiceAccountConnection(
             server_url=self.keycloak_server_url,
             realm_name=self.keycloak_realm,
             client_id=self.keycloak_client_id,
             client_secret_key=self.keycloak_client_secret_key,
             verify=True,
-            timeout=120,
+            timeout=settings.KEYCLOAK_ADMIN_TIMEOUT,
+            refresh_fraction=settings.KEYCLOAK_ADMIN_TOKEN_REFRESH_FRACTION,
+            breaker=CircuitBreaker(
+                failure_threshold=settings.KEYCLOAK_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.KEYCLOAK_CIRCUIT_RESET_TIMEOUT,
+            ),
         )
+        keycloak_transport.attach(self.keycloak_connection)
+        # The admin token is fetched and refreshed with the client above
+        self.keycloak_connection._keycloak_openid = self.keycloak
 
         self.keycloak_admin = KeycloakAdmin(connection=self.keycloak_connection)
 
+        self.key_set = KeycloakKeySet(
+            certs_url=(
+                f"{self.keycloak_server_url}/realms/{self.keycloak_realm}"
+                "/protocol/openid-connect/certs"
+            ),
+            ttl=settings.KEYCLOAK_JWKS_TTL,
+            min_refresh_interval=settings.KEYCLOAK_JWKS_MIN_REFRESH_INTERVAL,
+            timeout=settings.KEYCLOAK_OIDC_TIMEOUT,
+            http=keycloak_transport,
+        )
+        self.token_issuers = settings.KEYCLOAK_TOKEN_ISSUERS or [
+            f"{url}/realms/{self.keycloak_realm}"
+            for url in (self.keycloak_server_url, settings.KEYCLOAK_FRONTEND_URL)
+            if url
+        ]
+        self.token_audiences = settings.KEYCLOAK_TOKEN_AUDIENCE or [
+            self.keycloak_client_id,
+        ]
+        self.org_group_cache = OrgGroupTreeCache(
+            ttl=settings.KEYCLOAK_ORG_GROUPS_CACHE_TTL,
+            stale_ttl=settings.KEYCLOAK_STALE_TTL,
+        )
+        self.directory = KeycloakDirectory(self)
+        # Concurrent identical admin API lookups in this worker share one call
+        self.single_flight = SingleFlight(metrics_interval=settings.KEYCLOAK_SINGLE_FLIGHT_METRICS_INTERVAL)
+        self.swr = StaleWhileRevalidate(self.single_flight, stale_ttl=settings.KEYCLOAK_STALE_TTL)
+
+    def get_identity(self, request):
+        """
+        Return the identity of the request, creating it on first use.
+
+        It is stored on the underlying Django request so DRF views, permissions
+        and authentication classes all share the same instance.
+        """
+        request = getattr(request, "_request", request)
+        identity = getattr(request, "keycloak_identity", None)
+        if identity is None:
+            identity = RequestIdentity(self, request)
+            request.keycloak_identity = identity
+        return identity
+
     def get_claims(self, request):
-        auth_header = request.headers.get("authorization", "")
-        if not auth_header.startswith("Bearer "):
-            logger.error("Invalid authorization header format: %s", auth_header)
-            return None
-            
-        token = auth_header.split("Bearer ")[-1]
-        if not token:
-            logger.error("No token found in authorization header")
-            return None
-            
-        logger.info("Extracted token: %s", token[:50] + "..." if len(token) > 50 else token)
-        return self.validate_token(token)
+        return self.get_identity(request).claims
 
     def decrypt_token(self, encrypted_token, iv, tag):
         auth_secret_key = self.auth_secret_key
@@ -71,37 +143,99 @@ class KeycloakService:
         )
 
     def get_user_groups(self, user_id):
+        """
+        Get the user's group memberships, cached for KEYCLOAK_USER_GROUPS_CACHE_TTL seconds.
+
+        The cache is invalidated whenever this service changes the user's memberships.
+        """
+        if self.directory.is_ready():
+            return self.directory.get_user_groups(user_id)
+
+        return self.swr.get(
+            "user_groups",
+            self._user_groups_cache_key(user_id),
+            lambda: self._fetch_user_groups(user_id),
+            settings.KEYCLOAK_USER_GROUPS_CACHE_TTL,
+        )
+
+    def invalidate_user_groups(self, user_id):
+        cache.delete(self._user_groups_cache_key(user_id))
+
+    def invalidate_all_user_groups(self):
+        self._bump_generation(USER_GROUPS_GENERATION_CACHE_KEY)
+
+    def _update_directory(self, action, *args):
+        """
+        Apply a change made through this service to the directory mirror right away,
+        instead of waiting for the next event sync.
+        """
+        if not self.directory.is_ready():
+            return
         try:
-            return self.keycloak_admin.get_user_groups(
-                user_id=user_id,
-                brief_representation=False,
-            )
-        except Exception:
-            logger.exception("Failed to get user groups:")
-            # Try to refresh token explicitly
-            token = self.keycloak.token(
-                grant_type=["client_credentials"],
-            )
-            self.keycloak_connection.token = token
-            # Retry the operation
-            return self.keycloak_admin.get_user_groups(
-                user_id=user_id,
-                brief_representation=False,
-            )
+            getattr(self.directory, action)(*args)
+        except Exception as e:
+            logger.warning("Failed to update Keycloak directory mirror (%s): %s", action, str(e), exc_info=True)
+
+    def _bump_generation(self, key):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+    def _user_groups_cache_key(self, user_id):
+        generation = cache.get_or_set(USER_GROUPS_GENERATION_CACHE_KEY, 0, None)
+        return f"keycloak:user-groups:{generation}:{user_id}"
+
+    def _fetch_user_groups(self, user_id):
+        return self.keycloak_admin.get_user_groups(
+            user_id=user_id,
+            brief_representation=False,
+        )
+
+    def _read_through(self, name, key, entry, fetch):
+        """
+        Return the value of a cache entry, fetching it if there is none.
+        Stale entries are served while they are refreshed in the background.
+        """
+        if entry is None:
+            return self.single_flight.do(name, key, fetch)
+        if not is_fresh(entry):
+            self.swr.serve_stale(name, key, fetch)
+        return entry["value"]
 
     def validate_token(self, token):
+        """
+        Verify the token signature against the cached realm JWKS and check
+        exp/iss/aud locally, without calling Keycloak.
+        """
         try:
-            logger.info("Token length: %d", len(token))
-            logger.info("Token starts with: %s", token[:20] if len(token) > 20 else token)
-            
-            # decode_token formats and validates the public key by default in new python-keycloak version
-            result = self.keycloak.decode_token(token)
+            kid = get_token_kid(token)
+            key = self.key_set.get_key(kid)
+            if key is None:
+                logger.error("Token validation failed: unknown signing key %s", kid)
+                return None
+
+            # jwcrypto checks exp/nbf; iss and aud are checked below
+            result = self.keycloak.decode_token(
+                token,
+                key=key,
+                check_claims={"exp": None},
+            )
+
+            if result.get("iss") not in self.token_issuers:
+                logger.error("Token validation failed: unexpected issuer %s", result.get("iss"))
+                return None
+
+            audiences = result.get("aud") or []
+            if isinstance(audiences, str):
+                audiences = [audiences]
+            if not set(self.token_audiences) & {*audiences, result.get("azp")}:
+                logger.error("Token validation failed: unexpected audience %s", audiences)
+                return None
 
-            logger.info("Token validation successful")
             return result
         except Exception as e:
             logger.error("Token validation failed: %s", str(e))
-            logger.error("Token content: %s", token)
             return None
 
     def get_keycloak_org_groups(self, keycloak_groups):
@@ -134,69 +268,32 @@ class KeycloakService:
         user_info = self.get_claims(request)
         return user_info["sub"]
 
+    def get_active_user_groups(self, request):
+        return self.get_identity(request).user_groups
+
     def get_active_user_org(self, request) -> dict[str, any] | None:
         """
         Get the active user's organization from the X-Org-Id header.
         This is the correct approach as the frontend explicitly sets the active org.
         """
         try:
-            org_id = request.headers.get("X-Org-Id")
-            org_name = request.headers.get("X-Org-Name")
-            
-            if not org_id:
-                logger.warning("No X-Org-Id header found in request")
-                return None
-                
-            if not org_name:
-                logger.warning("No X-Org-Name header found in request")
-                return None
-            
-            # Validate that the user is actually a member of this org
-            user_info = self.get_claims(request)
-            user_id = user_info.get("sub")
-            
-            if not user_id:
-                logger.warning("User ID not found in token")
-                return None
-            
-            # Get user groups to verify membership
-            try:
-                user_groups = self.get_user_groups(user_id)
-                user_group_paths = [group.get("path", "") for group in user_groups]
-            except Exception as e:
-                logger.error("Failed to get user groups: %s", str(e))
-                return None
-            
-            # Check if user is a member of the specified org
-            expected_org_path = f"/{org_name}"
-            if expected_org_path not in user_group_paths:
-                logger.warning("User %s is not a member of org %s", user_id, org_name)
-                return None
-            
-            # Get the org details to return
-            org = self.get_org_by_id(org_id)
-            if not org or org.get("name") != org_name:
-                logger.warning("Org %s not found or name mismatch", org_id)
-                return None
-                
-            logger.info("Active user org: %s (%s)", org_name, org_id)
-            return org
-            
+            org = self.get_identity(request).active_org
         except Exception as e:
             logger.exception("Failed to get active user org: %s", str(e))
             return None
 
+        if org:
+            logger.info("Active user org: %s (%s)", org.get("name"), org.get("id"))
+        return org
+
     def get_active_user_orgs(self, request):
         try:
-            user_info = self.get_claims(request)
-            user_id = user_info["sub"]
-            user_keycloak_groups = self.get_user_groups(user_id)
-
-            if not user_keycloak_groups:
-                logger.warning("No groups found for user: %s", user_id)
+            identity = self.get_identity(request)
+            if not identity.user_groups:
+                logger.warning("No groups found for user: %s", identity.user_id)
                 return []
 
-            return self.get_keycloak_org_groups(user_keycloak_groups)
+            return identity.orgs
         except Exception:
             logger.exception("Failed to get active user orgs:")
             raise
@@ -213,7 +310,12 @@ class KeycloakService:
             raise
 
     def get_org_by_id(self, org_id):
-        return self.keycloak_admin.get_group(org_id)
+        return self.swr.get(
+            "org_by_id",
+            f"keycloak:org:{org_id}",
+            lambda: self.keycloak_admin.get_group(org_id),
+            settings.KEYCLOAK_ORG_GROUPS_CACHE_TTL,
+        )
 
     def add_redirect_uri(self, uri):
         client_id = self.keycloak_admin.get_client_id(
@@ -378,37 +480,50 @@ class KeycloakService:
             return None
 
     def get_org_groups(self, org_id):
-        # Use get_group_children to get all subgroups (not limited to 10)
-        org_groups = self.keycloak_admin.get_group_children(
-            group_id=org_id,
-            full_hierarchy=True,
-        )
-        logger.info("Got org groups: %s", org_groups)
+        """
+        Get the subgroups of an org, without workspace editor groups.
+        The parsed group tree is cached per org and kept up to date by the write methods below.
+        """
+        if self.directory.is_ready():
+            org_groups = self.directory.get_org_groups(org_id)
+        else:
+            org_groups = self._read_through(
+                "org_groups",
+                org_id,
+                self.org_group_cache.get_tree(org_id),
+                lambda: self.fetch_org_groups(org_id),
+            )
 
         return [
-            {
-                "id": group["id"],
-                "name": group["name"],
-                "path": group.get("path", ""),
-                "tag_color": next(iter(group["attributes"].get("tag_color", [])), None),
-                "permissions": group["attributes"].get("permissions", []),
-                "description": next(
-                    iter(group["attributes"].get("description", [])),
-                    None,
-                ),
-                "nav_items": next(
-                    iter(group["attributes"].get("nav_items", [])),
-                    None,
-                )
-                or [],
-            }
+            group
             for group in org_groups
             # filter out workspace editor groups
-            if "workspace-editor" not in group["attributes"].get("permissions", [])
+            if "workspace-editor" not in group["permissions"]
+        ]
+
+    def fetch_org_groups(self, org_id):
+        """
+        Read the subgroups of an org from Keycloak, bypassing the caches,
+        and refresh the cached group tree with them.
+        """
+        # Use get_group_children to get all subgroups (not limited to 10)
+        org_groups = [
+            parse_org_group(group)
+            for group in self.keycloak_admin.get_group_children(
+                group_id=org_id,
+                full_hierarchy=True,
+            )
         ]
+        logger.info("Got org groups: %s", org_groups)
+        self.org_group_cache.set_tree(org_id, org_groups)
+        return org_groups
 
     def delete_group(self, group_id):
-        return self.keycloak_admin.delete_group(group_id)
+        res = self.keycloak_admin.delete_group(group_id)
+        self.org_group_cache.remove_group(group_id)
+        self.invalidate_all_user_groups()
+        self._update_directory("delete_group", group_id)
+        return res
 
     def create_group(self, org_id, name, attributes):
         res = self.keycloak_admin.create_group(
@@ -420,6 +535,8 @@ class KeycloakService:
             skip_exists=True,
         )
         logger.info("Created group: %s", res)
+        self.org_group_cache.invalidate_org(org_id)
+        self._update_directory("sync_group", org_id)
 
         # If skip_exists=True and group already exists, res will be None
         # In that case, we need to find the existing group and return its ID
@@ -444,6 +561,8 @@ class KeycloakService:
                 "attributes": attributes,
             },
         )
+        if res:
+            self._update_directory("sync_group", res)
 
         return res
 
@@ -456,75 +575,170 @@ class KeycloakService:
             },
         )
         logger.info("Updated group: %s", res)
+        self.org_group_cache.update_group(group_id, name, attributes)
+        # Cached memberships carry the group name and path
+        self.invalidate_all_user_groups()
+        self._update_directory("sync_group", group_id)
 
         return res
 
     def get_org_group(self, group_id):
-        org_group = self.keycloak_admin.get_group(group_id=group_id)
+        org_group = self.directory.get_org_group(group_id) if self.directory.is_ready() else None
+        if org_group is None:
+            org_group = self._read_through(
+                "org_group",
+                group_id,
+                self.org_group_cache.get_group(group_id),
+                lambda: self.fetch_org_group(group_id),
+            )
 
         return {
             "id": org_group["id"],
             "name": org_group["name"],
-            "path": org_group.get("path", ""),
-            "tag_color": next(iter(org_group["attributes"].get("tag_color", [])), None),
-            "permissions": org_group["attributes"].get("permissions", []),
-            "description": next(
-                iter(org_group["attributes"].get("description", [])),
-                None,
-            ),
+            "path": org_group["path"],
+            "tag_color": org_group["tag_color"],
+            "permissions": org_group["permissions"],
+            "description": org_group["description"],
         }
 
-    def get_org_users(self, org_id):
-        users = self.keycloak_admin.get_group_members(group_id=org_id)
-        org_groups = self.get_org_groups(org_id=org_id)
+    def fetch_org_group(self, group_id):
+        """
+        Read a group from Keycloak, bypassing the caches, and refresh its cached entry.
+        """
+        org_group = parse_org_group(self.keycloak_admin.get_group(group_id=group_id))
+        self.org_group_cache.set_group(org_group)
+        return org_group
 
-        org_groups_dict = {}
+    def iter_group_members(self, group_id, page_size=GROUP_MEMBERS_PAGE_SIZE):
+        """
+        Yield the direct members of a group, fetching them page by page.
+        """
+        first = 0
+        while True:
+            page = self.keycloak_admin.get_group_members(
+                group_id=group_id,
+                query={"first": first, "max": page_size, "briefRepresentation": True},
+            )
+            yield from page
+            if len(page) < page_size:
+                break
+            first += page_size
+
+    def get_org_membership_matrix(self, org_groups):
+        """
+        Map user id -> list of the given org groups the user is a member of.
+
+        Built from the members of each group (one paged call per group) instead
+        of fetching the groups of every user in the org.
+        """
+        if self.directory.is_ready():
+            return self.directory.get_membership_matrix(org_groups)
+
+        matrix = {}
         for group in org_groups:
-            org_groups_dict[group["id"]] = {
-                "id": group["id"],
-                "name": group["name"],
-                "tag_color": (group.get("tag_color", None)),
-                "permissions": (group.get("permissions", [])),
-                "description": (group.get("description", None)),
-            }
+            for member in self.iter_group_members(group["id"]):
+                matrix.setdefault(member["id"], []).append(group)
+        return matrix
 
-        user_org_group_memberships = []
+    def format_org_user_group(self, group):
+        return {
+            "id": group["id"],
+            "name": group["name"],
+            "tag_color": group.get("tag_color", None),
+            "permissions": group.get("permissions", []),
+            "description": group.get("description", None),
+        }
 
-        for user in users:
-            logger.info("User: %s", user)
+    def format_org_user(self, user, groups):
+        return {
+            "id": user["id"],
+            "email": user["email"],
+            "username": user["username"],
+            "verified": user["emailVerified"],
+            "groups": groups,
+        }
 
-            user_group_memberships = self.keycloak_admin.get_user_groups(
-                user_id=user["id"],
-                brief_representation=False,
-            )
+    def iter_org_users(self, org_id, first=None, max_results=None):
+        """
+        Yield the users of an org together with their org groups.
 
-            user_org_group_memberships.append(
-                {
-                    "id": user["id"],
-                    "email": user["email"],
-                    "username": user["username"],
-                    "verified": user["emailVerified"],
-                    "groups": [
-                        org_groups_dict[group["id"]]
-                        for group in user_group_memberships
-                        if group["id"] in org_groups_dict
-                    ],
-                },
+        ``first``/``max_results`` are passed to Keycloak so only the requested
+        slice of org members is fetched.
+        """
+        org_groups = [
+            self.format_org_user_group(group)
+            for group in self.get_org_groups(org_id=org_id)
+        ]
+        memberships = self.get_org_membership_matrix(org_groups)
+
+        if self.directory.is_ready():
+            users = self.directory.get_group_members(org_id)
+            if first is not None or max_results is not None:
+                first = first or 0
+                users = users[first : first + (max_results or GROUP_MEMBERS_PAGE_SIZE)]
+        elif first is None and max_results is None:
+            users = self.iter_group_members(org_id)
+        else:
+            users = self.keycloak_admin.get_group_members(
+                group_id=org_id,
+                query={"first": first or 0, "max": max_results or GROUP_MEMBERS_PAGE_SIZE},
             )
 
-        return user_org_group_memberships
+        for user in users:
+            yield self.format_org_user(user, memberships.get(user["id"], []))
+
+    def get_org_users(self, org_id, first=None, max_results=None):
+        return list(self.iter_org_users(org_id, first=first, max_results=max_results))
+
+    def get_org_user_list(self, org_id, search=""):
+        """
+        Lazy list of org users for paginated views, see OrgUserList.
+        """
+        return OrgUserList(self, org_id, search=search)
+
+    def get_org_member_index(self, org_id):
+        """
+        Get the brief representation of every org member, cached for
+        KEYCLOAK_ORG_MEMBERS_CACHE_TTL seconds. Used for counting and searching org users.
+        """
+        if self.directory.is_ready():
+            return self.directory.get_group_members(org_id)
+
+        generation = cache.get_or_set(ORG_MEMBERS_GENERATION_CACHE_KEY, 0, None)
+        cache_key = f"keycloak:org-members:{generation}:{org_id}"
+        return self.swr.get(
+            "org_members",
+            cache_key,
+            lambda: self._fetch_org_member_index(org_id),
+            settings.KEYCLOAK_ORG_MEMBERS_CACHE_TTL,
+        )
+
+    def _fetch_org_member_index(self, org_id):
+        return [
+            {field: member.get(field) for field in ORG_MEMBER_FIELDS}
+            for member in self.iter_group_members(org_id)
+        ]
+
+    def invalidate_org_members(self):
+        self._bump_generation(ORG_MEMBERS_GENERATION_CACHE_KEY)
 
     def add_user_to_org_group(self, user_id, org_group_id):
-        return self.keycloak_admin.group_user_add(
+        res = self.keycloak_admin.group_user_add(
             user_id=user_id,
             group_id=org_group_id,
         )
+        self.invalidate_user_groups(user_id)
+        self._update_directory("add_membership", user_id, org_group_id)
+        return res
 
     def remove_user_from_org_group(self, user_id, org_group_id):
-        return self.keycloak_admin.group_user_remove(
+        res = self.keycloak_admin.group_user_remove(
             user_id=user_id,
             group_id=org_group_id,
         )
+        self.invalidate_user_groups(user_id)
+        self._update_directory("remove_membership", user_id, org_group_id)
+        return res
 
     def find_user_by_email(self, email):
         """
@@ -641,24 +855,33 @@ class KeycloakService:
             result["email_sent"] = False
             result["temporary_password"] = None
 
+        if result["user_id"]:
+            self.invalidate_user_groups(result["user_id"])
+            self.invalidate_org_members()
+            self._update_directory("sync_user", result["user_id"])
+
         return result
 
     def delete_user(self, user_id):
         self.keycloak_admin.delete_user(user_id=user_id)
+        self.invalidate_user_groups(user_id)
+        self.invalidate_org_members()
+        self._update_directory("delete_user", user_id)
         logger.info("Deleted user: %s", user_id)
         return user_id
 
     def get_user_org_groups(self, request, org_id, user_id = None):
+        identity = self.get_identity(request)
         if user_id is None:
-            user_id = self.get_active_user(request)
+            active_org = identity.active_org
+            if active_org and active_org.get("id") == org_id:
+                return identity.org_groups
+            user_id = identity.user_id
 
         org_groups = self.get_org_groups(org_id=org_id)
         org_group_ids = {group["id"] for group in org_groups}
 
-        user_group_memberships = self.keycloak_admin.get_user_groups(
-            user_id=user_id,
-            brief_representation=False,
-        )
+        user_group_memberships = self.get_user_groups(user_id)
 
         return [
             group
@@ -667,36 +890,14 @@ class KeycloakService:
         ]
 
     def is_admin(self, request):
-        active_user_id = self.get_active_user(request)
-
-        org_id = self.get_active_user_org(request).get("id")
-        org_groups = self.get_org_groups(org_id=org_id)
-
-        user_group_memberships = self.keycloak_admin.get_user_groups(
-            user_id=active_user_id,
-            brief_representation=False,
-        )
-
-        # groups only in org_groups
-        org_group_user_memberships = [
-            group
-            for group in user_group_memberships
-            if group["id"] in [group["id"] for group in org_groups]
-        ]
-
-        return any(
-            group["name"].lower() == "admin" for group in org_group_user_memberships
-        )
+        return self.get_identity(request).is_admin
 
     def get_admin_org_group(self, org_id):
         org_groups = self.get_org_groups(org_id=org_id)
         return next((group for group in org_groups if group["name"].lower() == "admin"), None)
 
     def is_group_member(self, user_id, group_id):
-        user_group_memberships = self.keycloak_admin.get_user_groups(
-            user_id=user_id,
-            brief_representation=False,
-        )
+        user_group_memberships = self.get_user_groups(user_id)
 
         return group_id in [group["id"] for group in user_group_memberships]
 
@@ -708,6 +909,9 @@ class KeycloakService:
         )
 
     def get_orgs(self):
+        if self.directory.is_ready():
+            return self.directory.get_orgs()
+
         groups = self.keycloak_admin.get_groups(query={"briefRepresentation": "false"})
         return [
             group
@@ -750,6 +954,57 @@ class KeycloakService:
             logger.exception(f"Failed to check GlobalSuperAdmin membership for user {user_id}: {e}")
             return False
 
+    def get_admin_profile(self, user_id=None, email=None):
+        """
+        Resolve what an admin login needs to know about a Keycloak user, by id or email:
+        ``{"id", "email_verified", "is_global_superadmin"}``, or None if there is no such user.
+
+        The user lookup is cached for KEYCLOAK_ADMIN_PROFILE_CACHE_TTL seconds.
+        The superadmin group membership is read from Keycloak on every call, so
+        a revoked superadmin loses admin access right away.
+        """
+        if not user_id and not email:
+            return None
+
+        key = f"keycloak:admin-profile:{user_id or email.lower()}"
+        user = cache.get(key)
+        if user is None:
+            user = self.single_flight.do(
+                "admin_profile",
+                key,
+                lambda: self._fetch_admin_user(user_id, email),
+            )
+            cache.set(key, user, settings.KEYCLOAK_ADMIN_PROFILE_CACHE_TTL)
+        if not user:
+            return None
+
+        global_superadmin_group_id = settings.KEYCLOAK_GLOBAL_SUPERADMIN_GROUP_ID
+        if not global_superadmin_group_id:
+            logger.warning("KEYCLOAK_GLOBAL_SUPERADMIN_GROUP_ID not configured")
+
+        return {
+            **user,
+            "is_global_superadmin": bool(global_superadmin_group_id) and any(
+                group.get("id") == global_superadmin_group_id
+                for group in self.keycloak_admin.get_user_groups(user_id=user["id"])
+            ),
+        }
+
+    def _fetch_admin_user(self, user_id, email):
+        if user_id:
+            user = self.keycloak_admin.get_user(user_id)
+        else:
+            users = self.keycloak_admin.get_users(query={"email": email, "exact": True})
+            user = next((user for user in users if (user.get("email") or "").lower() == email.lower()), None)
+            if user is None:
+                # Cached as a miss too
+                return {}
+
+        return {
+            "id": user["id"],
+            "email_verified": user.get("emailVerified", False),
+        }
+
     def is_email_verified(self, user_id):
         """
         Check if a user's email is verified in Keycloak.
@@ -0,0 +1,141 @@
+import logging
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+ORG_GROUPS_GENERATION_CACHE_KEY = "keycloak:org-groups:generation"
+
+
+def parse_org_group(group):
+    """
+    Flatten a Keycloak group representation into the shape used by the frontend API.
+    """
+    attributes = group.get("attributes", {})
+    return {
+        "id": group["id"],
+        "name": group["name"],
+        "path": group.get("path", ""),
+        "tag_color": next(iter(attributes.get("tag_color", [])), None),
+        "permissions": attributes.get("permissions", []),
+        "description": next(iter(attributes.get("description", [])), None),
+        "nav_items": next(iter(attributes.get("nav_items", [])), None) or [],
+    }
+
+
+class OrgGroupTreeCache:
+    """
+    Cache of the parsed subgroups of each org, plus an id -> group index.
+
+    The tree of an org is stored under one key and every group is also indexed
+    under its own key together with the id of the org it belongs to, so single
+    group lookups and write-through updates don't need the whole tree.
+
+    Entries are kept ``stale_ttl`` seconds past their ``ttl``, ``get_tree`` and
+    ``get_group`` return them with their ``fresh_until`` time (see swr.is_fresh).
+
+    Trees are keyed by a generation, so a change to a group whose org is not
+    known drops the trees of all orgs at once.
+    """
+
+    def __init__(self, ttl, stale_ttl=0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+    def _tree_key(self, org_id):
+        generation = cache.get_or_set(ORG_GROUPS_GENERATION_CACHE_KEY, 0, None)
+        return f"keycloak:org-groups:{generation}:{org_id}"
+
+    def _group_key(self, group_id):
+        return f"keycloak:org-group:{group_id}"
+
+    def _set_many(self, entries):
+        cache.set_many(entries, self.ttl + self.stale_ttl)
+
+    def get_tree(self, org_id):
+        return cache.get(self._tree_key(org_id))
+
+    def set_tree(self, org_id, groups):
+        fresh_until = time.time() + self.ttl
+        entries = {self._tree_key(org_id): {"value": groups, "fresh_until": fresh_until}}
+        for group in groups:
+            entries[self._group_key(group["id"])] = {
+                "value": group,
+                "org_id": org_id,
+                "fresh_until": fresh_until,
+            }
+        self._set_many(entries)
+
+    def get_group(self, group_id):
+        return cache.get(self._group_key(group_id))
+
+    def set_group(self, group, org_id=None):
+        self._set_many(
+            {
+                self._group_key(group["id"]): {
+                    "value": group,
+                    "org_id": org_id,
+                    "fresh_until": time.time() + self.ttl,
+                },
+            },
+        )
+
+    def invalidate_org(self, org_id):
+        cache.delete(self._tree_key(org_id))
+
+    def invalidate_all(self):
+        try:
+            cache.incr(ORG_GROUPS_GENERATION_CACHE_KEY)
+        except ValueError:
+            cache.set(ORG_GROUPS_GENERATION_CACHE_KEY, 1, None)
+
+    def update_group(self, group_id, name, attributes):
+        """
+        Apply a rename/attribute update to the cached group and its org tree.
+        """
+        entry = cache.get(self._group_key(group_id))
+        if not entry or not entry["org_id"]:
+            # The group may still be part of a cached tree
+            self.invalidate_all()
+        if not entry:
+            return
+
+        parent_path = entry["value"]["path"].rsplit("/", 1)[0]
+        updated = parse_org_group(
+            {
+                "id": group_id,
+                "name": name,
+                "path": f"{parent_path}/{name}",
+                "attributes": attributes,
+            },
+        )
+        entries = {self._group_key(group_id): {**entry, "value": updated}}
+
+        org_id = entry["org_id"]
+        tree = self.get_tree(org_id) if org_id else None
+        if tree is not None:
+            entries[self._tree_key(org_id)] = {
+                **tree,
+                "value": [updated if g["id"] == group_id else g for g in tree["value"]],
+            }
+        self._set_many(entries)
+
+    def remove_group(self, group_id):
+        entry = cache.get(self._group_key(group_id))
+        cache.delete(self._group_key(group_id))
+        if not entry or not entry["org_id"]:
+            self.invalidate_all()
+            return
+
+        org_id = entry["org_id"]
+        tree = self.get_tree(org_id)
+        if tree is not None:
+            self._set_many(
+                {
+                    self._tree_key(org_id): {
+                        **tree,
+                        "value": [g for g in tree["value"] if g["id"] != group_id],
+                    },
+                },
+            )
@@ -0,0 +1,54 @@
+from collections.abc import Sequence
+from functools import cached_property
+
+
+def matches_search(member, search):
+    return any(
+        search in (member.get(field) or "").lower()
+        for field in ("username", "email", "firstName", "lastName")
+    )
+
+
+class OrgUserList(Sequence):
+    """
+    Lazy, searchable list of the users of an org.
+
+    Filtering and counting run against the cached member index of the org, and
+    group memberships are only resolved for the slice that is actually read, so
+    paginating it costs the page size rather than the size of the org.
+    """
+
+    def __init__(self, keycloak, org_id, search=""):
+        self.keycloak = keycloak
+        self.org_id = org_id
+        self.search = search.strip().lower()
+
+    @cached_property
+    def members(self):
+        members = self.keycloak.get_org_member_index(self.org_id)
+        if self.search:
+            members = [member for member in members if matches_search(member, self.search)]
+        return members
+
+    @cached_property
+    def org_groups(self):
+        return {
+            group["id"]: self.keycloak.format_org_user_group(group)
+            for group in self.keycloak.get_org_groups(org_id=self.org_id)
+        }
+
+    def _resolve(self, member):
+        groups = [
+            self.org_groups[group["id"]]
+            for group in self.keycloak.get_user_groups(member["id"])
+            if group["id"] in self.org_groups
+        ]
+        return self.keycloak.format_org_user(member, groups)
+
+    def __len__(self):
+        return len(self.members)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._resolve(member) for member in self.members[index]]
+        return self._resolve(self.members[index])
@@ -0,0 +1,76 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key within a worker process.
+
+    The first caller for a key runs the function, callers arriving while it is
+    in flight wait for it and get the same result (or exception). ``stats``
+    counts, per call name, how many calls went out and how many were coalesced,
+    and is logged every ``metrics_interval`` seconds (never if it is 0).
+    """
+
+    def __init__(self, metrics_interval=0):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {"calls": Counter(), "coalesced": Counter()}
+        self.metrics_interval = metrics_interval
+        self._metrics_logged_at = time.monotonic()
+
+    def do(self, name, key, fn):
+        flight_key = (name, key)
+        with self._lock:
+            call = self._calls.get(flight_key)
+            leader = call is None
+            if leader:
+                call = self._calls[flight_key] = _Call()
+                self.stats["calls"][name] += 1
+            else:
+                self.stats["coalesced"][name] += 1
+        self._log_metrics()
+
+        if not leader:
+            call.done.wait()
+            logger.debug("Coalesced %s(%s) with an in-flight call", name, key)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[flight_key]
+            call.done.set()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {"calls": self.stats["calls"][name], "coalesced": self.stats["coalesced"][name]}
+                for name in self.stats["calls"] | self.stats["coalesced"]
+            }
+
+    def _log_metrics(self):
+        now = time.monotonic()
+        with self._lock:
+            if not self.metrics_interval or now - self._metrics_logged_at < self.metrics_interval:
+                return
+            self._metrics_logged_at = now
+        logger.info("Keycloak single-flight metrics: %s", self.snapshot())
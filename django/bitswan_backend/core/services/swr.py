@@ -0,0 +1,81 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Set when a response was built from data past its freshness TTL
+served_stale = contextvars.ContextVar("keycloak_served_stale", default=False)
+
+
+def wrap(value, ttl):
+    return {"value": value, "fresh_until": time.time() + ttl}
+
+
+def is_fresh(entry):
+    return entry["fresh_until"] > time.time()
+
+
+class StaleWhileRevalidate:
+    """
+    Serve cached Keycloak reads past their TTL while refreshing them in the background.
+
+    Entries stay in the cache for ``stale_ttl`` seconds after they stop being
+    fresh. A stale entry is returned right away and a single background
+    refresh per key is started, so requests only wait for Keycloak when there
+    is no cached value at all. When Keycloak is down the refresh fails and the
+    last known value keeps being served.
+    """
+
+    def __init__(self, single_flight, stale_ttl):
+        self.single_flight = single_flight
+        self.stale_ttl = stale_ttl
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._revalidating = set()
+
+    def storage_ttl(self, ttl):
+        return ttl + self.stale_ttl
+
+    def get(self, name, key, load, ttl):
+        """
+        Get the value cached under ``key``, loading it with ``load()`` if there is none.
+        """
+        entry = cache.get(key)
+        if entry is not None:
+            if not is_fresh(entry):
+                self.serve_stale(name, key, lambda: self._load(key, load, ttl))
+            return entry["value"]
+        return self.single_flight.do(name, key, lambda: self._load(key, load, ttl))
+
+    def _load(self, key, load, ttl):
+        value = load()
+        cache.set(key, wrap(value, ttl), self.storage_ttl(ttl))
+        return value
+
+    def serve_stale(self, name, key, refresh):
+        """
+        Record that a stale value is served and refresh it in the background.
+        """
+        served_stale.set(True)
+        self.stats[name] += 1
+
+        with self._lock:
+            if (name, key) in self._revalidating:
+                return
+            self._revalidating.add((name, key))
+
+        def revalidate():
+            try:
+                self.single_flight.do(name, key, refresh)
+            except Exception as e:
+                logger.warning("Failed to refresh stale %s %s: %s", name, key, e, exc_info=True)
+            finally:
+                with self._lock:
+                    self._revalidating.discard((name, key))
+
+        threading.Thread(target=revalidate, name=f"keycloak-revalidate-{name}", daemon=True).start()
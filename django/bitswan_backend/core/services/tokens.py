@@ -0,0 +1,114 @@
+import logging
+import threading
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+
+from keycloak import KeycloakConnectionError
+from keycloak import KeycloakOpenIDConnection
+
+from bitswan_backend.core.services.circuit import KeycloakUnavailable
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceAccountConnection(KeycloakOpenIDConnection):
+    """
+    Admin API connection whose service account token is refreshed ahead of expiry.
+
+    Once ``refresh_fraction`` of the token lifetime has passed, the next admin
+    call starts a background refresh and keeps using the current, still valid
+    token. A call only waits for Keycloak when there is no valid token at all
+    (first use, expiry or a 401), and concurrent callers share a single refresh.
+
+    Calls go through the optional circuit ``breaker``: connection errors and
+    5xx responses count as failures and, once it is open, calls fail fast with
+    KeycloakUnavailable instead of waiting for Keycloak.
+    """
+
+    def __init__(self, *args, refresh_fraction=0.7, breaker=None, **kwargs):
+        self.refresh_fraction = refresh_fraction
+        self.breaker = breaker
+        self._refresh_at = None
+        self._refresh_lock = threading.Lock()
+        self._background_refresh = None
+        super().__init__(*args, **kwargs)
+
+    @property
+    def token(self):
+        return self._token
+
+    @token.setter
+    def token(self, value):
+        KeycloakOpenIDConnection.token.fset(self, value)
+        self._refresh_at = (
+            datetime.now(tz=UTC) + timedelta(seconds=self.refresh_fraction * value["expires_in"])
+            if value
+            else None
+        )
+
+    def _refresh_if_required(self):
+        now = datetime.now(tz=UTC)
+        if self.token is None or now >= self.expires_at:
+            self._refresh(self.token)
+        elif now >= self._refresh_at:
+            self._refresh_in_background()
+
+    def refresh_token(self):
+        # Called by python-keycloak when the admin API rejected the token
+        self._refresh(self.token)
+
+    def _refresh(self, stale_token):
+        with self._refresh_lock:
+            if self.token is not stale_token:
+                # another thread already replaced the token while we were waiting
+                return
+            self.get_token()
+            logger.info("Refreshed Keycloak service account token")
+
+    def _refresh_in_background(self):
+        if self._background_refresh and self._background_refresh.is_alive():
+            return
+
+        def refresh(stale_token):
+            try:
+                self._refresh(stale_token)
+            except Exception as e:
+                logger.warning("Background refresh of the service account token failed: %s", e, exc_info=True)
+
+        self._background_refresh = threading.Thread(
+            target=refresh,
+            args=(self.token,),
+            name="keycloak-token-refresh",
+            daemon=True,
+        )
+        self._background_refresh.start()
+
+    def _call(self, method, *args, **kwargs):
+        if self.breaker is None:
+            return method(*args, **kwargs)
+
+        if not self.breaker.allow():
+            raise KeycloakUnavailable()
+        try:
+            response = method(*args, **kwargs)
+        except KeycloakConnectionError:
+            self.breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def raw_get(self, *args, **kwargs):
+        return self._call(super().raw_get, *args, **kwargs)
+
+    def raw_post(self, *args, **kwargs):
+        return self._call(super().raw_post, *args, **kwargs)
+
+    def raw_put(self, *args, **kwargs):
+        return self._call(super().raw_put, *args, **kwargs)
+
+    def raw_delete(self, *args, **kwargs):
+        return self._call(super().raw_delete, *args, **kwargs)
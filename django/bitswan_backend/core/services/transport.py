@@ -0,0 +1,92 @@
+import logging
+import os
+import threading
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class ForkSafeSession(requests.Session):
+    """
+    ``requests.Session`` with a sized keep-alive connection pool.
+
+    Pooled sockets must not be shared between processes, so the adapters are
+    remounted the first time the session is used in a forked worker.
+    """
+
+    def __init__(self, pool_size, max_retries):
+        super().__init__()
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        # python-keycloak passes its own headers, don't let requests add auth headers
+        self.auth = lambda r: r
+        self._mount_adapters()
+
+    def _mount_adapters(self):
+        self._pid = os.getpid()
+        retries = Retry(
+            total=self.max_retries,
+            # Failed connects are retried for every method, read errors only for
+            # idempotent ones, so a POST Keycloak may have processed is never resent
+            status_forcelist=(),
+            raise_on_status=False,
+        )
+        for prefix in ("https://", "http://"):
+            self.mount(
+                prefix,
+                HTTPAdapter(
+                    pool_connections=self.pool_size,
+                    pool_maxsize=self.pool_size,
+                    max_retries=retries,
+                ),
+            )
+
+    def request(self, *args, **kwargs):
+        if self._pid != os.getpid():
+            self._mount_adapters()
+        return super().request(*args, **kwargs)
+
+
+class KeycloakTransport:
+    """
+    The HTTP transport shared by all Keycloak traffic of a worker process.
+
+    python-keycloak clients are attached to the same pooled session via
+    ``attach``, and raw OIDC endpoint calls (token exchange, userinfo, logout,
+    JWKS) go through ``get``/``post``, which apply the timeout of the endpoint class.
+    """
+
+    def __init__(self):
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = ForkSafeSession(
+                        pool_size=settings.KEYCLOAK_HTTP_POOL_SIZE,
+                        max_retries=settings.KEYCLOAK_HTTP_MAX_RETRIES,
+                    )
+        return self._session
+
+    def attach(self, client):
+        """
+        Make a python-keycloak ConnectionManager send its requests through the shared session.
+        """
+        client._s = self.session
+        return client
+
+    def get(self, url, timeout=None, **kwargs):
+        return self.session.get(url, timeout=timeout or settings.KEYCLOAK_OIDC_TIMEOUT, **kwargs)
+
+    def post(self, url, timeout=None, **kwargs):
+        return self.session.post(url, timeout=timeout or settings.KEYCLOAK_OIDC_TIMEOUT, **kwargs)
+
+
+keycloak_transport = KeycloakTransport()
@@ -0,0 +1,126 @@
+import copy
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class UserResolver:
+    """
+    Resolves the claims of a Keycloak token to the Django user of its email.
+
+    The user pk is kept in the shared cache under the token's ``sub`` and email,
+    and the user itself in a short-lived cache per worker, so authenticating a
+    known user is read-only and usually served from memory. Users are only
+    created on a miss.
+
+    The worker copies are tagged with a per-user generation in the shared
+    cache, which ``invalidate`` bumps when a user is saved or deleted, so a
+    change made by any worker drops the copies of all of them.
+    """
+
+    def __init__(self, ttl, local_ttl, local_maxsize):
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.local_maxsize = local_maxsize
+        self._local = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, claims, defaults=None):
+        email = claims.get("email")
+        if not email:
+            return None
+
+        key = self._cache_key(claims.get("sub"), email)
+        user = self._get_local(key)
+        if user is None:
+            user = self._get_shared(key, email)
+        if user is None:
+            user, created = get_user_model().objects.get_or_create(email=email, defaults=defaults or {})
+            if created:
+                logger.info("Created user %s", email)
+            cache.set(key, user.pk, self.ttl)
+            self._set_local(key, self._generation(user.pk), user)
+        # Callers get their own copy of the cached instance
+        return copy.copy(user)
+
+    def invalidate(self, user_pk):
+        key = self._generation_key(user_pk)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+    def clear(self):
+        with self._lock:
+            self._local = {}
+
+    def _cache_key(self, sub, email):
+        digest = hashlib.sha256(f"{sub}:{email.lower()}".encode()).hexdigest()
+        return f"users:keycloak:{digest}"
+
+    def _generation_key(self, user_pk):
+        return f"users:generation:{user_pk}"
+
+    def _generation(self, user_pk):
+        return cache.get(self._generation_key(user_pk), 0)
+
+    def _get_shared(self, key, email):
+        pk = cache.get(key)
+        if pk is None:
+            return None
+        # Read before the user, so a change saved in between drops the copy
+        generation = self._generation(pk)
+        # A deleted user or a changed email is a miss
+        user = get_user_model().objects.filter(pk=pk, email=email).first()
+        if user is not None:
+            self._set_local(key, generation, user)
+        return user
+
+    def _get_local(self, key):
+        entry = self._local.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        _, generation, user = entry
+        if self._generation(user.pk) != generation:
+            return None
+        return user
+
+    def _set_local(self, key, generation, user):
+        with self._lock:
+            if len(self._local) >= self.local_maxsize:
+                now = time.monotonic()
+                self._local = {k: v for k, v in self._local.items() if v[0] >= now}
+                if len(self._local) >= self.local_maxsize:
+                    self._local.pop(next(iter(self._local)))
+            self._local[key] = (time.monotonic() + self.local_ttl, generation, user)
+
+
+user_resolver = UserResolver(
+    ttl=settings.KEYCLOAK_USER_CACHE_TTL,
+    local_ttl=settings.KEYCLOAK_USER_LOCAL_CACHE_TTL,
+    local_maxsize=settings.KEYCLOAK_USER_LOCAL_CACHE_SIZE,
+)
+
+
+def set_admin_flags(user, is_admin):
+    """
+    Grant or revoke Django admin access, saving the user only if it changed.
+    Users that are not saved yet get the flags set for their first save.
+    Returns True if the flags changed.
+    """
+    if user.is_staff == is_admin and user.is_superuser == is_admin:
+        return False
+
+    user.is_staff = is_admin
+    user.is_superuser = is_admin
+    if user.pk is not None:
+        user.save(update_fields=["is_staff", "is_superuser"])
+    return True
+
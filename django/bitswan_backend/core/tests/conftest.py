@@ -0,0 +1,82 @@
+import time
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from jwcrypto import jwk
+from jwcrypto import jwt
+
+from bitswan_backend.core.models import AutomationServer
+from bitswan_backend.core.models import Workspace
+from bitswan_backend.core.services.keycloak import KeycloakService
+from bitswan_backend.core.services.transport import keycloak_transport
+
+SERVER_URL = "http://keycloak.test"
+ISSUER = f"{SERVER_URL}/realms/test"
+
+
+@pytest.fixture()
+def signing_key():
+    return jwk.JWK.generate(kty="RSA", size=2048, kid="key-1", use="sig", alg="RS256")
+
+
+@pytest.fixture()
+def certs(signing_key):
+    return {"keys": [signing_key.export_public(as_dict=True)]}
+
+
+@pytest.fixture()
+def keycloak_service(settings, certs):
+    settings.KEYCLOAK_SERVER_URL = SERVER_URL
+    settings.KEYCLOAK_REALM_NAME = "test"
+    settings.KEYCLOAK_CLIENT_ID = "bitswan-backend"
+    KeycloakService._instance = None
+    cache.clear()
+
+    with mock.patch.object(keycloak_transport, "get") as get:
+        get.return_value.json.return_value = certs
+        yield KeycloakService()
+
+    KeycloakService._instance = None
+
+
+@pytest.fixture()
+def make_token(signing_key):
+    def do_make_token(**claims):
+        payload = {
+            "sub": "user-1",
+            "email": "user@example.com",
+            "iss": ISSUER,
+            "azp": "bitswan-backend",
+            "exp": int(time.time()) + 300,
+            **claims,
+        }
+        token = jwt.JWT(header={"alg": "RS256", "kid": signing_key.kid}, claims=payload)
+        token.make_signed_token(signing_key)
+        return token.serialize()
+
+    return do_make_token
+
+
+@pytest.fixture()
+def automation_server(db):
+    return AutomationServer.objects.create(
+        automation_server_id="server-1",
+        name="server",
+        keycloak_org_id="org-1",
+    )
+
+
+@pytest.fixture()
+def workspace(keycloak_service, automation_server, django_capture_on_commit_callbacks):
+    # New workspaces create their editor group in Keycloak once they are committed
+    with (
+        mock.patch.object(keycloak_service, "create_group", return_value="editors"),
+        django_capture_on_commit_callbacks(execute=True),
+    ):
+        workspace = Workspace.objects.create(
+            name="workspace",
+            keycloak_org_id="org-1",
+            automation_server=automation_server,
+        )
+    return workspace
@@ -0,0 +1,89 @@
+from unittest import mock
+
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIRequestFactory
+
+from bitswan_backend.core.authentication_backends import (
+    KeycloakAdminAuthenticationBackend,
+)
+from bitswan_backend.core.services.users import user_resolver
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+KEYCLOAK_USER = {"id": "user-1", "email": "user@example.com", "emailVerified": True}
+
+
+@pytest.fixture()
+def keycloak_admin(keycloak_service, settings):
+    settings.KEYCLOAK_GLOBAL_SUPERADMIN_GROUP_ID = "superadmins"
+    user_resolver.clear()
+    with mock.patch.object(keycloak_service, "keycloak_admin") as keycloak_admin:
+        keycloak_admin.get_user.return_value = KEYCLOAK_USER
+        keycloak_admin.get_users.return_value = [KEYCLOAK_USER]
+        keycloak_admin.get_user_groups.return_value = [{"id": "superadmins"}]
+        yield keycloak_admin
+
+
+def test_password_login_caches_the_user_lookup(keycloak_admin):
+    user = User.objects.create(email="user@example.com")
+    user.set_password("password")
+    user.save()
+    backend = KeycloakAdminAuthenticationBackend()
+
+    for _ in range(2):
+        user = backend.authenticate(None, username="user@example.com", password="password")
+        assert user.is_staff and user.is_superuser
+
+    keycloak_admin.get_users.assert_called_once()
+    # The superadmin membership is checked on every login
+    assert keycloak_admin.get_user_groups.call_count == 2
+    keycloak_admin.get_user.assert_not_called()
+
+
+def test_token_login_looks_the_profile_up_by_sub(keycloak_admin, make_token):
+    request = APIRequestFactory().get("/admin/", HTTP_AUTHORIZATION=f"Bearer {make_token()}")
+
+    user = KeycloakAdminAuthenticationBackend().authenticate(request)
+
+    assert user.is_staff and user.is_superuser
+    keycloak_admin.get_user.assert_called_once_with("user-1")
+    keycloak_admin.get_users.assert_not_called()
+
+
+def test_unknown_user_is_not_admin(keycloak_admin):
+    keycloak_admin.get_users.return_value = []
+    user = User.objects.create(email="user@example.com", is_staff=True, is_superuser=True)
+    user.set_password("password")
+    user.save()
+
+    user = KeycloakAdminAuthenticationBackend().authenticate(None, username="user@example.com", password="password")
+
+    assert not user.is_staff and not user.is_superuser
+
+
+def test_superadmin_membership_is_not_read_from_the_groups_cache(keycloak_service, keycloak_admin, make_token):
+    keycloak_service.get_user_groups("user-1")
+    # Removed from the superadmin group after the memberships were cached
+    keycloak_admin.get_user_groups.return_value = []
+    request = APIRequestFactory().get("/admin/", HTTP_AUTHORIZATION=f"Bearer {make_token()}")
+
+    user = KeycloakAdminAuthenticationBackend().authenticate(request)
+
+    assert not user.is_staff and not user.is_superuser
+    keycloak_admin.get_user_groups.assert_called_with(user_id="user-1")
+
+
+def test_revoked_superadmin_loses_access_on_the_next_login(keycloak_service, keycloak_admin):
+    assert keycloak_service.get_admin_profile(user_id="user-1")["is_global_superadmin"]
+
+    keycloak_admin.get_user_groups.return_value = []
+
+    assert not keycloak_service.get_admin_profile(user_id="user-1")["is_global_superadmin"]
+    keycloak_admin.get_user.assert_called_once()
+
+
+def test_profile_lookup_needs_an_id_or_email(keycloak_service, keycloak_admin):
+    assert keycloak_service.get_admin_profile() is None
@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+
+from bitswan_backend.core.authentication import AutomationServerAuthentication
+from bitswan_backend.core.models.automation_server import hash_access_token
+from bitswan_backend.core.models.automation_server import verified_access_tokens
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def authenticate():
+    verified_access_tokens.clear()
+
+    def do_authenticate(token):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return AutomationServerAuthentication().authenticate(request)[1]
+
+    return do_authenticate
+
+
+def test_only_the_token_digest_is_stored(automation_server):
+    token = automation_server.generate_access_token()
+    automation_server.refresh_from_db()
+
+    assert automation_server.access_token_digest == hash_access_token(token)
+    assert token not in automation_server.access_token_digest
+    assert automation_server.is_token_valid(token)
+    assert not automation_server.is_token_valid("other")
+
+
+def test_verified_tokens_are_cached(authenticate, automation_server):
+    token = automation_server.generate_access_token()
+
+    assert authenticate(token).pk == automation_server.pk
+    with CaptureQueriesContext(connection) as queries:
+        assert authenticate(token).pk == automation_server.pk
+    assert len(queries) == 0
+
+
+def test_new_token_revokes_the_cached_one(authenticate, automation_server):
+    token = automation_server.generate_access_token()
+    authenticate(token)
+
+    new_token = automation_server.generate_access_token()
+
+    with pytest.raises(AuthenticationFailed):
+        authenticate(token)
+    assert authenticate(new_token).pk == automation_server.pk
+
+
+def test_expired_token_is_rejected(authenticate, automation_server):
+    token = automation_server.generate_access_token()
+    authenticate(token)
+
+    automation_server.token_expires_at = timezone.now() - timedelta(seconds=1)
+    automation_server.save()
+
+    with pytest.raises(AuthenticationFailed):
+        authenticate(token)
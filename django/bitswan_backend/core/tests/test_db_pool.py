@@ -0,0 +1,106 @@
+from unittest import mock
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+
+from bitswan_backend.core.db.postgresql_pool.base import DatabaseWrapper
+
+
+@pytest.fixture()
+def make_wrapper():
+    DatabaseWrapper._connection_pools.clear()
+
+    def do_make_wrapper(**settings):
+        return DatabaseWrapper(
+            {
+                "ENGINE": "bitswan_backend.core.db.postgresql_pool",
+                "NAME": "bitswan_backend",
+                "USER": "postgres",
+                "PASSWORD": "postgres",
+                "HOST": "localhost",
+                "PORT": "5432",
+                "OPTIONS": {"pool": {"min_size": 1, "max_size": 4}},
+                "CONN_MAX_AGE": 0,
+                "CONN_HEALTH_CHECKS": True,
+                "AUTOCOMMIT": True,
+                "ATOMIC_REQUESTS": False,
+                "TIME_ZONE": None,
+                **settings,
+            },
+            alias="pooled",
+        )
+
+    yield do_make_wrapper
+    DatabaseWrapper._connection_pools.clear()
+
+
+def test_pool_is_shared_and_configured(make_wrapper):
+    with mock.patch("psycopg_pool.ConnectionPool") as pool_class:
+        wrapper = make_wrapper()
+        assert wrapper.pool is make_wrapper().pool
+
+    pool_class.assert_called_once()
+    kwargs = pool_class.call_args.kwargs
+    assert kwargs["min_size"] == 1
+    assert kwargs["max_size"] == 4
+    assert kwargs["check"] is pool_class.check_connection
+    assert "pool" not in kwargs["kwargs"]
+    assert kwargs["kwargs"]["dbname"] == "bitswan_backend"
+
+
+def test_persistent_connections_are_rejected(make_wrapper):
+    with pytest.raises(ImproperlyConfigured):
+        make_wrapper(CONN_MAX_AGE=60)._create_pool()
+
+
+def test_closed_connections_go_back_to_the_pool(make_wrapper):
+    wrapper = make_wrapper()
+    connection = wrapper.connection = mock.Mock()
+
+    wrapper._close()
+
+    connection._pool.putconn.assert_called_once_with(connection)
+    connection.close.assert_not_called()
+    assert wrapper.connection is None
+
+
+def test_metrics(make_wrapper):
+    with mock.patch("psycopg_pool.ConnectionPool") as pool_class:
+        pool_class.return_value.get_stats.return_value = {
+            "requests_num": 4,
+            "requests_wait_ms": 20,
+            "pool_size": 2,
+            "pool_available": 1,
+        }
+        metrics = make_wrapper().metrics()
+
+    assert metrics["checkouts"] == 4
+    assert metrics["avg_wait_ms"] == 5
+    assert metrics["size"] == 2
+    assert metrics["timeouts"] == 0
+
+
+@pytest.mark.django_db()
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="needs a PostgreSQL test database")
+def test_queries_check_connections_out_of_the_pool(make_wrapper):
+    # A fixed size, a growing pool counts connections before they are available
+    wrapper = make_wrapper(
+        **{key: connection.settings_dict[key] for key in ("NAME", "USER", "PASSWORD", "HOST", "PORT")},
+        OPTIONS={"pool": {"min_size": 1, "max_size": 1}},
+    )
+
+    try:
+        for _ in range(2):
+            with wrapper.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                assert cursor.fetchone() == (1,)
+            wrapper.close()
+        metrics = wrapper.metrics()
+    finally:
+        wrapper.pool.close()
+
+    assert metrics["checkouts"] == 2
+    assert metrics["timeouts"] == 0
+    # Every connection went back to the pool
+    assert metrics["available"] == metrics["size"]
@@ -0,0 +1,104 @@
+import time
+from unittest import mock
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from keycloak import KeycloakConnectionError
+
+from bitswan_backend.core.middleware import KeycloakDegradedModeMiddleware
+from bitswan_backend.core.services.circuit import CircuitBreaker
+from bitswan_backend.core.services.circuit import KeycloakUnavailable
+
+GROUPS = [{"id": "group-1", "name": "dev", "path": "/acme/dev"}]
+
+
+@pytest.fixture()
+def keycloak_admin(keycloak_service):
+    with mock.patch.object(keycloak_service, "keycloak_admin") as keycloak_admin:
+        keycloak_admin.get_user_groups.return_value = GROUPS
+        yield keycloak_admin
+
+
+def wait_for_revalidation(keycloak_service):
+    while keycloak_service.swr._revalidating:
+        time.sleep(0.001)
+
+
+def test_stale_value_is_served_and_refreshed(keycloak_service, keycloak_admin, settings):
+    settings.KEYCLOAK_USER_GROUPS_CACHE_TTL = -1
+    keycloak_service.get_user_groups("user-1")
+    keycloak_admin.get_user_groups.return_value = []
+
+    assert keycloak_service.get_user_groups("user-1") == GROUPS
+    wait_for_revalidation(keycloak_service)
+
+    assert keycloak_admin.get_user_groups.call_count == 2
+    assert keycloak_service.swr.stats["user_groups"] == 1
+
+
+def test_stale_value_survives_keycloak_outage(keycloak_service, keycloak_admin, settings):
+    settings.KEYCLOAK_USER_GROUPS_CACHE_TTL = -1
+    keycloak_service.get_user_groups("user-1")
+    keycloak_admin.get_user_groups.side_effect = KeycloakUnavailable()
+
+    assert keycloak_service.get_user_groups("user-1") == GROUPS
+    wait_for_revalidation(keycloak_service)
+    assert keycloak_service.get_user_groups("user-1") == GROUPS
+
+
+def test_circuit_breaker_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.01)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.02)
+    assert breaker.allow()
+    # only one trial call while half open
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.allow()
+
+
+def test_open_breaker_fails_fast(keycloak_service):
+    connection = keycloak_service.keycloak_connection
+    connection.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+
+    with mock.patch(
+        "keycloak.connection.ConnectionManager.raw_get",
+        side_effect=KeycloakConnectionError("down"),
+    ) as raw_get, mock.patch.object(connection, "_refresh_if_required"):
+        with pytest.raises(KeycloakConnectionError):
+            connection.raw_get("admin/realms/test/groups")
+        with pytest.raises(KeycloakUnavailable):
+            connection.raw_get("admin/realms/test/groups")
+
+    assert raw_get.call_count == 1
+
+
+def test_middleware_flags_stale_responses(keycloak_service, keycloak_admin, settings):
+    settings.KEYCLOAK_USER_GROUPS_CACHE_TTL = -1
+    keycloak_service.get_user_groups("user-1")
+
+    def view(request):
+        keycloak_service.get_user_groups("user-1")
+        return HttpResponse()
+
+    response = KeycloakDegradedModeMiddleware(view)(RequestFactory().get("/"))
+    wait_for_revalidation(keycloak_service)
+
+    assert response["X-Data-Stale"] == "true"
+    assert "X-Data-Stale" not in KeycloakDegradedModeMiddleware(lambda request: HttpResponse())(
+        RequestFactory().get("/"),
+    )
+
+
+def test_middleware_turns_open_breaker_into_503():
+    middleware = KeycloakDegradedModeMiddleware(lambda request: HttpResponse())
+
+    response = middleware.process_exception(RequestFactory().get("/"), KeycloakUnavailable())
+
+    assert response.status_code == 503
@@ -0,0 +1,88 @@
+from unittest import mock
+
+import pytest
+from keycloak import KeycloakGetError
+
+from bitswan_backend.core.models import DirectoryGroup
+from bitswan_backend.core.models import DirectoryMembership
+from bitswan_backend.core.models import DirectoryUser
+
+pytestmark = pytest.mark.django_db
+
+GROUPS = [
+    {
+        "id": "org-1",
+        "name": "acme",
+        "path": "/acme",
+        "attributes": {"type": ["org"]},
+        "subGroups": [
+            {"id": "group-1", "name": "dev", "path": "/acme/dev", "attributes": {"tag_color": ["red"]}},
+            {"id": "group-2", "name": "admin", "path": "/acme/admin", "attributes": {}},
+        ],
+    },
+]
+USERS = [
+    {"id": "user-1", "username": "alice", "email": "alice@example.com", "emailVerified": True},
+    {"id": "user-2", "username": "bob", "email": "bob@example.com", "emailVerified": False},
+]
+MEMBERS = {"org-1": USERS, "group-1": USERS[:1], "group-2": USERS[1:]}
+
+
+@pytest.fixture()
+def keycloak_admin(keycloak_service, settings):
+    settings.KEYCLOAK_DIRECTORY_ENABLED = True
+    with mock.patch.object(keycloak_service, "keycloak_admin") as keycloak_admin:
+        keycloak_admin.get_groups.return_value = GROUPS
+        keycloak_admin.users_count.return_value = len(USERS)
+        keycloak_admin.get_users.return_value = USERS
+        keycloak_admin.get_group_members.side_effect = lambda group_id, query: MEMBERS[group_id]
+        yield keycloak_admin
+
+
+@pytest.fixture()
+def directory(keycloak_service, keycloak_admin):
+    keycloak_service.directory.full_sync(workers=2)
+    keycloak_admin.reset_mock()
+    return keycloak_service.directory
+
+
+def test_full_sync(directory):
+    assert DirectoryGroup.objects.get(id="org-1").is_org
+    assert DirectoryGroup.objects.get(id="group-1").parent_group_id == "org-1"
+    assert DirectoryUser.objects.count() == 2
+    assert DirectoryMembership.objects.count() == 4
+
+
+def test_reads_are_served_from_the_mirror(keycloak_service, keycloak_admin, directory):
+    assert [org["id"] for org in keycloak_service.get_orgs()] == ["org-1"]
+    assert [group["name"] for group in keycloak_service.get_org_groups("org-1")] == ["admin", "dev"]
+    assert keycloak_service.get_org_group("group-1")["tag_color"] == "red"
+    assert {group["id"] for group in keycloak_service.get_user_groups("user-1")} == {"org-1", "group-1"}
+
+    users = {user["id"]: user for user in keycloak_service.get_org_users("org-1")}
+    assert [group["id"] for group in users["user-2"]["groups"]] == ["group-2"]
+    assert users["user-1"]["verified"] is True
+
+    assert keycloak_admin.method_calls == []
+
+
+def test_writes_update_the_mirror(keycloak_service, directory):
+    keycloak_service.add_user_to_org_group(user_id="user-2", org_group_id="group-1")
+    keycloak_service.remove_user_from_org_group(user_id="user-1", org_group_id="group-1")
+    keycloak_service.delete_group("group-2")
+
+    assert list(DirectoryMembership.objects.filter(group_id="group-1").values_list("user_id", flat=True)) == [
+        "user-2",
+    ]
+    assert not DirectoryGroup.objects.filter(id="group-2").exists()
+
+
+def test_sync_events(keycloak_admin, directory):
+    keycloak_admin.get_admin_events.return_value = [
+        {"time": 2**62, "resourceType": "USER", "resourcePath": "users/user-2"},
+    ]
+    keycloak_admin.get_user.side_effect = KeycloakGetError("not found", response_code=404)
+
+    assert directory.sync_events() == 1
+    assert not DirectoryUser.objects.filter(id="user-2").exists()
+    assert not DirectoryMembership.objects.filter(user_id="user-2").exists()
@@ -0,0 +1,85 @@
+from unittest import mock
+
+import pytest
+
+from bitswan_backend.core.models import AutomationServerGroupMembership
+from bitswan_backend.core.services.emqx_acl import acl_index
+from bitswan_backend.core.services.emqx_acl import topic_workspace_prefix
+
+pytestmark = pytest.mark.django_db
+
+ORG = {"id": "org-1", "name": "acme", "path": "/acme"}
+EDITORS = {"id": "editors", "name": "editors", "path": "/acme/editors"}
+ADMIN = {"id": "admin", "name": "admin", "path": "/acme/admin"}
+
+
+@pytest.fixture()
+def authorize(client, settings, keycloak_service):
+    settings.EMQX_AUTHORIZATION_MODE = "http"
+    settings.EMQX_AUTHZ_SECRET = "authz-secret"
+    acl_index.version = None
+    acl_index._checked_at = 0
+
+    def do_authorize(user_groups, topic, username="user-user-1"):
+        with mock.patch.object(keycloak_service, "get_user_groups", return_value=user_groups):
+            response = client.post(
+                "/api/emqx/authz",
+                {"username": username, "topic": topic, "action": "subscribe"},
+                content_type="application/json",
+                HTTP_AUTHORIZATION="Bearer authz-secret",
+            )
+        return response.json()["result"]
+
+    return do_authorize
+
+
+@pytest.fixture()
+def topic(workspace):
+    return f"/orgs/org-1/automation-servers/server-1/c/{workspace.id}/topology"
+
+
+def test_topic_workspace_prefix():
+    assert topic_workspace_prefix("/orgs/o/automation-servers/s/c/w/a/b") == "/orgs/o/automation-servers/s/c/w"
+    assert topic_workspace_prefix("/orgs/o/automation-servers/s") is None
+    assert topic_workspace_prefix("orgs/o/automation-servers/s/c/w") is None
+
+
+def test_session_credentials_are_authorized_by_group(authorize, automation_server, topic):
+    AutomationServerGroupMembership.objects.create(automation_server=automation_server, keycloak_group_id="ops")
+
+    assert authorize([ORG, EDITORS], topic) == "deny"
+    assert authorize([ORG, EDITORS, {"id": "ops"}], topic, username="user-user-2") == "allow"
+    assert authorize([ORG, ADMIN], topic, username="user-user-3") == "allow"
+
+
+def test_changes_made_by_other_workers_are_picked_up(authorize, automation_server, topic):
+    assert authorize([ORG, EDITORS], topic) == "allow"
+
+    # Another worker's cache is not shared with this one
+    with mock.patch("bitswan_backend.core.models.access.invalidate_workspace_access"):
+        AutomationServerGroupMembership.objects.create(automation_server=automation_server, keycloak_group_id="ops")
+    acl_index._checked_at = 0
+
+    assert authorize([ORG, EDITORS], topic, username="user-user-2") == "deny"
+
+
+def test_workspace_credentials_are_allowed(authorize, workspace, topic):
+    # They are confined by their mountpoint
+    assert authorize([], topic, username=str(workspace.id)) == "allow"
+
+
+def test_requires_the_secret(client, settings):
+    settings.EMQX_AUTHORIZATION_MODE = "http"
+    settings.EMQX_AUTHZ_SECRET = "authz-secret"
+
+    response = client.post("/api/emqx/authz", {}, content_type="application/json")
+
+    assert response.status_code == 403
+
+
+def test_is_disabled_without_a_secret(client, settings):
+    settings.EMQX_AUTHZ_SECRET = ""
+
+    response = client.post("/api/emqx/authz", {}, content_type="application/json", HTTP_AUTHORIZATION="Bearer ")
+
+    assert response.status_code == 404
@@ -0,0 +1,50 @@
+from unittest import mock
+
+import pytest
+from django.test import RequestFactory
+
+ORG = {"id": "org-1", "name": "acme", "path": "/acme", "attributes": {"type": ["org"]}}
+ADMIN = {"id": "group-admin", "name": "admin", "path": "/acme/admin", "attributes": {}}
+EDITOR = {
+    "id": "group-editor",
+    "name": "ws-editor",
+    "path": "/acme/ws-editor",
+    "attributes": {"permissions": ["workspace-editor"]},
+}
+
+
+@pytest.fixture()
+def make_request(make_token):
+    def do_make_request(org_id="org-1", org_name="acme"):
+        return RequestFactory().get(
+            "/",
+            HTTP_AUTHORIZATION=f"Bearer {make_token()}",
+            HTTP_X_ORG_ID=org_id,
+            HTTP_X_ORG_NAME=org_name,
+        )
+
+    return do_make_request
+
+
+def test_identity_is_resolved_once_per_request(keycloak_service, make_request):
+    request = make_request()
+
+    with mock.patch.object(
+        keycloak_service,
+        "get_user_groups",
+        return_value=[ORG, ADMIN, EDITOR],
+    ) as get_user_groups:
+        assert keycloak_service.get_active_user(request) == "user-1"
+        assert keycloak_service.get_active_user_org(request) == ORG
+        assert keycloak_service.get_active_user_orgs(request) == [ORG]
+        assert keycloak_service.is_admin(request)
+        assert keycloak_service.get_user_org_groups(request, "org-1") == [ADMIN]
+
+    assert get_user_groups.call_count == 1
+
+
+def test_active_org_requires_membership(keycloak_service, make_request):
+    with mock.patch.object(keycloak_service, "get_user_groups", return_value=[ORG]):
+        assert keycloak_service.get_active_user_org(make_request(org_name="other")) is None
+        assert keycloak_service.get_active_user_org(make_request(org_id="org-2")) is None
+        assert not keycloak_service.is_admin(make_request())
@@ -0,0 +1,48 @@
+import time
+from unittest import mock
+
+import pytest
+
+from bitswan_backend.core.services.jwks import KeycloakKeySet
+from bitswan_backend.core.services.jwks import get_token_kid
+
+
+def test_get_token_kid(make_token):
+    assert get_token_kid(make_token()) == "key-1"
+    assert get_token_kid("not-a-token") is None
+    # A header that is valid JSON but not an object
+    assert get_token_kid("W10.e30.") is None
+
+
+def test_validate_token_is_offline(keycloak_service, make_token):
+    token = make_token()
+
+    assert keycloak_service.validate_token(token)["sub"] == "user-1"
+    assert keycloak_service.validate_token(token)["sub"] == "user-1"
+
+    assert keycloak_service.key_set.http.get.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "claims",
+    [
+        {"exp": int(time.time()) - 3600},
+        {"iss": "http://evil.test/realms/test"},
+        {"azp": "other-client", "aud": "account"},
+    ],
+)
+def test_validate_token_rejects_bad_claims(keycloak_service, make_token, claims):
+    assert keycloak_service.validate_token(make_token(**claims)) is None
+
+
+def test_unknown_kid_refreshes_once_per_interval(certs):
+    key_set = KeycloakKeySet("http://keycloak.test/certs", min_refresh_interval=30)
+
+    with mock.patch("bitswan_backend.core.services.jwks.requests.get") as get:
+        get.return_value.json.return_value = certs
+
+        assert key_set.get_key("key-1") is not None
+        assert key_set.get_key("rotated-key") is None
+        assert key_set.get_key("rotated-key") is None
+
+        assert get.call_count == 1
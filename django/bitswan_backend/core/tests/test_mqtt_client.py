@@ -0,0 +1,58 @@
+from itertools import count
+from unittest import mock
+
+import paho.mqtt.client as mqtt
+import pytest
+
+from bitswan_backend.core.mqtt import MQTTClient
+
+
+@pytest.fixture()
+def client(settings):
+    settings.EMQX_JWT_SECRET = "emqx-secret-of-at-least-32-bytes"
+    settings.MQTT_MAX_QUEUED_MESSAGES = 2
+    settings.MQTT_QUEUE_OVERFLOW = "drop"
+    MQTTClient._instance = None
+    mids = count(1)
+    with mock.patch("paho.mqtt.client.Client") as paho_client:
+        paho_client.return_value.publish.side_effect = lambda *args: mock.Mock(
+            rc=mqtt.MQTT_ERR_NO_CONN,
+            mid=next(mids),
+        )
+        yield MQTTClient()
+    MQTTClient._instance = None
+
+
+def test_connects_in_the_background(client):
+    client.client.connect_async.assert_called_once_with("aoc-emqx", 1883)
+    client.client.loop_start.assert_called_once()
+    client.client.reconnect_delay_set.assert_called_once()
+
+
+def test_messages_are_tracked_until_acknowledged(client):
+    on_ack = mock.Mock()
+
+    assert client.publish("a", [], on_ack=on_ack)
+    assert client.metrics()["queue_depth"] == 1
+    assert not client.flush(timeout=0)
+
+    client.on_publish(client.client, None, 1)
+
+    on_ack.assert_called_once()
+    assert client.flush(timeout=0)
+    assert client.metrics()["acked"] == 1
+
+
+def test_acknowledgements_received_before_registration(client):
+    client.on_publish(client.client, None, 1)
+
+    assert client.publish("a", [])
+    assert client.metrics()["queue_depth"] == 0
+
+
+def test_full_queue_drops_messages(client):
+    assert client.publish("a", [])
+    assert client.publish("b", [])
+    assert not client.publish("c", [])
+
+    assert client.metrics()["dropped"] == 1
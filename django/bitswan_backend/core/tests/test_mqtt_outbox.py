@@ -0,0 +1,221 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from bitswan_backend.core.models import AutomationServerGroupMembership
+from bitswan_backend.core.models import MQTTOutbox
+from bitswan_backend.core.models import MQTTRepublishState
+from bitswan_backend.core.models import MQTTRetainedMessage
+from bitswan_backend.core.models import WorkspaceGroupMembership
+from bitswan_backend.core.models.outbox import enqueue_group_publishes
+from bitswan_backend.core.mqtt import MQTTPublishError
+from bitswan_backend.core.mqtt import MQTTService
+
+pytestmark = pytest.mark.django_db
+
+ORG_GROUPS = [
+    {"id": "admin", "name": "admin", "path": "/acme/admin"},
+    {"id": "ops", "name": "ops", "path": "/acme/ops"},
+]
+
+
+@pytest.fixture()
+def mqtt_service(keycloak_service):
+    MQTTService._instance = None
+    with mock.patch("bitswan_backend.core.mqtt.MQTTClient"):
+        mqtt_service = MQTTService()
+    # The broker acknowledges every message right away
+    mqtt_service.mqtt_client.publish.side_effect = lambda *args, on_ack, **kwargs: on_ack() or True
+    with (
+        mock.patch.object(keycloak_service, "keycloak_admin") as keycloak_admin,
+    ):
+        keycloak_admin.get_group_children.return_value = ORG_GROUPS
+        keycloak_admin.get_group.return_value = {"id": "editors", "name": "editors", "path": "/acme/editors"}
+        yield mqtt_service, keycloak_admin.get_group_children
+    MQTTService._instance = None
+
+
+def test_membership_changes_are_queued(automation_server, workspace):
+    membership = WorkspaceGroupMembership.objects.create(workspace=workspace, keycloak_group_id="ops")
+    membership.delete()
+    AutomationServerGroupMembership.objects.create(automation_server=automation_server, keycloak_group_id="ops")
+
+    assert list(MQTTOutbox.objects.values_list("kind", "object_id")) == [
+        (MQTTOutbox.Kind.WORKSPACE_GROUPS, str(workspace.id)),
+        (MQTTOutbox.Kind.WORKSPACE_GROUPS, str(workspace.id)),
+        (MQTTOutbox.Kind.WORKSPACE_GROUPS, str(workspace.id)),
+        (MQTTOutbox.Kind.AUTOMATION_SERVER_GROUPS, str(automation_server.id)),
+    ]
+
+
+def test_outbox_is_published_in_batches(mqtt_service, automation_server, workspace):
+    mqtt_service, get_org_groups = mqtt_service
+    WorkspaceGroupMembership.objects.create(workspace=workspace, keycloak_group_id="ops")
+    AutomationServerGroupMembership.objects.create(automation_server=automation_server, keycloak_group_id="ops")
+
+    assert mqtt_service.publish_outbox(batch_size=100) == 3
+    assert mqtt_service.publish_outbox(batch_size=100) == 0
+    assert not MQTTOutbox.objects.exists()
+
+    get_org_groups.assert_called_once()
+    assert mqtt_service.mqtt_client.publish.call_args_list == [
+        mock.call(
+            "/orgs/org-1/automation-servers/server-1/groups",
+            ["/acme/admin", "/acme/ops"],
+            retain=True,
+            on_ack=mock.ANY,
+        ),
+        mock.call(
+            f"/orgs/org-1/automation-servers/server-1/c/{workspace.id}/groups",
+            ["/acme/admin", "/acme/editors", "/acme/ops"],
+            retain=True,
+            on_ack=mock.ANY,
+        ),
+    ]
+
+
+def test_bursts_are_debounced_and_coalesced(mqtt_service, workspace):
+    mqtt_service, _ = mqtt_service
+    for group_id in ("ops", "dev", "qa"):
+        WorkspaceGroupMembership.objects.create(workspace=workspace, keycloak_group_id=group_id)
+
+    assert mqtt_service.publish_outbox(batch_size=100, debounce=60, max_delay=600) == 0
+
+    assert mqtt_service.publish_outbox(batch_size=1) == 1
+    assert not MQTTOutbox.objects.exists()
+    mqtt_service.mqtt_client.publish.assert_called_once()
+
+
+def test_unchanged_retained_payloads_are_skipped(mqtt_service, workspace):
+    mqtt_service, _ = mqtt_service
+    mqtt_service.publish_outbox(batch_size=100)
+    mqtt_service.publish_groups(workspaces=[workspace])
+
+    mqtt_service.mqtt_client.publish.assert_called_once()
+
+    mqtt_service.publish_groups(workspaces=[workspace], force=True)
+
+    assert mqtt_service.mqtt_client.publish.call_count == 2
+
+
+def test_retained_hashes_survive_a_restart(mqtt_service, workspace):
+    mqtt_service, _ = mqtt_service
+    mqtt_service.publish_outbox(batch_size=100)
+
+    assert MQTTRetainedMessage.objects.filter(topic__endswith=f"/c/{workspace.id}/groups").exists()
+
+    MQTTService._instance = None
+    with mock.patch("bitswan_backend.core.mqtt.MQTTClient"):
+        restarted = MQTTService()
+
+    assert restarted.publish_groups(workspaces=[workspace]) == 0
+    restarted.mqtt_client.publish.assert_not_called()
+
+
+def test_unacknowledged_messages_are_not_recorded(mqtt_service, workspace):
+    mqtt_service, _ = mqtt_service
+    mqtt_service.mqtt_client.publish.side_effect = None
+    mqtt_service.mqtt_client.flush.return_value = False
+
+    with pytest.raises(MQTTPublishError):
+        mqtt_service.publish_outbox(batch_size=100)
+
+    assert not MQTTRetainedMessage.objects.exists()
+
+
+def test_renamed_group_is_republished(workspace):
+    MQTTOutbox.objects.all().delete()
+
+    enqueue_group_publishes("editors")
+
+    assert list(MQTTOutbox.objects.values_list("kind", "object_id")) == [
+        (MQTTOutbox.Kind.WORKSPACE_GROUPS, str(workspace.id)),
+    ]
+
+
+def test_group_paths_are_not_read_from_the_group_caches(mqtt_service, keycloak_service, workspace):
+    mqtt_service, get_org_groups = mqtt_service
+    # Cached before another worker renamed "ops" to "platform"
+    keycloak_service.org_group_cache.set_tree("org-1", [{"id": "ops", "name": "ops", "path": "/acme/ops"}])
+    get_org_groups.return_value = [{"id": "ops", "name": "platform", "path": "/acme/platform"}]
+    WorkspaceGroupMembership.objects.create(workspace=workspace, keycloak_group_id="ops")
+
+    mqtt_service.publish_outbox(batch_size=100)
+
+    assert mqtt_service.mqtt_client.publish.call_args.args[1] == ["/acme/editors", "/acme/platform"]
+
+
+def test_republish_runs_once_per_deployment(mqtt_service, automation_server, workspace):
+    mqtt_service, get_org_groups = mqtt_service
+
+    call_command("republish_mqtt_groups", deployment="v1", rate=0, stdout=StringIO())
+    call_command("republish_mqtt_groups", deployment="v1", rate=0, stdout=StringIO())
+
+    get_org_groups.assert_called_once()
+    assert mqtt_service.mqtt_client.publish.call_count == 2
+    state = MQTTRepublishState.objects.get(deployment="v1")
+    assert state.completed_at
+    assert state.last_workspace_id == workspace.id
+
+    call_command("republish_mqtt_groups", deployment="v2", rate=0, stdout=StringIO())
+
+    assert mqtt_service.mqtt_client.publish.call_count == 2
+
+
+def test_republish_resumes_from_checkpoint(mqtt_service, automation_server, workspace):
+    mqtt_service, _ = mqtt_service
+    MQTTRepublishState.objects.create(deployment="v1", last_automation_server_id=automation_server.id)
+
+    call_command("republish_mqtt_groups", deployment="v1", rate=0, stdout=StringIO())
+
+    mqtt_service.mqtt_client.publish.assert_called_once_with(
+        f"/orgs/org-1/automation-servers/server-1/c/{workspace.id}/groups",
+        mock.ANY,
+        retain=True,
+        on_ack=mock.ANY,
+    )
+
+
+def test_unacknowledged_batches_are_retried(mqtt_service, workspace):
+    mqtt_service, _ = mqtt_service
+    mqtt_service.mqtt_client.flush.return_value = False
+
+    with pytest.raises(MQTTPublishError):
+        mqtt_service.publish_outbox(batch_size=100)
+
+    assert MQTTOutbox.objects.filter(claimed_until__isnull=True).exists()
+
+    mqtt_service.mqtt_client.flush.return_value = True
+
+    assert mqtt_service.publish_outbox(batch_size=100) == 1
+    assert not MQTTOutbox.objects.exists()
+
+
+def test_claimed_changes_are_skipped_until_the_claim_expires(mqtt_service, workspace):
+    mqtt_service, _ = mqtt_service
+    MQTTOutbox.objects.update(claimed_until=timezone.now() + timedelta(minutes=5))
+
+    assert mqtt_service.publish_outbox(batch_size=100) == 0
+
+    # The publisher holding the claim died
+    MQTTOutbox.objects.update(claimed_until=timezone.now() - timedelta(seconds=1))
+
+    assert mqtt_service.publish_outbox(batch_size=100) == 1
+    assert not MQTTOutbox.objects.exists()
+
+
+def test_changes_of_deleted_objects_are_logged(mqtt_service, workspace):
+    mqtt_service, _ = mqtt_service
+    MQTTOutbox.enqueue(MQTTOutbox.Kind.AUTOMATION_SERVER_GROUPS, 404)
+
+    with mock.patch("bitswan_backend.core.mqtt.logger") as logger:
+        assert mqtt_service.publish_outbox(batch_size=100) == 2
+
+    logger.info.assert_any_call(
+        f"Dropped queued {MQTTOutbox.Kind.AUTOMATION_SERVER_GROUPS} changes of deleted objects: ['404']",
+    )
+    assert not MQTTOutbox.objects.exists()
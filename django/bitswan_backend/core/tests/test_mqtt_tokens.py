@@ -0,0 +1,43 @@
+from unittest import mock
+
+import jwt
+import pytest
+
+from bitswan_backend.core.utils.mqtt import SignedTokenCache
+from bitswan_backend.core.utils.mqtt import create_mqtt_token
+from bitswan_backend.core.utils.mqtt import create_mqtt_tokens
+from bitswan_backend.core.utils.mqtt import signed_tokens
+
+SECRET = "emqx-secret-of-at-least-32-bytes"
+
+
+@pytest.fixture(autouse=True)
+def _clear_signed_tokens():
+    signed_tokens.clear()
+
+
+def test_tokens_are_reused_within_a_bucket():
+    token = create_mqtt_token(SECRET, "workspace-1", "/orgs/org-1")
+
+    with mock.patch("jwt.encode") as encode:
+        assert create_mqtt_tokens(SECRET, [("workspace-1", "/orgs/org-1")]) == [token]
+    encode.assert_not_called()
+
+    assert jwt.decode(token, SECRET, algorithms=["HS256"])["client_attrs"] == {"mountpoint": "/orgs/org-1"}
+
+
+def test_tokens_are_resigned_for_a_new_secret_or_bucket():
+    token = create_mqtt_token(SECRET, "workspace-1")
+
+    assert create_mqtt_token(SECRET.upper(), "workspace-1") != token
+    with mock.patch("time.time", return_value=signed_tokens.bucket_seconds * 10**6):
+        assert create_mqtt_token(SECRET, "workspace-1") != token
+
+
+def test_cache_evicts_least_recently_used():
+    cache = SignedTokenCache(maxsize=2, bucket_seconds=60)
+    cache.set_many({"a": 1, "b": 2})
+    cache.get_many(["a"])
+    cache.set_many({"c": 3})
+
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
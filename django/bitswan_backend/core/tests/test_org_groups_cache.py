@@ -0,0 +1,72 @@
+from unittest import mock
+
+import pytest
+
+ORG_ID = "org-1"
+CHILDREN = [
+    {
+        "id": "group-1",
+        "name": "dev",
+        "path": "/acme/dev",
+        "attributes": {"tag_color": ["red"], "permissions": ["view"]},
+    },
+    {
+        "id": "group-2",
+        "name": "editors",
+        "path": "/acme/editors",
+        "attributes": {"permissions": ["workspace-editor"]},
+    },
+]
+
+
+@pytest.fixture()
+def keycloak_admin(keycloak_service):
+    with mock.patch.object(keycloak_service, "keycloak_admin") as keycloak_admin:
+        keycloak_admin.get_group_children.return_value = CHILDREN
+        yield keycloak_admin
+
+
+def test_org_groups_are_cached(keycloak_service, keycloak_admin):
+    groups = keycloak_service.get_org_groups(ORG_ID)
+
+    assert [group["id"] for group in groups] == ["group-1"]
+    assert keycloak_service.get_org_groups(ORG_ID) == groups
+    assert keycloak_service.get_org_group("group-1")["tag_color"] == "red"
+    assert keycloak_admin.get_group_children.call_count == 1
+    keycloak_admin.get_group.assert_not_called()
+
+
+def test_update_writes_through(keycloak_service, keycloak_admin):
+    keycloak_service.get_org_groups(ORG_ID)
+    keycloak_service.update_org_group("group-1", "ops", {"tag_color": ["blue"]})
+
+    group = keycloak_service.get_org_groups(ORG_ID)[0]
+    assert (group["name"], group["path"], group["tag_color"]) == ("ops", "/acme/ops", "blue")
+    assert keycloak_service.get_org_group("group-1")["name"] == "ops"
+    assert keycloak_admin.get_group_children.call_count == 1
+
+
+def test_update_of_unindexed_group_invalidates_trees(keycloak_service, keycloak_admin):
+    keycloak_service.get_org_groups(ORG_ID)
+    # A group cached on its own has no known org
+    keycloak_service.org_group_cache.set_group({"id": "group-1", "name": "dev", "path": "/acme/dev"})
+    keycloak_service.update_org_group("group-1", "ops", {})
+    keycloak_service.get_org_groups(ORG_ID)
+
+    assert keycloak_admin.get_group_children.call_count == 2
+
+
+def test_delete_removes_group(keycloak_service, keycloak_admin):
+    keycloak_service.get_org_groups(ORG_ID)
+    keycloak_service.delete_group("group-1")
+
+    assert keycloak_service.get_org_groups(ORG_ID) == []
+    assert keycloak_admin.get_group_children.call_count == 1
+
+
+def test_create_invalidates_org(keycloak_service, keycloak_admin):
+    keycloak_service.get_org_groups(ORG_ID)
+    keycloak_service.create_group(ORG_ID, "qa", {})
+    keycloak_service.get_org_groups(ORG_ID)
+
+    assert keycloak_admin.get_group_children.call_count == 2
@@ -0,0 +1,83 @@
+from unittest import mock
+
+import pytest
+
+ORG_ID = "org-1"
+ORG_GROUPS = [
+    {"id": "group-1", "name": "dev", "path": "/acme/dev", "attributes": {}},
+    {"id": "group-2", "name": "ops", "path": "/acme/ops", "attributes": {}},
+]
+USERS = [
+    {"id": f"user-{i}", "email": f"user{i}@example.com", "username": f"user{i}", "emailVerified": True}
+    for i in range(5)
+]
+MEMBERS = {
+    ORG_ID: USERS,
+    "group-1": USERS[:2],
+    "group-2": USERS[1:3],
+}
+
+
+def get_group_members(group_id, query=None):
+    query = query or {}
+    first = query.get("first", 0)
+    return MEMBERS[group_id][first : first + query.get("max", 100)]
+
+
+@pytest.fixture()
+def keycloak_admin(keycloak_service):
+    with mock.patch.object(keycloak_service, "keycloak_admin") as keycloak_admin:
+        keycloak_admin.get_group_children.return_value = ORG_GROUPS
+        keycloak_admin.get_group_members.side_effect = get_group_members
+        keycloak_admin.get_user_groups.return_value = []
+        yield keycloak_admin
+
+
+def test_org_users_use_group_membership_matrix(keycloak_service, keycloak_admin):
+    users = {user["id"]: user for user in keycloak_service.get_org_users(ORG_ID)}
+
+    assert [group["id"] for group in users["user-0"]["groups"]] == ["group-1"]
+    assert [group["id"] for group in users["user-1"]["groups"]] == ["group-1", "group-2"]
+    assert users["user-4"]["groups"] == []
+    assert users["user-1"]["verified"] is True
+    keycloak_admin.get_user_groups.assert_not_called()
+    # one call for the org members and one per org group
+    assert keycloak_admin.get_group_members.call_count == 3
+
+
+def test_group_members_are_paged(keycloak_service, keycloak_admin):
+    members = list(keycloak_service.iter_group_members(ORG_ID, page_size=2))
+
+    assert members == USERS
+    assert keycloak_admin.get_group_members.call_count == 3
+
+
+def test_org_users_slice_is_pushed_down(keycloak_service, keycloak_admin):
+    users = keycloak_service.get_org_users(ORG_ID, first=2, max_results=2)
+
+    assert [user["id"] for user in users] == ["user-2", "user-3"]
+    keycloak_admin.get_group_members.assert_any_call(
+        group_id=ORG_ID,
+        query={"first": 2, "max": 2},
+    )
+
+
+def test_org_user_list_resolves_only_the_page(keycloak_service, keycloak_admin):
+    keycloak_admin.get_user_groups.return_value = [{"id": "group-2"}]
+    users = keycloak_service.get_org_user_list(ORG_ID)
+
+    assert len(users) == 5
+    page = users[1:3]
+
+    assert [user["id"] for user in page] == ["user-1", "user-2"]
+    assert [group["id"] for group in page[0]["groups"]] == ["group-2"]
+    assert keycloak_admin.get_user_groups.call_count == 2
+
+
+def test_org_user_list_search(keycloak_service, keycloak_admin):
+    assert [user["id"] for user in keycloak_service.get_org_user_list(ORG_ID, search="USER3")[:]] == ["user-3"]
+
+    keycloak_service.get_org_user_list(ORG_ID, search="user1")
+    len(keycloak_service.get_org_user_list(ORG_ID))
+    # the member index is fetched once and shared between searches
+    assert keycloak_admin.get_group_members.call_count == 1
@@ -0,0 +1,83 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from bitswan_backend.core.services.singleflight import SingleFlight
+
+
+def wait_for_coalesced(single_flight, name, count):
+    while single_flight.snapshot().get(name, {}).get("coalesced", 0) < count:
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_share_one_result():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    fetch = mock.Mock(side_effect=lambda: release.wait() and ["group"])
+    results = []
+
+    def call():
+        results.append(single_flight.do("org_groups", "org-1", fetch))
+
+    threads = [threading.Thread(target=call) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    # let every thread join the in-flight call before it completes
+    wait_for_coalesced(single_flight, "org_groups", 9)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert fetch.call_count == 1
+    assert results == [["group"]] * 10
+    assert single_flight.snapshot() == {"org_groups": {"calls": 1, "coalesced": 9}}
+
+
+def test_errors_are_shared_and_not_cached():
+    single_flight = SingleFlight()
+
+    with pytest.raises(ValueError):
+        single_flight.do("org_by_id", "org-1", mock.Mock(side_effect=ValueError))
+
+    assert single_flight.do("org_by_id", "org-1", lambda: "org") == "org"
+
+
+def test_metrics_are_logged_every_interval():
+    single_flight = SingleFlight(metrics_interval=60)
+
+    with (
+        mock.patch("time.monotonic", return_value=time.monotonic() + 61),
+        mock.patch("bitswan_backend.core.services.singleflight.logger") as logger,
+    ):
+        single_flight.do("org_groups", "org-1", list)
+        single_flight.do("org_groups", "org-1", list)
+
+    logger.info.assert_called_once_with(
+        "Keycloak single-flight metrics: %s",
+        {"org_groups": {"calls": 1, "coalesced": 0}},
+    )
+
+
+def test_service_coalesces_org_groups(keycloak_service):
+    release = threading.Event()
+
+    def get_group_children(**kwargs):
+        release.wait()
+        return [{"id": "group-1", "name": "dev", "path": "/acme/dev", "attributes": {}}]
+
+    with mock.patch.object(keycloak_service, "keycloak_admin") as keycloak_admin:
+        keycloak_admin.get_group_children.side_effect = get_group_children
+        threads = [
+            threading.Thread(target=keycloak_service.get_admin_org_group, args=("org-1",))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        wait_for_coalesced(keycloak_service.single_flight, "org_groups", 4)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+    assert keycloak_admin.get_group_children.call_count == 1
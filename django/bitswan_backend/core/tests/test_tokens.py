@@ -0,0 +1,57 @@
+import threading
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+
+from bitswan_backend.core.services.tokens import ServiceAccountConnection
+
+
+@pytest.fixture()
+def connection():
+    connection = ServiceAccountConnection(
+        server_url="http://keycloak.test",
+        realm_name="test",
+        client_id="bitswan-backend",
+        client_secret_key="secret",
+        refresh_fraction=0.5,
+    )
+    tokens = iter(range(1000))
+    connection._keycloak_openid = mock.Mock()
+    connection.keycloak_openid.token.side_effect = lambda *args, **kwargs: {
+        "access_token": f"token-{next(tokens)}",
+        "expires_in": 300,
+    }
+    return connection
+
+
+def test_first_use_fetches_token(connection):
+    connection._refresh_if_required()
+
+    assert connection.token["access_token"] == "token-0"
+    assert connection.headers["Authorization"] == "Bearer token-0"
+
+
+def test_token_is_refreshed_in_background_before_expiry(connection):
+    connection._refresh_if_required()
+    connection._refresh_at = datetime.now(tz=UTC) - timedelta(seconds=1)
+
+    connection._refresh_if_required()
+    connection._background_refresh.join()
+
+    assert connection.token["access_token"] == "token-1"
+    assert connection.keycloak_openid.token.call_count == 2
+
+
+def test_concurrent_refreshes_are_coalesced(connection):
+    connection._refresh_if_required()
+    stale_token = connection.token
+    threads = [threading.Thread(target=connection._refresh, args=(stale_token,)) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert connection.keycloak_openid.token.call_count == 2
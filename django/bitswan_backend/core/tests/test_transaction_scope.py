@@ -0,0 +1,158 @@
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+import pytest
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connection
+from django.db import connections
+from django.db.transaction import Atomic
+
+from bitswan_backend.core.models import AutomationServer
+from bitswan_backend.core.models import Workspace
+from bitswan_backend.core.models import WorkspaceGroupMembership
+from bitswan_backend.core.services.keycloak import KeycloakService
+from bitswan_backend.core.services.users import user_resolver
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+# Seconds every mocked Keycloak call takes
+KEYCLOAK_LATENCY = 0.2
+
+ORG = {"id": "org-1", "name": "acme", "path": "/acme"}
+ADMIN = {"id": "admin", "name": "admin", "path": "/acme/admin"}
+OPS = {"id": "ops", "name": "ops", "path": "/acme/ops"}
+
+
+@contextmanager
+def transaction_hold_times():
+    """
+    Record for how long each outermost transaction held the connection, from
+    its start to its commit or rollback. on_commit callbacks run after that.
+    """
+    hold_times = []
+    started_at = []
+    enter = Atomic.__enter__
+    connection_class = type(connections[DEFAULT_DB_ALIAS])
+
+    def timed_enter(self):
+        if not connection.in_atomic_block:
+            started_at.append(time.monotonic())
+        return enter(self)
+
+    def timed(end_transaction):
+        def do_end_transaction(self):
+            try:
+                return end_transaction(self)
+            finally:
+                if started_at:
+                    hold_times.append(time.monotonic() - started_at.pop())
+
+        return do_end_transaction
+
+    with (
+        mock.patch.object(Atomic, "__enter__", timed_enter),
+        mock.patch.object(connection_class, "commit", timed(connection_class.commit)),
+        mock.patch.object(connection_class, "rollback", timed(connection_class.rollback)),
+    ):
+        yield hold_times
+
+
+def slow(return_value=None):
+    def call(*args, **kwargs):
+        time.sleep(KEYCLOAK_LATENCY)
+        return return_value
+
+    return mock.Mock(side_effect=call)
+
+
+@pytest.fixture()
+def keycloak(keycloak_service):
+    user_resolver.clear()
+    with mock.patch.multiple(
+        KeycloakService,
+        get_user_groups=slow([ORG, ADMIN]),
+        get_org_groups=slow([ADMIN, OPS]),
+        get_org_group=slow(OPS),
+        create_group=slow("editors"),
+        delete_group=slow(),
+        create_workspace_client=slow({"success": True, "keycloak_internal_client_id": "client-1"}),
+    ):
+        yield keycloak_service
+
+
+@pytest.fixture()
+def frontend_headers(make_token):
+    return {
+        "HTTP_AUTHORIZATION": f"Bearer {make_token()}",
+        "HTTP_X_ORG_ID": ORG["id"],
+        "HTTP_X_ORG_NAME": ORG["name"],
+    }
+
+
+@pytest.fixture()
+def automation_server():
+    return AutomationServer.objects.create(
+        automation_server_id="server-1",
+        name="server",
+        keycloak_org_id="org-1",
+    )
+
+
+@pytest.fixture()
+def workspace(keycloak, automation_server):
+    return Workspace.objects.create(name="workspace", keycloak_org_id="org-1", automation_server=automation_server)
+
+
+def test_create_workspace(client, keycloak, automation_server):
+    token = automation_server.generate_access_token()
+
+    with transaction_hold_times() as hold_times:
+        response = client.post(
+            "/api/automation_server/workspaces/",
+            {"name": "workspace", "automation_server_id": "server-1", "editor_url": "https://editor.test"},
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+
+    assert response.status_code == 201
+    # Keycloak side effects run after the commit, before the response is built
+    assert response.json()["workspace_group_id"] == "editors"
+    workspace = Workspace.objects.get()
+    assert workspace.workspace_group_id == "editors"
+    assert workspace.keycloak_internal_client_id == "client-1"
+    assert max(hold_times) < KEYCLOAK_LATENCY
+
+
+def test_add_workspace_to_group(client, keycloak, frontend_headers, workspace):
+    with transaction_hold_times() as hold_times:
+        response = client.post(
+            f"/api/frontend/workspaces/{workspace.id}/add_to_group/",
+            {"group_id": "ops"},
+            **frontend_headers,
+        )
+
+    assert response.status_code == 201
+    assert WorkspaceGroupMembership.objects.filter(workspace=workspace, keycloak_group_id="ops").exists()
+    assert max(hold_times) < KEYCLOAK_LATENCY
+
+
+def test_delete_group(client, keycloak, frontend_headers, workspace):
+    WorkspaceGroupMembership.objects.create(workspace=workspace, keycloak_group_id="ops")
+
+    with transaction_hold_times() as hold_times:
+        response = client.delete("/api/frontend/user-groups/ops/", **frontend_headers)
+
+    assert response.status_code == 204
+    assert not WorkspaceGroupMembership.objects.filter(keycloak_group_id="ops").exists()
+    assert max(hold_times) < KEYCLOAK_LATENCY
+
+
+def test_read_only_endpoints_run_outside_transactions(client, keycloak, frontend_headers, workspace):
+    # The first request creates the user
+    client.get("/api/frontend/workspaces/", **frontend_headers)
+
+    with transaction_hold_times() as hold_times:
+        response = client.get("/api/frontend/workspaces/", **frontend_headers)
+
+    assert response.status_code == 200
+    assert hold_times == []
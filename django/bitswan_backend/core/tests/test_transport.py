@@ -0,0 +1,42 @@
+from unittest import mock
+
+import pytest
+from urllib3.exceptions import NewConnectionError
+from urllib3.exceptions import ProtocolError
+
+from bitswan_backend.core.services.keycloak import KeycloakService
+from bitswan_backend.core.services.transport import ForkSafeSession
+
+
+def test_service_is_initialized_once(keycloak_service):
+    keycloak_admin = keycloak_service.keycloak_admin
+
+    assert KeycloakService() is keycloak_service
+    assert KeycloakService().keycloak_admin is keycloak_admin
+
+
+def test_keycloak_clients_share_one_session(keycloak_service):
+    session = keycloak_service.keycloak.connection._s
+
+    assert isinstance(session, ForkSafeSession)
+    assert keycloak_service.keycloak_connection._s is session
+    assert keycloak_service.keycloak_connection.keycloak_openid is keycloak_service.keycloak
+
+
+def test_session_remounts_adapters_after_fork():
+    session = ForkSafeSession(pool_size=4, max_retries=1)
+    adapter = session.get_adapter("http://keycloak.test")
+
+    with mock.patch("os.getpid", return_value=-1), mock.patch("requests.Session.request"):
+        session.get("http://keycloak.test")
+
+    assert session.get_adapter("http://keycloak.test") is not adapter
+    assert session.get_adapter("http://keycloak.test")._pool_maxsize == 4
+
+
+def test_posts_are_only_retried_on_connection_errors():
+    retries = ForkSafeSession(pool_size=4, max_retries=2).get_adapter("http://keycloak.test").max_retries
+
+    assert retries.increment(method="POST", url="/token", error=NewConnectionError(None, "refused")).total == 1
+    with pytest.raises(ProtocolError):
+        retries.increment(method="POST", url="/token", error=ProtocolError("connection reset"))
@@ -0,0 +1,83 @@
+from unittest import mock
+
+import jwt
+import pytest
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from bitswan_backend.core.models import AutomationServerGroupMembership
+from bitswan_backend.core.models import Workspace
+from bitswan_backend.core.views.frontend.workspaces import GetUserEmqxJwtsAPIView
+
+pytestmark = pytest.mark.django_db
+
+SECRET = "emqx-secret-of-at-least-32-bytes"
+
+
+@pytest.fixture()
+def get_jwts(settings):
+    settings.EMQX_JWT_SECRET = SECRET
+
+    def do_get_jwts(group_ids, admin=False, **params):
+        view = GetUserEmqxJwtsAPIView()
+        request = Request(APIRequestFactory().get("/user/emqx/jwts", params))
+        with (
+            mock.patch.object(GetUserEmqxJwtsAPIView, "identity", mock.Mock(user_id="user-1")),
+            mock.patch.object(view, "get_org_id", return_value="org-1"),
+            mock.patch.object(view, "is_admin", return_value=admin),
+            mock.patch.object(
+                view,
+                "get_active_user_groups",
+                return_value=[{"id": group_id} for group_id in group_ids],
+            ),
+        ):
+            return view.get(request).data
+
+    return do_get_jwts
+
+
+def mountpoints(response):
+    return [
+        jwt.decode(token["token"], SECRET, algorithms=["HS256"])["client_attrs"]["mountpoint"]
+        for token in response["tokens"]
+    ]
+
+
+def test_tokens_of_accessible_workspaces(get_jwts, automation_server, workspace):
+    AutomationServerGroupMembership.objects.create(automation_server=automation_server, keycloak_group_id="ops")
+
+    assert get_jwts(["editors"])["tokens"] == []
+    assert mountpoints(get_jwts(["editors", "ops"])) == [f"/orgs/org-1/automation-servers/server-1/c/{workspace.id}"]
+    assert mountpoints(get_jwts([], admin=True)) == [f"/orgs/org-1/automation-servers/server-1/c/{workspace.id}"]
+
+
+def test_tokens_are_cached_until_access_changes(
+    get_jwts,
+    automation_server,
+    workspace,
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+):
+    tokens = get_jwts(["editors"])
+    with django_assert_num_queries(0):
+        assert get_jwts(["editors"]) == tokens
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Workspace.objects.create(name="other", keycloak_org_id="org-1", automation_server=automation_server)
+
+    assert len(get_jwts(["editors"])["tokens"]) == 2
+
+
+def test_session_token_covers_every_workspace(get_jwts, automation_server, workspace):
+    other = Workspace.objects.create(name="other", keycloak_org_id="org-1", automation_server=automation_server)
+
+    response = get_jwts(["editors"], mode="session")
+    claims = jwt.decode(response["token"], SECRET, algorithms=["HS256"])
+
+    assert claims["username"] == "user-user-1"
+    assert claims["client_attrs"] == {"mountpoint": ""}
+    assert [rule["topic"] for rule in claims["acl"] if rule["permission"] == "allow"] == sorted(
+        f"/orgs/org-1/automation-servers/server-1/c/{w.id}/#" for w in (workspace, other)
+    )
+    assert claims["acl"][-1] == {"permission": "deny", "action": "all", "topic": "#"}
+    assert {w["workspace_id"] for w in response["workspaces"]} == {str(workspace.id), str(other.id)}
@@ -0,0 +1,37 @@
+from unittest import mock
+
+import pytest
+
+GROUPS = [{"id": "group-1", "name": "dev", "path": "/acme/dev"}]
+
+
+@pytest.fixture()
+def keycloak_admin(keycloak_service):
+    with mock.patch.object(keycloak_service, "keycloak_admin") as keycloak_admin:
+        keycloak_admin.get_user_groups.return_value = GROUPS
+        yield keycloak_admin
+
+
+def test_user_groups_are_cached(keycloak_service, keycloak_admin):
+    assert keycloak_service.get_user_groups("user-1") == GROUPS
+    assert keycloak_service.get_user_groups("user-1") == GROUPS
+
+    assert keycloak_admin.get_user_groups.call_count == 1
+
+
+@pytest.mark.parametrize(
+    ("method", "kwargs"),
+    [
+        ("add_user_to_org_group", {"user_id": "user-1", "org_group_id": "group-2"}),
+        ("remove_user_from_org_group", {"user_id": "user-1", "org_group_id": "group-1"}),
+        ("delete_user", {"user_id": "user-1"}),
+        ("update_org_group", {"group_id": "group-1", "name": "ops", "attributes": {}}),
+        ("delete_group", {"group_id": "group-1"}),
+    ],
+)
+def test_membership_changes_invalidate_cache(keycloak_service, keycloak_admin, method, kwargs):
+    keycloak_service.get_user_groups("user-1")
+    getattr(keycloak_service, method)(**kwargs)
+    keycloak_service.get_user_groups("user-1")
+
+    assert keycloak_admin.get_user_groups.call_count == 2
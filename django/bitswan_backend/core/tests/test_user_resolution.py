@@ -0,0 +1,81 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from bitswan_backend.core.authentication import KeycloakAuthentication
+from bitswan_backend.core.services.users import UserResolver
+from bitswan_backend.core.services.users import set_admin_flags
+from bitswan_backend.core.services.users import user_resolver
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+@pytest.fixture()
+def authenticate(keycloak_service, make_token):
+    user_resolver.clear()
+
+    def do_authenticate(**claims):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {make_token(**claims)}")
+        return KeycloakAuthentication().authenticate(request)[0]
+
+    return do_authenticate
+
+
+def test_user_is_created_once_and_then_served_from_memory(authenticate):
+    user = authenticate()
+    assert user.email == "user@example.com"
+
+    with CaptureQueriesContext(connection) as queries:
+        assert authenticate().pk == user.pk
+    assert len(queries) == 0
+
+
+def test_other_workers_resolve_users_without_writes(authenticate):
+    user = authenticate()
+    user_resolver.clear()
+
+    with CaptureQueriesContext(connection) as queries:
+        assert authenticate().pk == user.pk
+    assert len(queries) == 1
+    assert queries[0]["sql"].startswith("SELECT")
+
+
+def test_deleted_user_is_created_again(authenticate):
+    user = authenticate()
+    User.objects.filter(pk=user.pk).delete()
+    user_resolver.clear()
+
+    assert authenticate().pk != user.pk
+
+
+def test_changed_user_is_not_served_stale(authenticate):
+    user = authenticate()
+    user.name = "Renamed"
+    user.save()
+
+    assert authenticate().name == "Renamed"
+
+
+def test_changes_made_by_other_workers_are_not_served_stale(authenticate):
+    user = authenticate()
+    other_worker = UserResolver(ttl=60, local_ttl=60, local_maxsize=10)
+    User.objects.filter(pk=user.pk).update(is_staff=True)
+    other_worker.invalidate(user.pk)
+
+    assert authenticate().is_staff
+
+
+def test_admin_flags_are_only_saved_when_they_change():
+    user = User.objects.create(email="admin@example.com")
+
+    assert set_admin_flags(user, True)
+    with CaptureQueriesContext(connection) as queries:
+        assert not set_admin_flags(user, True)
+    assert len(queries) == 0
+
+    user.refresh_from_db()
+    assert user.is_staff and user.is_superuser
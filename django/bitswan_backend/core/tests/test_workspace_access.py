@@ -0,0 +1,55 @@
+import pytest
+
+from bitswan_backend.core.models import AutomationServerGroupMembership
+from bitswan_backend.core.models import WorkspaceAccess
+from bitswan_backend.core.models import WorkspaceGroupMembership
+from bitswan_backend.core.models.access import ANY_GROUP
+
+pytestmark = pytest.mark.django_db
+
+
+def grants(workspace):
+    return set(
+        WorkspaceAccess.objects.filter(workspace=workspace).values_list("keycloak_group_id", "source"),
+    )
+
+
+def test_new_workspace_is_granted_to_its_editors_and_any_server_group(workspace):
+    assert grants(workspace) == {
+        ("editors", WorkspaceAccess.Source.WORKSPACE),
+        (ANY_GROUP, WorkspaceAccess.Source.AUTOMATION_SERVER),
+    }
+
+
+def test_membership_changes_update_grants(automation_server, workspace):
+    membership = WorkspaceGroupMembership.objects.create(workspace=workspace, keycloak_group_id="dev")
+    AutomationServerGroupMembership.objects.create(automation_server=automation_server, keycloak_group_id="ops")
+
+    assert grants(workspace) == {
+        ("editors", WorkspaceAccess.Source.WORKSPACE),
+        ("dev", WorkspaceAccess.Source.WORKSPACE),
+        ("ops", WorkspaceAccess.Source.AUTOMATION_SERVER),
+    }
+
+    membership.delete()
+    automation_server.group_memberships.all().delete()
+
+    assert grants(workspace) == {
+        ("editors", WorkspaceAccess.Source.WORKSPACE),
+        (ANY_GROUP, WorkspaceAccess.Source.AUTOMATION_SERVER),
+    }
+
+
+def test_deleting_the_workspace_drops_its_grants(automation_server, workspace):
+    automation_server.delete()
+
+    assert not WorkspaceAccess.objects.exists()
+
+
+def test_effective_workspaces_need_both_grants(automation_server, workspace):
+    AutomationServerGroupMembership.objects.create(automation_server=automation_server, keycloak_group_id="ops")
+
+    assert not WorkspaceAccess.objects.effective_workspace_ids(["editors"]).exists()
+    assert list(WorkspaceAccess.objects.effective_workspace_ids(["editors", "ops"])) == [
+        {"workspace_id": workspace.id},
+    ]
@@ -1,9 +1,73 @@
-import datetime
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 
 import jwt
+from django.conf import settings
 
+TOKEN_LIFETIME = 1000 * 7 * 24 * 60 * 60
 
-def create_mqtt_token(secret: str, username: str, mountpoint: str = ""):
+
+class SignedTokenCache:
+    """
+    Bounded LRU cache of signed MQTT tokens.
+
+    Tokens are keyed by (username, mountpoint, secret version, time bucket).
+    Every token minted within a bucket gets the same expiration time, so it
+    can be returned again until the bucket rolls over.
+    """
+
+    def __init__(self, maxsize, bucket_seconds):
+        self.maxsize = maxsize
+        self.bucket_seconds = bucket_seconds
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        tokens = {}
+        with self._lock:
+            for key in keys:
+                if key in self._tokens:
+                    self._tokens.move_to_end(key)
+                    tokens[key] = self._tokens[key]
+        return tokens
+
+    def set_many(self, tokens):
+        with self._lock:
+            self._tokens.update(tokens)
+            for key in tokens:
+                self._tokens.move_to_end(key)
+            while len(self._tokens) > self.maxsize:
+                self._tokens.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+
+signed_tokens = SignedTokenCache(
+    maxsize=settings.EMQX_JWT_CACHE_SIZE,
+    bucket_seconds=settings.EMQX_JWT_CACHE_BUCKET,
+)
+
+
+def _secret_version(secret):
+    # Key cached tokens by a digest instead of the secret itself
+    return hashlib.sha256(secret.encode()).hexdigest()[:16]
+
+
+def _acl_claim(topics):
+    """
+    EMQX ACL claim allowing the given topic filters and nothing else.
+    """
+    return [
+        *({"permission": "allow", "action": "all", "topic": topic} for topic in topics),
+        {"permission": "deny", "action": "all", "topic": "#"},
+    ]
+
+
+def create_mqtt_token(secret: str, username: str, mountpoint: str = "", topics=None):
     """
     Create a JWT token with the given parameters.
 
@@ -11,18 +75,51 @@ def create_mqtt_token(secret: str, username: str, mountpoint: str = ""):
         secret: The secret key used for encoding
         username: Username to include in the token
         mountpoint: The mountpoint path (defaults to empty string)
-        exp_hours: Token expiration time in hours (defaults to 2)
+        topics: Topic filters the client may use, e.g. one ``<mountpoint>/#`` per
+            workspace. When given, the token carries an EMQX ACL claim so a single
+            connection can reach all of them, instead of being confined to one mountpoint.
 
     Returns:
         Encoded JWT token
     """
-    exp = datetime.datetime.now(datetime.UTC) + datetime.timedelta(weeks=1000)
-    exp_timestamp = int(exp.timestamp())
+    topics = tuple(topics) if topics is not None else None
+    return _sign_tokens(secret, [(username, mountpoint, topics)])[0]
+
+
+def create_mqtt_tokens(secret: str, credentials):
+    """
+    Create JWT tokens for a batch of credentials, sharing one expiration time.
+    Tokens signed earlier in the current time bucket are reused.
+
+    Args:
+        secret: The secret key used for encoding
+        credentials: Iterable of (username, mountpoint) pairs
+
+    Returns:
+        List of encoded JWT tokens, in the order of the credentials
+    """
+    return _sign_tokens(secret, [(username, mountpoint, None) for username, mountpoint in credentials])
+
+
+def _sign_tokens(secret, credentials):
+    bucket = int(time.time()) // signed_tokens.bucket_seconds * signed_tokens.bucket_seconds
+    version = _secret_version(secret)
+    keys = [(*credential, version, bucket) for credential in credentials]
 
-    payload = {
-        "exp": exp_timestamp,
-        "username": username,
-        "client_attrs": {"mountpoint": mountpoint},
-    }
+    tokens = signed_tokens.get_many(keys)
+    missing = {}
+    for key in keys:
+        if key in tokens:
+            continue
+        username, mountpoint, topics = key[:3]
+        payload = {
+            "exp": bucket + TOKEN_LIFETIME,
+            "username": username,
+            "client_attrs": {"mountpoint": mountpoint},
+        }
+        if topics is not None:
+            payload["acl"] = _acl_claim(topics)
+        missing[key] = jwt.encode(payload, secret, algorithm="HS256")
+    signed_tokens.set_many(missing)
 
-    return jwt.encode(payload, secret, algorithm="HS256")
+    return [tokens.get(key) or missing[key] for key in keys]
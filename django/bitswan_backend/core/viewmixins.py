@@ -15,6 +15,14 @@ class KeycloakMixin:
 
     keycloak = KeycloakService()
 
+    @property
+    def identity(self):
+        """
+        Keycloak identity of the current request, resolved once per request
+        """
+
+        return self.keycloak.get_identity(self.request)
+
     def get_active_user_org_id(self):
         """
         Helper method to get the Keycloak group ID
@@ -32,14 +40,19 @@ class KeycloakMixin:
 
         return self.keycloak.get_active_user(self.request)
 
+    def get_active_user_groups(self):
+        """
+        Helper method to get the Keycloak groups of the active user
+        """
+
+        return self.identity.user_groups
+
     def get_active_user_org_name_slug(self):
         """
         Helper method to get the Keycloak group name slug
         """
 
-        org_id = self.get_active_user_org_id()
-
-        org = self.keycloak.get_org_by_id(org_id)
+        org = self.keycloak.get_active_user_org(self.request)
 
         org_name_slug = slugify(org["name"])
         logger.info("Got user group name slug: %s", org_name_slug)
@@ -116,6 +129,15 @@ class KeycloakMixin:
 
         return self.keycloak.get_org_users(org_id=org_id)
 
+    def get_org_user_list(self, search=""):
+        """
+        Helper method to get a lazy, searchable list of users for current org
+        """
+
+        org_id = self.get_org_id()
+
+        return self.keycloak.get_org_user_list(org_id=org_id, search=search)
+
     def add_user_to_group(self, group_id, user_id):
         """
         Helper method to add a user to a group
@@ -198,25 +220,19 @@ class KeycloakMixin:
             )
             raise PermissionDenied(msg)
 
-        user_info = self.keycloak.get_claims(self.request)
-        user_id = user_info.get("sub")
-        
-        if not user_id:
+        if not self.identity.user_id:
             raise PermissionDenied("User ID not found in token")
 
         # Get user groups from Keycloak API instead of relying on token claims
         try:
-            user_groups = self.keycloak.get_user_groups(user_id)
-            user_group_paths = [group.get("path", "") for group in user_groups]
+            self.get_active_user_groups()
         except Exception as e:
             logger.error("Failed to get user groups: %s", str(e))
             raise PermissionDenied("Failed to retrieve user group memberships")
 
         # Check if user is a member of the specified org
-        expected_org_path = f"/{org_name}"
-        if expected_org_path in user_group_paths:
-            org = self.keycloak.get_org_by_id(org_id)
-            if org and org.get("name") == org_name:
-                return org.get("id")
+        org = self.identity.active_org
+        if org:
+            return org.get("id")
 
         raise PermissionDenied("User is not a member of the org")
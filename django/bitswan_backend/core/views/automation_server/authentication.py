@@ -3,6 +3,7 @@ Automation Server API authentication views
 """
 import logging
 
+from django.db import transaction
 from rest_framework import status
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
@@ -110,31 +111,33 @@ class ExchangeOTPForTokenAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            # Find the automation server
-            server = AutomationServer.objects.get(
-                automation_server_id=automation_server_id
-            )
-        except AutomationServer.DoesNotExist:
-            return Response(
-                {"error": "Invalid automation server ID."},
-                status=status.HTTP_404_NOT_FOUND,
-            )
+        # Lock the server so an OTP can only be exchanged once
+        with transaction.atomic():
+            try:
+                # Find the automation server
+                server = AutomationServer.objects.select_for_update().get(
+                    automation_server_id=automation_server_id
+                )
+            except AutomationServer.DoesNotExist:
+                return Response(
+                    {"error": "Invalid automation server ID."},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
 
-        # Validate OTP
-        if not server.is_otp_valid(otp):
-            return Response(
-                {"error": "Invalid or expired OTP."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+            # Validate OTP
+            if not server.is_otp_valid(otp):
+                return Response(
+                    {"error": "Invalid or expired OTP."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-        # Generate access token
-        access_token = server.generate_access_token()
-        
-        # Clear the OTP after successful exchange
-        server.otp = None
-        server.otp_expires_at = None
-        server.save()
+            # Generate access token
+            access_token = server.generate_access_token()
+            
+            # Clear the OTP after successful exchange
+            server.otp = None
+            server.otp_expires_at = None
+            server.save()
 
         return Response(
             {
@@ -0,0 +1,51 @@
+"""
+API views called by the EMQX broker
+"""
+import secrets
+
+from django.conf import settings
+from django.http import Http404
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from bitswan_backend.core.services.emqx_acl import DENY
+from bitswan_backend.core.services.emqx_acl import acl_index
+from bitswan_backend.core.services.keycloak import KeycloakService
+
+
+@extend_schema(exclude=True)
+class EmqxAuthorizationAPIView(APIView):
+    """
+    HTTP authorizer for EMQX, enabled by setting EMQX_AUTHZ_SECRET.
+
+    The broker is configured to deny what no authorizer allows (see the aoc_cli
+    emqx.conf template). Session credentials minted with
+    EMQX_AUTHORIZATION_MODE=http carry no ACL and are decided here, in "jwt"
+    mode their ACL claim decides before this endpoint is asked.
+
+    EMQX is expected to POST ``{"username": "${username}", "topic": "${topic}",
+    "action": "${action}"}`` with an ``Authorization: Bearer <EMQX_AUTHZ_SECRET>``
+    header, and answers with ``{"result": "allow" | "deny"}``.
+    """
+
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+
+    def post(self, request):
+        if not settings.EMQX_AUTHZ_SECRET:
+            raise Http404
+
+        if not secrets.compare_digest(
+            request.headers.get("Authorization", ""),
+            f"Bearer {settings.EMQX_AUTHZ_SECRET}",
+        ):
+            return Response({"result": DENY}, status=status.HTTP_403_FORBIDDEN)
+
+        username = request.data.get("username") or ""
+        topic = request.data.get("topic") or ""
+
+        result = acl_index.authorize(username, topic, KeycloakService().get_user_groups)
+        return Response({"result": result}, status=status.HTTP_200_OK)
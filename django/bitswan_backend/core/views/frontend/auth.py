@@ -15,10 +15,10 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from drf_spectacular.utils import extend_schema
-import requests
 
 from bitswan_backend.core.authentication import KeycloakAuthentication
 from bitswan_backend.core.services.keycloak import KeycloakService
+from bitswan_backend.core.services.transport import keycloak_transport
 
 logger = logging.getLogger(__name__)
 
@@ -215,7 +215,7 @@ class LoginAPIView(APIView):
                 'scope': 'openid profile email'
             }
             
-            response = requests.post(token_url, data=data)
+            response = keycloak_transport.post(token_url, data=data)
             
             if response.status_code == 200:
                 token_data = response.json()
@@ -302,7 +302,7 @@ class LogoutAPIView(APIView):
                 
                 # Best effort to logout from Keycloak
                 try:
-                    requests.post(logout_url, data=data)
+                    keycloak_transport.post(logout_url, data=data)
                 except:
                     pass  # Don't fail if Keycloak logout fails
             
@@ -356,7 +356,7 @@ class CurrentUserAPIView(APIView):
                 
                 # Get user groups from Keycloak
                 try:
-                    user_groups = keycloak_service.get_user_groups(user_id)
+                    user_groups = keycloak_service.get_active_user_groups(request)
                     groups = [
                         {
                             "id": group.get('id'),
@@ -594,7 +594,7 @@ class KeycloakCallbackAPIView(APIView):
             'redirect_uri': request.build_absolute_uri(reverse('api:frontend:keycloak_callback')),
         }
         
-        response = requests.post(token_url, data=data)
+        response = keycloak_transport.post(token_url, data=data)
         if response.status_code == 200:
             return response.json()
         else:
@@ -612,7 +612,7 @@ class KeycloakCallbackAPIView(APIView):
             'Authorization': f'Bearer {access_token}'
         }
         
-        response = requests.get(userinfo_url, headers=headers)
+        response = keycloak_transport.get(userinfo_url, headers=headers)
         if response.status_code == 200:
             return response.json()
         else:
@@ -60,8 +60,7 @@ class AutomationServerViewSet(KeycloakMixin, viewsets.ModelViewSet):
             queryset = AutomationServer.objects.filter(keycloak_org_id=org_id)
         else:
             # For non-admin users, filter by AutomationServerGroupMembership
-            user_id = self.get_active_user()
-            user_groups = self.keycloak.get_user_groups(user_id)
+            user_groups = self.get_active_user_groups()
             user_group_ids = [group['id'] for group in user_groups]
             
             # Get automation servers that the user has access to through group memberships
@@ -252,7 +251,8 @@ class AutomationServerViewSet(KeycloakMixin, viewsets.ModelViewSet):
             user_id = self.keycloak.get_active_user(request)
             
             # Check if the user is a member of the admin group
-            is_admin = self.keycloak.is_group_member(user_id, admin_group["id"])
+            user_group_ids = {group["id"] for group in self.get_active_user_groups()}
+            is_admin = admin_group["id"] in user_group_ids
             
             if not is_admin:
                 L.warning(f"User {user_id} is not admin in org {server_org_id} for automation server {pk}")
@@ -535,8 +535,8 @@ class CheckOTPStatusAPIView(KeycloakMixin, APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # Check if OTP has been redeemed (access_token exists)
-        if server.access_token:
+        # Check if OTP has been redeemed (access token exists)
+        if server.access_token_digest:
             return Response({
                 "redeemed": True,
                 "redeemed_at": server.updated_at.isoformat(),
@@ -4,6 +4,7 @@ Frontend API views for group and user management
 import json
 import logging
 
+from django.db import transaction
 from keycloak import KeycloakDeleteError
 from keycloak import KeycloakGetError
 from keycloak import KeycloakPostError
@@ -29,6 +30,7 @@ from bitswan_backend.core.pagination import DefaultPagination
 from bitswan_backend.core.permissions import IsOrgAdmin
 from bitswan_backend.core.models.workspaces import WorkspaceGroupMembership
 from bitswan_backend.core.models.automation_server import AutomationServerGroupMembership
+from bitswan_backend.core.models.outbox import enqueue_group_publishes
 
 logger = logging.getLogger(__name__)
 
@@ -89,8 +91,9 @@ class UserGroupViewSet(KeycloakMixin, viewsets.ViewSet):
             
             self.delete_org_group(group_id=pk)
             
-            WorkspaceGroupMembership.objects.filter(keycloak_group_id=pk).delete()
-            AutomationServerGroupMembership.objects.filter(keycloak_group_id=pk).delete()
+            with transaction.atomic():
+                WorkspaceGroupMembership.objects.filter(keycloak_group_id=pk).delete()
+                AutomationServerGroupMembership.objects.filter(keycloak_group_id=pk).delete()
             
             return Response(status=status.HTTP_204_NO_CONTENT)
         except KeycloakDeleteError as e:
@@ -130,6 +133,10 @@ class UserGroupViewSet(KeycloakMixin, viewsets.ViewSet):
         serializer.is_valid(raise_exception=True)
 
         updated_group = serializer.save()
+
+        # The group path is part of the retained group lists
+        enqueue_group_publishes(pk)
+
         return Response(updated_group, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=["post"])
@@ -221,16 +228,11 @@ class OrgUsersViewSet(KeycloakMixin, viewsets.ViewSet):
 
     def list(self, request):
         try:
-            users = self.get_org_users()
-
-            # Apply search filter if provided
-            search_query = request.query_params.get("search", "").strip().lower()
-            if search_query:
-                users = [
-                    user for user in users
-                    if search_query in user.get("email", "").lower() or 
-                       search_query in user.get("name", "").lower()
-                ]
+            # Search and pagination run against the cached org member index,
+            # groups are only resolved for the users on the requested page
+            users = self.get_org_user_list(
+                search=request.query_params.get("search", ""),
+            )
 
             paginator = self.pagination_class()
             paginated_users = paginator.paginate_queryset(users, request)
@@ -1,11 +1,13 @@
 """
 Frontend API views for workspace management
 """
+import hashlib
 import json
 import logging
 import os
 
 from django.conf import settings
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
 from keycloak import KeycloakDeleteError
 from keycloak import KeycloakPutError
@@ -19,20 +21,25 @@ from drf_spectacular.utils import extend_schema
 
 from bitswan_backend.core.authentication import KeycloakAuthentication
 from bitswan_backend.core.models import Workspace
+from bitswan_backend.core.models import WorkspaceAccess
+from bitswan_backend.core.models.access import workspace_access_generation
 from bitswan_backend.core.viewmixins import KeycloakMixin
 from bitswan_backend.core.serializers.workspaces import WorkspaceSerializer
+from bitswan_backend.core.services.emqx_acl import USER_PREFIX
 from bitswan_backend.core.utils.mqtt import create_mqtt_token
+from bitswan_backend.core.utils.mqtt import create_mqtt_tokens
 from bitswan_backend.core.permissions.workspaces import CanReadWorkspaceEMQXJWT
 from bitswan_backend.core.permissions.workspaces import CanReadWorkspacePipelineEMQXJWT
 from bitswan_backend.core.permissions.workspaces import HasAccessToWorkspace
 from bitswan_backend.core.pagination import DefaultPagination
 
 from bitswan_backend.core.models.workspaces import WorkspaceGroupMembership
-from bitswan_backend.core.models.automation_server import AutomationServerGroupMembership
 
 
 L = logging.getLogger("core.views.workspaces")
 
+ADMIN_GRANT = "admin"
+
 
 # FIXME: Currently a Keycloak JWT token will be authorized even after it has expired.
 #        Consider reworking the oidc flow setup to prevent this.
@@ -66,18 +73,14 @@ class WorkspaceViewSet(KeycloakMixin, viewsets.ModelViewSet):
         if self.is_admin(self.request):
             return Workspace.objects.filter(**filters).order_by("-updated_at")
         
-        # For non-admin users, filter by WorkspaceGroupMembership
-        user_id = self.get_active_user()
-        user_groups = self.keycloak.get_user_groups(user_id)
+        # For non-admin users, filter by the workspace grants of their groups
+        user_groups = self.get_active_user_groups()
         user_group_ids = [group['id'] for group in user_groups]
         
-        # Get workspaces that the user has access to through group memberships
-        accessible_workspace_ids = WorkspaceGroupMembership.objects.filter(
-            keycloak_group_id__in=user_group_ids
-        ).values_list('workspace_id', flat=True)
-        
         # Add workspace access filter
-        filters['id__in'] = accessible_workspace_ids
+        filters['id__in'] = WorkspaceAccess.objects.granted_to(
+            user_group_ids, WorkspaceAccess.Source.WORKSPACE
+        ).values('workspace_id')
         
         return Workspace.objects.filter(**filters).order_by("-updated_at")
 
@@ -542,71 +545,86 @@ class GetUserEmqxJwtsAPIView(KeycloakMixin, views.APIView):
     authentication_classes = [KeycloakAuthentication]
     permission_classes = [AllowAny]
 
-    def get_user_accessible_workspaces(self):
+    def get_user_accessible_workspaces(self, org_id, user_group_ids):
         """
         Helper method to get workspaces that the user has access to based on group membership.
         Returns a list of workspaces with their mountpoint information.
         """
-        try:
-            # Get the current user's ID
-            user_id = self.get_active_user()
-            
-            # Get all groups the user belongs to
-            user_groups = self.keycloak.get_user_groups(user_id)
-            user_group_ids = [group['id'] for group in user_groups]
-            
-            # Get the organization ID
-            org_id = self.get_org_id()
-            
-            # Get all workspaces for the organization
-            all_workspaces = Workspace.objects.filter(keycloak_org_id=org_id).select_related('automation_server')
-            
-            if not all_workspaces.exists():
-                return []
-            
-            # Build the filtered list
-            accessible_workspaces = []
-            
-            for workspace in all_workspaces:
-                # Get automation server groups for this workspace's automation server
-                automation_server_groups = AutomationServerGroupMembership.objects.filter(
-                    automation_server=workspace.automation_server
-                ).values_list('keycloak_group_id', flat=True)
-                
-                # Get workspace groups for this workspace
-                workspace_groups = WorkspaceGroupMembership.objects.filter(
-                    workspace=workspace
-                ).values_list('keycloak_group_id', flat=True)
-                
-                automation_server_match = len(automation_server_groups) == 0  # If no groups, allow all
-                if automation_server_groups:
-                    # Check if user has access to any automation server group
-                    automation_server_match = any(group_id in user_group_ids for group_id in automation_server_groups)
-                
-                workspace_match = len(workspace_groups) == 0  # If no groups, allow all
-                if workspace_groups:
-                    # Check if user has access to any workspace group
-                    workspace_match = any(group_id in user_group_ids for group_id in workspace_groups)
-                
-                # Workspace must match both automation server and workspace groups
-                if automation_server_match and workspace_match:
-                    mountpoint = (
-                        f"/orgs/{org_id}/"
-                        f"automation-servers/{workspace.automation_server_id}/"
-                        f"c/{str(workspace.id)}"
-                    )
-                    
-                    accessible_workspaces.append({
-                        'automation_server_id': workspace.automation_server_id,
-                        'workspace_id': str(workspace.id),
-                        'mountpoint': mountpoint
-                    })
-            
-            return accessible_workspaces
-            
-        except Exception as e:
-            L.error(f"Error getting user accessible workspaces: {str(e)}")
-            return []
+        # Workspaces must be granted through both their automation server and workspace groups
+        workspaces = Workspace.objects.filter(
+            keycloak_org_id=org_id,
+            id__in=WorkspaceAccess.objects.effective_workspace_ids(user_group_ids),
+        )
+        return self.get_workspace_mountpoints(org_id, workspaces)
+
+    def get_workspace_mountpoints(self, org_id, workspaces):
+        return [
+            {
+                'automation_server_id': automation_server_id,
+                'workspace_id': str(workspace_id),
+                'mountpoint': (
+                    f"/orgs/{org_id}/"
+                    f"automation-servers/{automation_server_id}/"
+                    f"c/{workspace_id}"
+                ),
+            }
+            for workspace_id, automation_server_id in workspaces.values_list('id', 'automation_server_id')
+        ]
+
+    def get_tokens(self, accessible_workspaces):
+        tokens = create_mqtt_tokens(
+            secret=settings.EMQX_JWT_SECRET,
+            credentials=[
+                (workspace_info['workspace_id'], workspace_info['mountpoint'])
+                for workspace_info in accessible_workspaces
+            ],
+        )
+        return [
+            {
+                'automation_server_id': workspace_info['automation_server_id'],
+                'workspace_id': workspace_info['workspace_id'],
+                'token': token,
+            }
+            for workspace_info, token in zip(accessible_workspaces, tokens)
+        ]
+
+    def get_cached_workspaces(self, org_id, grant):
+        """
+        Workspaces reachable with the given grant (the admin role or a set of
+        group ids), cached until the workspace access table changes.
+        """
+        if grant == ADMIN_GRANT:
+            key = ADMIN_GRANT
+        else:
+            key = hashlib.sha256(",".join(sorted(grant)).encode()).hexdigest()
+        cache_key = f"emqx-workspaces:{workspace_access_generation()}:{org_id}:{key}"
+
+        accessible_workspaces = cache.get(cache_key)
+        if accessible_workspaces is None:
+            if grant == ADMIN_GRANT:
+                accessible_workspaces = self.get_workspace_mountpoints(
+                    org_id, Workspace.objects.filter(keycloak_org_id=org_id),
+                )
+            else:
+                accessible_workspaces = self.get_user_accessible_workspaces(org_id, grant)
+            cache.set(cache_key, accessible_workspaces, settings.EMQX_USER_JWTS_CACHE_TTL)
+        return accessible_workspaces
+
+    def get_session_token(self, accessible_workspaces):
+        """
+        Single token allowed on the topics of all the workspaces, so the browser
+        can share one broker connection between them.
+        """
+        # In the http authorization mode EMQX asks /api/emqx/authz instead
+        topics = None
+        if settings.EMQX_AUTHORIZATION_MODE == "jwt":
+            topics = sorted(f"{workspace_info['mountpoint']}/#" for workspace_info in accessible_workspaces)
+
+        return create_mqtt_token(
+            secret=settings.EMQX_JWT_SECRET,
+            username=f"{USER_PREFIX}{self.identity.user_id}",
+            topics=topics,
+        )
 
     def get(self, request):
         """
@@ -618,63 +636,30 @@ class GetUserEmqxJwtsAPIView(KeycloakMixin, views.APIView):
             
             # If the user is an admin, return a JWTs with mountpoint to all workspaces
             if self.is_admin(request):
-                # Get all workspaces for the organization
-                all_workspaces = Workspace.objects.filter(keycloak_org_id=org_id).select_related('automation_server')
-                
-                tokens = []
-                for workspace in all_workspaces:
-                    token = create_mqtt_token(
-                        secret=settings.EMQX_JWT_SECRET,
-                        username=str(workspace.id),
-                        mountpoint=f"/orgs/{org_id}/automation-servers/{workspace.automation_server_id}/c/{str(workspace.id)}",
-                    )
-                    tokens.append({
-                        'automation_server_id': workspace.automation_server_id,
-                        'workspace_id': workspace.id,
-                        'token': token
-                    })
-                
-                
-                return Response(
-                    {
-                        'url': os.getenv("EMQX_EXTERNAL_URL"),
-                        "tokens": tokens
-                    },
-                    status=status.HTTP_200_OK
-                )
-            
-            # Get accessible workspaces
-            accessible_workspaces = self.get_user_accessible_workspaces()
-            
-            if not accessible_workspaces:
+                grant = ADMIN_GRANT
+            else:
+                # Get all groups the user belongs to
+                grant = {group['id'] for group in self.get_active_user_groups()}
+
+            accessible_workspaces = self.get_cached_workspaces(org_id, grant)
+
+            # ?mode=session returns one token for all workspaces, whose topics
+            # are addressed by their full mountpoint instead of the default
+            # one token confined to each workspace
+            if request.query_params.get('mode') == 'session':
                 return Response(
                     {
                         "url": os.getenv("EMQX_EXTERNAL_URL"),
-                        "tokens": []
+                        "token": self.get_session_token(accessible_workspaces),
+                        "workspaces": accessible_workspaces,
                     },
                     status=status.HTTP_200_OK
                 )
-            
-            # Generate JWT tokens for each workspace
-            tokens = []
-            for workspace_info in accessible_workspaces:
-                # Create JWT token for this workspace
-                token = create_mqtt_token(
-                    secret=settings.EMQX_JWT_SECRET,
-                    username=workspace_info['workspace_id'],
-                    mountpoint=workspace_info['mountpoint'],
-                )
-                
-                tokens.append({
-                    'automation_server_id': workspace_info['automation_server_id'],
-                    'workspace_id': workspace_info['workspace_id'],
-                    'token': token
-                })
-            
+
             return Response(
                 {
                     "url": os.getenv("EMQX_EXTERNAL_URL"),
-                    "tokens": tokens,
+                    "tokens": self.get_tokens(accessible_workspaces),
                 },
                 status=status.HTTP_200_OK
             )
@@ -685,4 +670,3 @@ class GetUserEmqxJwtsAPIView(KeycloakMixin, views.APIView):
                 {"error": "Failed to generate EMQX JWTs"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-
@@ -48,6 +48,7 @@ class SocialAccountAdapter(DefaultSocialAccountAdapter):
         """Handle Keycloak login and set Django admin permissions."""
         try:
             from bitswan_backend.core.services.keycloak import KeycloakService
+            from bitswan_backend.core.services.users import set_admin_flags
             
             user_info = sociallogin.account.extra_data
             logger.info(f"Keycloak user info: {user_info}")
@@ -61,26 +62,20 @@ class SocialAccountAdapter(DefaultSocialAccountAdapter):
                 logger.warning(f"Missing user_id or email in Keycloak user info: {user_info}")
                 return
             
-            # Check if user is in GlobalSuperAdmin group
+            # Check if user is in GlobalSuperAdmin group, with the same cached
+            # profile lookup as the admin authentication backend
             keycloak_service = KeycloakService()
-            is_global_superadmin = keycloak_service.is_global_superadmin(user_id)
+            profile = keycloak_service.get_admin_profile(user_id=user_id) or {}
+            is_global_superadmin = profile.get('is_global_superadmin', False)
             
             # Check if email is verified
             email_verified = user_info.get('email_verified', False)
             
-            # Get or create Django user
-            user = sociallogin.user
-            
-            if is_global_superadmin and email_verified:
-                user.is_staff = True
-                user.is_superuser = True
-                user.save()
-                logger.info(f"User {email} granted Django admin access via GlobalSuperAdmin group")
-            else:
-                if user.is_staff or user.is_superuser:
-                    user.is_staff = False
-                    user.is_superuser = False
-                    user.save()
+            is_admin = is_global_superadmin and email_verified
+            if set_admin_flags(sociallogin.user, is_admin):
+                if is_admin:
+                    logger.info(f"User {email} granted Django admin access via GlobalSuperAdmin group")
+                else:
                     reason = "not in GlobalSuperAdmin group" if not is_global_superadmin else "email not verified"
                     logger.info(f"User {email} Django admin access revoked - {reason}")
                     
@@ -3,6 +3,9 @@ from typing import ClassVar
 from django.contrib.auth.models import AbstractUser
 from django.db.models import CharField
 from django.db.models import EmailField
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
@@ -36,3 +39,13 @@ class User(AbstractUser):
 
         """
         return reverse("users:detail", kwargs={"pk": self.id})
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_resolved_user(sender, instance, **kwargs):
+    """
+    Drop the copies of a changed user cached by the workers' user resolvers.
+    """
+    from bitswan_backend.core.services.users import user_resolver
+
+    user_resolver.invalidate(instance.pk)
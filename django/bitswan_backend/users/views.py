@@ -1,5 +1,4 @@
 import os
-import requests
 from django.shortcuts import redirect
 from django.contrib.auth import login
 from django.contrib.auth import get_user_model
@@ -15,6 +14,8 @@ from django.views.generic import RedirectView
 from django.views.generic import UpdateView
 import logging
 
+from bitswan_backend.core.services.transport import keycloak_transport
+
 logger = logging.getLogger(__name__)
 
 # Original user views
@@ -160,7 +161,7 @@ def exchange_code_for_token(request: HttpRequest, code: str) -> dict:
         'redirect_uri': request.build_absolute_uri(reverse('users:keycloak_callback')),
     }
     
-    response = requests.post(token_url, data=data)
+    response = keycloak_transport.post(token_url, data=data)
     if response.status_code == 200:
         return response.json()
     else:
@@ -178,7 +179,7 @@ def get_user_info(access_token: str) -> dict:
         'Authorization': f'Bearer {access_token}'
     }
     
-    response = requests.get(userinfo_url, headers=headers)
+    response = keycloak_transport.get(userinfo_url, headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -2,6 +2,7 @@ from django.urls import path, include
 
 from bitswan_backend.core.urls.frontend_api import urlpatterns as frontend_api_urlpatterns
 from bitswan_backend.core.urls.automation_server_api import urlpatterns as automation_server_api_urlpatterns
+from bitswan_backend.core.views.emqx import EmqxAuthorizationAPIView
 
 app_name = "api"
 urlpatterns = [
@@ -10,4 +11,7 @@ urlpatterns = [
     
     # Automation Server API - used by automation servers with Bearer token authentication
     path("automation_server/", include((automation_server_api_urlpatterns, "automation_server"), namespace="automation_server")),
+
+    # EMQX HTTP authorizer - called by the broker, see EMQX_AUTHORIZATION_MODE
+    path("emqx/authz", EmqxAuthorizationAPIView.as_view(), name="emqx_authz"),
 ]
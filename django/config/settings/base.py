@@ -6,6 +6,7 @@ from datetime import timedelta
 from pathlib import Path
 
 import environ
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent.parent
 # bitswan_backend/
@@ -48,7 +49,9 @@ LOCALE_PATHS = [str(BASE_DIR / "locale")]
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#databases
 DATABASES = {"default": env.db("DATABASE_URL")}
-DATABASES["default"]["ATOMIC_REQUESTS"] = True
+# No ATOMIC_REQUESTS: requests call Keycloak, and a request-wide transaction would hold
+# its connection for the whole call. Writes use short transaction.atomic() blocks and
+# run their Keycloak side effects with transaction.on_commit().
 # https://docs.djangoproject.com/en/stable/ref/settings/#std:setting-DEFAULT_AUTO_FIELD
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -149,6 +152,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
+    "bitswan_backend.core.middleware.KeycloakDegradedModeMiddleware",
 ]
 
 # STATIC
@@ -326,6 +330,8 @@ CORS_ALLOW_HEADERS = [
     "x-org-id",
     "x-org-name",
 ]
+# Set by KeycloakDegradedModeMiddleware when a response was built from stale Keycloak data
+CORS_EXPOSE_HEADERS = ["x-data-stale"]
 
 # By Default swagger ui is available only to admin user(s). You can change permission classes to change that
 # See more configuration options at https://drf-spectacular.readthedocs.io/en/latest/settings.html#settings
@@ -383,6 +389,45 @@ KEYCLOAK_SERVER_URL = os.environ.get("KEYCLOAK_SERVER_URL")
 KEYCLOAK_FRONTEND_URL = os.environ.get("KEYCLOAK_FRONTEND_URL")
 KEYCLOAK_GLOBAL_SUPERADMIN_GROUP_ID = os.environ.get("KEYCLOAK_GLOBAL_SUPERADMIN_GROUP_ID")
 
+# Access tokens are verified locally against the realm JWKS.
+# Issuers default to the server and frontend realm URLs, audience to KEYCLOAK_CLIENT_ID
+# (matched against either the "aud" or "azp" claim).
+KEYCLOAK_TOKEN_ISSUERS = env.list("KEYCLOAK_TOKEN_ISSUERS", default=[])
+KEYCLOAK_TOKEN_AUDIENCE = env.list("KEYCLOAK_TOKEN_AUDIENCE", default=[])
+KEYCLOAK_JWKS_TTL = env.int("KEYCLOAK_JWKS_TTL", default=3600)
+KEYCLOAK_JWKS_MIN_REFRESH_INTERVAL = env.int("KEYCLOAK_JWKS_MIN_REFRESH_INTERVAL", default=30)
+# Group memberships are cached per user and invalidated when the backend changes them
+KEYCLOAK_USER_GROUPS_CACHE_TTL = env.int("KEYCLOAK_USER_GROUPS_CACHE_TTL", default=300)
+# Org group trees are cached per org and updated by the backend's own group writes
+KEYCLOAK_ORG_GROUPS_CACHE_TTL = env.int("KEYCLOAK_ORG_GROUPS_CACHE_TTL", default=300)
+# Brief member lists of orgs, used to count, search and paginate org users
+KEYCLOAK_ORG_MEMBERS_CACHE_TTL = env.int("KEYCLOAK_ORG_MEMBERS_CACHE_TTL", default=60)
+# Django user pk of a token's sub and email, kept in the shared cache
+KEYCLOAK_USER_CACHE_TTL = env.int("KEYCLOAK_USER_CACHE_TTL", default=86400)
+# Seconds and number of resolved users kept in memory per worker
+KEYCLOAK_USER_LOCAL_CACHE_TTL = env.int("KEYCLOAK_USER_LOCAL_CACHE_TTL", default=30)
+KEYCLOAK_USER_LOCAL_CACHE_SIZE = env.int("KEYCLOAK_USER_LOCAL_CACHE_SIZE", default=10000)
+# Seconds the id and email verification of a user are cached for admin logins
+KEYCLOAK_ADMIN_PROFILE_CACHE_TTL = env.int("KEYCLOAK_ADMIN_PROFILE_CACHE_TTL", default=60)
+# Serve directory reads from the local mirror, see `manage.py sync_keycloak_directory`
+KEYCLOAK_DIRECTORY_ENABLED = env.bool("KEYCLOAK_DIRECTORY_ENABLED", default=False)
+# Shared keep-alive connection pool for all Keycloak traffic of a worker
+KEYCLOAK_HTTP_POOL_SIZE = env.int("KEYCLOAK_HTTP_POOL_SIZE", default=20)
+KEYCLOAK_HTTP_MAX_RETRIES = env.int("KEYCLOAK_HTTP_MAX_RETRIES", default=1)
+# Timeouts (seconds) for the OIDC endpoints (token, userinfo, logout, certs) and the admin API,
+# they cap how long a request can wait for Keycloak
+KEYCLOAK_OIDC_TIMEOUT = env.int("KEYCLOAK_OIDC_TIMEOUT", default=10)
+KEYCLOAK_ADMIN_TIMEOUT = env.int("KEYCLOAK_ADMIN_TIMEOUT", default=5)
+# Share of the service account token lifetime after which it is refreshed in the background
+KEYCLOAK_ADMIN_TOKEN_REFRESH_FRACTION = env.float("KEYCLOAK_ADMIN_TOKEN_REFRESH_FRACTION", default=0.7)
+# Cached Keycloak reads are served for this long past their TTL while they are refreshed
+KEYCLOAK_STALE_TTL = env.int("KEYCLOAK_STALE_TTL", default=3600)
+# Admin API calls fail fast for KEYCLOAK_CIRCUIT_RESET_TIMEOUT seconds after this many failures in a row
+KEYCLOAK_CIRCUIT_FAILURE_THRESHOLD = env.int("KEYCLOAK_CIRCUIT_FAILURE_THRESHOLD", default=5)
+KEYCLOAK_CIRCUIT_RESET_TIMEOUT = env.int("KEYCLOAK_CIRCUIT_RESET_TIMEOUT", default=30)
+# Seconds between logs of the coalesced Keycloak lookup counts, 0 disables them
+KEYCLOAK_SINGLE_FLIGHT_METRICS_INTERVAL = env.int("KEYCLOAK_SINGLE_FLIGHT_METRICS_INTERVAL", default=300)
+
 # Frontend application URL for OAuth redirects
 FRONTEND_URL = os.environ.get("FRONTEND_URL")
 
@@ -406,3 +451,50 @@ CORS_ALLOWED_ORIGINS = env.list(
 
 EMQX_JWT_SECRET = os.environ.get("EMQX_JWT_SECRET")
 EMQX_INTERNAL_URL = os.environ.get("EMQX_INTERNAL_URL", "aoc-emqx:1883")
+# Seconds the workspaces reachable by a set of groups are cached for their EMQX JWTs, access changes invalidate them earlier
+EMQX_USER_JWTS_CACHE_TTL = env.int("EMQX_USER_JWTS_CACHE_TTL", default=3600)
+# Signed EMQX JWTs kept in memory per worker
+EMQX_JWT_CACHE_SIZE = env.int("EMQX_JWT_CACHE_SIZE", default=10000)
+# Seconds during which newly signed EMQX JWTs share an expiration time and are reused
+EMQX_JWT_CACHE_BUCKET = env.int("EMQX_JWT_CACHE_BUCKET", default=86400)
+# How session credentials are authorized: "jwt" embeds their ACL in the token,
+# "http" leaves it to EMQX calling /api/emqx/authz so revoked access applies right away
+EMQX_AUTHORIZATION_MODE = env("EMQX_AUTHORIZATION_MODE", default="jwt")
+# Bearer token EMQX must send to /api/emqx/authz (disabled when empty), required in "http" mode
+EMQX_AUTHZ_SECRET = env("EMQX_AUTHZ_SECRET", default="")
+if EMQX_AUTHORIZATION_MODE == "http" and not EMQX_AUTHZ_SECRET:
+    raise ImproperlyConfigured("Set EMQX_AUTHZ_SECRET to use EMQX_AUTHORIZATION_MODE=http.")
+# Seconds the workspaces a user may reach are cached by the authz endpoint
+EMQX_AUTHZ_CACHE_TTL = env.int("EMQX_AUTHZ_CACHE_TTL", default=30)
+# Users whose workspaces are cached by the authz endpoint, per worker
+EMQX_AUTHZ_CACHE_SIZE = env.int("EMQX_AUTHZ_CACHE_SIZE", default=10000)
+# Seconds between checks of the workspace access version in the database by the authz index
+EMQX_AUTHZ_VERSION_CHECK_INTERVAL = env.float("EMQX_AUTHZ_VERSION_CHECK_INTERVAL", default=1.0)
+# Seconds a workspace or automation server must go without group changes before they are published
+MQTT_PUBLISH_DEBOUNCE = env.float("MQTT_PUBLISH_DEBOUNCE", default=1.0)
+# Seconds after which queued group changes are published even if changes keep coming
+MQTT_PUBLISH_MAX_DELAY = env.float("MQTT_PUBLISH_MAX_DELAY", default=10.0)
+# Seconds queued changes stay claimed by a publisher before another one may take them over
+MQTT_OUTBOX_CLAIM_TIMEOUT = env.float("MQTT_OUTBOX_CLAIM_TIMEOUT", default=300.0)
+# Messages per second published by the republish_mqtt_groups command
+MQTT_REPUBLISH_RATE = env.float("MQTT_REPUBLISH_RATE", default=50.0)
+# QoS of the messages published by the backend
+MQTT_PUBLISH_QOS = env.int("MQTT_PUBLISH_QOS", default=1)
+# Messages sent to the broker and not acknowledged yet
+MQTT_MAX_INFLIGHT = env.int("MQTT_MAX_INFLIGHT", default=20)
+# Messages waiting for an acknowledgement, in flight or queued, before the overflow policy applies
+MQTT_MAX_QUEUED_MESSAGES = env.int("MQTT_MAX_QUEUED_MESSAGES", default=1000)
+# "block" waits up to MQTT_PUBLISH_TIMEOUT for room in a full queue, "drop" drops the new message
+MQTT_QUEUE_OVERFLOW = env("MQTT_QUEUE_OVERFLOW", default="block")
+# Seconds to wait for room in the queue, and for the acknowledgement of a published batch
+MQTT_PUBLISH_TIMEOUT = env.float("MQTT_PUBLISH_TIMEOUT", default=30.0)
+# Bounds in seconds of the exponential backoff between reconnect attempts
+MQTT_RECONNECT_MIN_DELAY = env.int("MQTT_RECONNECT_MIN_DELAY", default=1)
+MQTT_RECONNECT_MAX_DELAY = env.int("MQTT_RECONNECT_MAX_DELAY", default=60)
+
+# Automation servers
+# ------------------------------------------------------------------------------
+# Seconds a verified automation server access token is cached per worker
+AUTOMATION_SERVER_TOKEN_CACHE_TTL = env.int("AUTOMATION_SERVER_TOKEN_CACHE_TTL", default=30)
+# Verified automation server access tokens cached per worker
+AUTOMATION_SERVER_TOKEN_CACHE_SIZE = env.int("AUTOMATION_SERVER_TOKEN_CACHE_SIZE", default=10000)
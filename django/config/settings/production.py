@@ -20,7 +20,45 @@ ALLOWED_HOSTS = env.list("DJANGO_ALLOWED_HOSTS", default=["bitswan.space"])
 
 # DATABASES
 # ------------------------------------------------------------------------------
-DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
+# Connections come from a psycopg3 pool per worker process, shared by its threads,
+# see bitswan_backend/core/db/postgresql_pool. DATABASE_POOL=False falls back to
+# persistent connections per thread, kept for CONN_MAX_AGE seconds.
+if env.bool("DATABASE_POOL", default=True):
+    DATABASES["default"]["ENGINE"] = "bitswan_backend.core.db.postgresql_pool"
+    # Connections go back to the pool at the end of every request
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    # Check connections as they are taken from the pool
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = env.bool("DATABASE_POOL_HEALTH_CHECKS", default=True)
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+        # Connections per worker, opened up front and at most
+        "min_size": env.int("DATABASE_POOL_MIN_SIZE", default=2),
+        "max_size": env.int("DATABASE_POOL_MAX_SIZE", default=10),
+        # Seconds after which idle connections above min_size are closed
+        "max_idle": env.float("DATABASE_POOL_MAX_IDLE", default=300.0),
+        # Seconds a request waits for a free connection before failing
+        "timeout": env.float("DATABASE_POOL_TIMEOUT", default=10.0),
+    }
+    # Seconds between logs of the pool metrics (checkouts, wait time), 0 disables them
+    DATABASE_POOL_METRICS_INTERVAL = env.int("DATABASE_POOL_METRICS_INTERVAL", default=300)
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
+
+# CACHES
+# ------------------------------------------------------------------------------
+# Share cached Keycloak data between workers when Redis is available
+if env("REDIS_URL", default=None):
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": env("REDIS_URL"),
+            "OPTIONS": {
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                # Mimicking memcache behavior.
+                # https://github.com/jazzband/django-redis#memcached-exceptions-behavior
+                "IGNORE_EXCEPTIONS": True,
+            },
+        },
+    }
 
 
 # SECURITY